@@ -1,20 +1,31 @@
 import asyncio
 import configparser
+import json
 import logging
 import os
 from pathlib import Path
 import shutil
 import tempfile
+import uuid
 import zipfile
 
 
-import requests
-
+import httpx
 from dotenv import load_dotenv
 from fastapi import FastAPI, File, Form, HTTPException, UploadFile
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
 from pythonjsonlogger.json import JsonFormatter
 from src.scripts import classify_package as classifier
+from src.utilities.artifact_cache import ArtifactCache
+from src.utilities.job_queue import DONE, FAILED, JobQueue, QueueFullError
+from src.utilities.metrics import REGISTRY, CallbackGauge, register_cache, render_metrics, stage_timer
+from src.utilities.package_state import MASState
+from src.utilities.pipeline_stages import index_metadata
+from src.utilities.progress import METADATA_FIELDS, EventCallback, emit, format_sse
+from src.utilities.pypi_client import PackageNotFoundError, PyPIDownloader, PyPIError
 from src.utilities.schemas import Classification
+from src.utilities.verdict_cache import VerdictCache, artifact_sha256
+from src.utilities.workspace import WORKSPACES
 
 load_dotenv()  
 # Create logs directory if it doesn't exist
@@ -43,7 +54,64 @@ os.makedirs(CUSTOM_TEMP_DIR, exist_ok=True)
 COMPRESSION_EXTENSIONS = {'.tar.gz', '.zip'}
 MAX_RETRIES = 1
 RETRY_DELAY = 4  # seconds between retries
+BATCH_CONCURRENCY = parser.getint("API_CONFIG", "BATCH_CONCURRENCY", fallback=4)
+BATCH_MAX_PACKAGES = parser.getint("API_CONFIG", "BATCH_MAX_PACKAGES", fallback=500)
+JOB_WORKERS = parser.getint("API_CONFIG", "JOB_WORKERS", fallback=4)
+JOB_POLL_INTERVAL = 1.0  # seconds an idle worker waits before re-checking the queue
+SSE_KEEPALIVE_SECONDS = 15.0  # comment line sent on an idle /classify/stream so proxies keep it open
 app = FastAPI()
+pypi_downloader = PyPIDownloader(
+    artifact_cache=ArtifactCache() if parser.getboolean("CACHE_CONFIG", "ARTIFACT_CACHE_ENABLED", fallback=True) else None
+)
+verdict_cache = VerdictCache()
+# One pipeline (worker pool + per-stage limits) shared by all requests; state is per request.
+pipeline = classifier.ClassificationPipeline()
+
+
+@app.on_event("shutdown")
+async def close_pypi_downloader():
+    await pypi_downloader.aclose()
+
+
+job_queue = JobQueue()
+# Woken on every submit so idle workers pick new jobs up immediately.
+job_available = asyncio.Event()
+# Synchronous /classify callers waiting on their job, by job id.
+job_waiters: dict[str, asyncio.Future] = {}
+job_workers: list[asyncio.Task] = []
+
+register_cache("verdict", verdict_cache)
+if pypi_downloader.artifact_cache is not None:
+    register_cache("artifact", pypi_downloader.artifact_cache)
+REGISTRY.register(CallbackGauge("mampd_jobs_pending", "Queued or running jobs.", [],
+                                lambda: {(): job_queue.pending()}))
+
+
+@app.on_event("shutdown")
+def shutdown_pipeline():
+    pipeline.shutdown()
+
+
+@app.on_event("startup")
+async def sweep_workspaces():
+    # Workspaces of a previous process that was killed mid-run.
+    await asyncio.to_thread(WORKSPACES.sweep, True)
+
+
+@app.on_event("startup")
+async def start_job_workers():
+    await asyncio.to_thread(job_queue.requeue_running)
+    await asyncio.to_thread(job_queue.purge_finished)
+    for _ in range(JOB_WORKERS):
+        job_workers.append(asyncio.create_task(job_worker()))
+
+
+@app.on_event("shutdown")
+async def stop_job_workers():
+    for task in job_workers:
+        task.cancel()
+    await asyncio.gather(*job_workers, return_exceptions=True)
+    job_workers.clear()
 
 def parse_classification_result(result: dict) -> dict:
     package_name: str = result['state']['package_name']
@@ -62,9 +130,9 @@ def parse_classification_result(result: dict) -> dict:
         "available_python_files": result['state']['available_python_files'],
         "package_formatted_path": result['state']['package_formatted_path']
     }
-    classification = result['classification_result'].final_output.classification.value
-    justification = result['classification_result'].final_output.justification
-    suspicious_files = result['classification_result'].final_output.suspicious_files
+    classification = result['classification_output'].classification.value
+    justification = result['classification_output'].justification
+    suspicious_files = result['classification_output'].suspicious_files
     
     classification_result_data = {
         "package_name": package_name,
@@ -72,12 +140,22 @@ def parse_classification_result(result: dict) -> dict:
         "classification": classification,
         "justification": justification,
         "suspicious_files": suspicious_files,
-        
+        "prescreen": result['state']['prescreen'],
+        "decided_by": result.get('decided_by'),
+        "version_diff": result['state']['version_diff'],
+        "metrics": result.get('metrics'),
     }
     return classification_result_data
 
 
-async def upload_file_to_temp(upload_file: UploadFile) -> str:
+def cacheable_result(result_data: dict) -> dict:
+    """*result_data* without what only describes this run: its metrics, and the store path in a removed workspace."""
+    cached = {k: v for k, v in result_data.items() if k != "metrics"}
+    cached["package_metadata"] = {k: v for k, v in cached["package_metadata"].items() if k != "package_formatted_path"}
+    return cached
+
+
+async def save_upload_to_temp(upload_file: UploadFile) -> str:
     """Save the uploaded file to a temporary location.
     If compressed archive, save as is.
     If .py file, zip it.
@@ -99,7 +177,9 @@ async def upload_file_to_temp(upload_file: UploadFile) -> str:
         zip_path = os.path.join(temp_dir, upload_file.filename + '.zip')
         with zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_DEFLATED) as zipf:
             file_contents = await upload_file.read()
-            zipf.writestr(upload_file.filename, file_contents)
+            # Fixed timestamp so the same script always zips to the same bytes (see verdict_cache).
+            zipf.writestr(zipfile.ZipInfo(upload_file.filename, date_time=(1980, 1, 1, 0, 0, 0)), file_contents,
+                          compress_type=zipfile.ZIP_DEFLATED)
         return zip_path
 
     else:
@@ -113,88 +193,411 @@ async def upload_file_to_temp(upload_file: UploadFile | None) -> str:
     """Handle the upload of either a file or a folder."""
     if upload_file:
         # Save uploaded file to a temp location
-        tmp_path = await upload_file_to_temp(upload_file)
+        tmp_path = await save_upload_to_temp(upload_file)
         
         return tmp_path
     else:
         raise HTTPException(status_code=400, detail="No file or folder_path provided")
     
-def download_pypi_package(package_name, version=None):
-    url = f"https://pypi.org/pypi/{package_name}/json"
-    resp = requests.get(url)
-    resp.raise_for_status()
-    info = resp.json()
-    version = version or info["info"]["version"]
+async def download_pypi_package(package_name, version=None):
+    """Stream the package from PyPI into its own temp directory and return the file path."""
+    temp_dir = tempfile.mkdtemp(dir=CUSTOM_TEMP_DIR)
+    try:
+        with stage_timer("download"):
+            filename = await pypi_downloader.download(package_name, version, temp_dir)
+    except PackageNotFoundError as e:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+        logger.error(str(e))
+        raise HTTPException(status_code=400, detail=str(e))
+    except (PyPIError, httpx.HTTPError) as e:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+        logger.error(f"Failed to download {package_name}=={version}: {e}")
+        raise HTTPException(status_code=502, detail=f"Failed to download {package_name}=={version}: {e}")
+
+    return str(filename)
+
+
+def cleanup_temp_path(temp_path: str | None) -> None:
+    """Remove an uploaded or downloaded package once it has been classified."""
+    try:
+        if temp_path and os.path.exists(temp_path):
+            if os.path.isdir(temp_path):
+                # If it's a directory, remove it
+                shutil.rmtree(temp_path)
+            else:
+                # If it's a file, check if it's in a temp subdirectory or directly in CUSTOM_TEMP_DIR
+                parent_dir = os.path.dirname(temp_path)
+                if parent_dir != CUSTOM_TEMP_DIR and parent_dir.startswith(CUSTOM_TEMP_DIR):
+                    # File is in a temp subdirectory (uploaded file case), remove the parent directory
+                    shutil.rmtree(parent_dir)
+                else:
+                    # File is directly in CUSTOM_TEMP_DIR (downloaded package case), just remove the file
+                    os.remove(temp_path)
+    except Exception as cleanup_error:
+        logger.error(f"Error during cleanup: {cleanup_error}")
 
-    releases = info["releases"].get(version)
-    if not releases:
-        logger.error(f"No release for {package_name}=={version}")
-        raise HTTPException(status_code=400, detail=f"No package found for {package_name}=={version}")
 
-    source_file = next((r for r in releases if r["packagetype"] == "sdist"), releases[0])
-    download_url = source_file["url"]
+async def classify_temp_path(temp_path: str, force_refresh: bool = False,
+                             on_event: EventCallback | None = None, incremental: bool = False) -> dict:
+    """Classify the package at *temp_path* with retries; the caller removes *temp_path* afterwards.
+    Verdicts are served from the verdict cache unless force_refresh is set.
+    With incremental, only the files changed since the nearest classified earlier version are reviewed.
+    *on_event* receives the pipeline's progress events (see src/utilities/progress.py)."""
+    artifact_hash = None
+    if os.path.isfile(temp_path):
+        # sha256 of a file is I/O bound; a thread avoids shipping the job to a pool process.
+        async with pipeline.executor.limit("hash"):
+            with stage_timer("hash"):
+                artifact_hash = await asyncio.to_thread(artifact_sha256, temp_path)
+    # Incremental verdicts depend on the version history at the time of the scan, they are never cached.
+    cacheable = bool(artifact_hash) and not incremental
+    if cacheable and not force_refresh:
+        cached_result = await asyncio.to_thread(verdict_cache.get, artifact_hash, model_name)
+        if cached_result is not None:
+            logger.info(f"Verdict cache hit for {artifact_hash}")
+            emit(on_event, "cache_hit", {"artifact_sha256": artifact_hash})
+            return {**cached_result, "cached": True}
 
-    filename = os.path.join(CUSTOM_TEMP_DIR, f"{package_name}-{version}.tar.gz")
+    for attempt in range(1, MAX_RETRIES + 1):
+        try:
+            classification_result = await pipeline.classify(temp_path, on_event=on_event, incremental=incremental)
+            result_data = parse_classification_result(classification_result)
+            # Pre-screen verdicts follow the policy in config.ini rather than the model: they are not cached.
+            if cacheable and result_data["decided_by"] != "prescreen":
+                await asyncio.to_thread(verdict_cache.put, artifact_hash, model_name, cacheable_result(result_data))
+            return {**result_data, "cached": False}
+
+        except Exception as e:
+            # Check if the error message contains 'Max turns exceeded'
+            if attempt < MAX_RETRIES:
+                logger.error(f"Attempt {attempt} failed , retrying...")
+                await asyncio.sleep(RETRY_DELAY)
+            else:
+                raise HTTPException(status_code=500, detail=f"Max turns exceeded after {MAX_RETRIES} retries: {str(e)}")
+
+
+async def run_job(request: dict) -> dict:
+    """Classify the package described by a queued job request.
+    A saved upload is left in place: `job_worker` removes it once the job is finished."""
+    temp_path = request.get("temp_path")
+    if temp_path is not None:
+        return await classify_temp_path(temp_path, force_refresh=request.get("force_refresh", False),
+                                        incremental=request.get("incremental", False))
+    # A re-queued job downloads the package again, so the download never outlives this attempt.
+    temp_path = await download_pypi_package(request["package_name"], request.get("version"))
+    try:
+        return await classify_temp_path(temp_path, force_refresh=request.get("force_refresh", False),
+                                        incremental=request.get("incremental", False))
+    finally:
+        cleanup_temp_path(temp_path)
+
+
+async def keep_job_lease(job_id: str) -> None:
+    """Renew the lease of a running job until cancelled, so other processes do not claim it again."""
+    while True:
+        await asyncio.sleep(job_queue.lease_seconds / 3)
+        await asyncio.to_thread(job_queue.renew, job_id)
+
+
+async def job_worker():
+    """Take jobs from the queue one at a time until cancelled."""
+    while True:
+        claimed = await asyncio.to_thread(job_queue.claim)
+        if claimed is None:
+            job_available.clear()
+            try:
+                await asyncio.wait_for(job_available.wait(), timeout=JOB_POLL_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+            continue
+
+        job_id, request = claimed
+        waiter = job_waiters.get(job_id)
+        lease = asyncio.create_task(keep_job_lease(job_id))
+        try:
+            result_data = await run_job(request)
+        except HTTPException as e:
+            await asyncio.to_thread(job_queue.fail, job_id, str(e.detail), e.status_code)
+            cleanup_temp_path(request.get("temp_path"))
+            if waiter and not waiter.done():
+                waiter.set_exception(e)
+        except asyncio.CancelledError:
+            # Shutting down: the job stays "running" and is re-queued on the next start,
+            # so its saved upload must stay too.
+            raise
+        except Exception as e:
+            logger.error(f"Job {job_id} failed: {e}")
+            await asyncio.to_thread(job_queue.fail, job_id, str(e), 500)
+            cleanup_temp_path(request.get("temp_path"))
+            if waiter and not waiter.done():
+                waiter.set_exception(HTTPException(status_code=500, detail=str(e)))
+        else:
+            await asyncio.to_thread(job_queue.complete, job_id, result_data)
+            cleanup_temp_path(request.get("temp_path"))
+            if waiter and not waiter.done():
+                waiter.set_result(result_data)
+        finally:
+            lease.cancel()
+
+
+async def submit_job(upload_file: UploadFile | None, package_name: str | None,
+                     version: str | None, force_refresh: bool, job_id: str | None = None,
+                     incremental: bool = False) -> str:
+    """Validate the request, persist any upload, and queue it. Raises 429 when the queue is full."""
+    if not upload_file and not package_name:
+        raise HTTPException(status_code=400, detail="No package name or upload file provided ")
+    request = {"package_name": package_name, "version": version, "force_refresh": force_refresh,
+               "incremental": incremental, "temp_path": None}
+    if upload_file:
+        # Uploads are saved now: the job may run after this request has finished.
+        request["temp_path"] = await upload_file_to_temp(upload_file)
+    try:
+        job_id = await asyncio.to_thread(job_queue.submit, request, job_id, JOB_WORKERS)
+    except QueueFullError as e:
+        cleanup_temp_path(request["temp_path"])
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": str(e.retry_after)})
+    job_available.set()
+    return job_id
 
-    response = requests.get(download_url)
-    response.raise_for_status()
-    with open(filename, "wb") as f:
-        f.write(response.content)
 
-    logger.info(f"Downloaded {filename}")
-    return filename
+def job_status(job: dict) -> dict:
+    return {
+        "job_id": job["id"],
+        "status": job["status"],
+        "created_at": job["created_at"],
+        "started_at": job["started_at"],
+        "finished_at": job["finished_at"],
+        "error": job["error"],
+    }
+
+
+@app.post("/jobs", status_code=202)
+async def create_job(
+    upload_file: UploadFile | None = File(default=None),
+    package_name: str | None = Form(default=None),
+    version: str | None = Form(default=None),
+    force_refresh: bool = Form(default=False),
+    incremental: bool = Form(default=False)
+):
+    """Queue a classification and return its job id immediately.
+    Poll GET /jobs/{job_id} for the status and GET /jobs/{job_id}/result for the verdict."""
+    job_id = await submit_job(upload_file, package_name, version, force_refresh, incremental=incremental)
+    return {"job_id": job_id, "status": "queued"}
+
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    """Status of a queued classification job."""
+    job = await asyncio.to_thread(job_queue.get, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Unknown job {job_id}")
+    return job_status(job)
+
+
+@app.get("/jobs/{job_id}/result")
+async def get_job_result(job_id: str):
+    """Verdict of a finished job; 202 with the status while it is still queued or running."""
+    job = await asyncio.to_thread(job_queue.get, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Unknown job {job_id}")
+    if job["status"] == DONE:
+        return job["result"]
+    if job["status"] == FAILED:
+        raise HTTPException(status_code=job["error_code"] or 500, detail=job["error"])
+    return JSONResponse(status_code=202, content=job_status(job), headers={"Retry-After": str(int(JOB_POLL_INTERVAL) or 1)})
+
 
 @app.post("/classify") 
 async def classify(
+    upload_file: UploadFile | None = File(default=None),
+    package_name: str | None = Form(default=None),
+    version: str | None = Form(default=None),
+    force_refresh: bool = Form(default=False),
+    incremental: bool = Form(default=False)
+):
+    """Endpoint to classify an uploaded file or folder.
+    Set force_refresh to bypass the verdict cache.
+    Set incremental to review only the files changed since the nearest earlier version already classified.
+    Runs through the job queue and waits for the result; prefer POST /jobs for long runs."""
+    job_id = uuid.uuid4().hex
+    # Registered before submitting so a worker that finishes first still finds it.
+    waiter = job_waiters[job_id] = asyncio.get_running_loop().create_future()
+    try:
+        await submit_job(upload_file, package_name, version, force_refresh, job_id=job_id, incremental=incremental)
+        while True:
+            # A worker of another process sharing the queue never resolves the waiter: poll the queue too.
+            done, _ = await asyncio.wait({waiter}, timeout=JOB_POLL_INTERVAL)
+            if done:
+                return waiter.result()
+            job = await asyncio.to_thread(job_queue.get, job_id)
+            if job is None:
+                raise HTTPException(status_code=500, detail=f"Job {job_id} disappeared from the queue")
+            if job["status"] == DONE:
+                return job["result"]
+            if job["status"] == FAILED:
+                raise HTTPException(status_code=job["error_code"] or 500, detail=job["error"])
+    finally:
+        job_waiters.pop(job_id, None)
+
+
+@app.post("/classify/stream")
+async def classify_stream(
+    upload_file: UploadFile | None = File(default=None),
+    package_name: str | None = Form(default=None),
+    version: str | None = Form(default=None),
+    force_refresh: bool = Form(default=False),
+    incremental: bool = Form(default=False)
+):
+    """Classify a package and stream its progress as server-sent events.
+
+    Events: "downloaded", "cache_hit", "extracted", "metadata", "prescreen", "version_diff", "classifying",
+    "tool_call", "tool_result", "verdict", then "result" (the /classify response) or "error"
+    ({"status_code", "detail"}). The stream ends after "result" or "error"."""
+    if not upload_file and not package_name:
+        raise HTTPException(status_code=400, detail="No package name or upload file provided ")
+    # Uploads are only readable while the request is open, save them before streaming starts.
+    temp_path = await upload_file_to_temp(upload_file) if upload_file else None
+    events: asyncio.Queue = asyncio.Queue()
+
+    def on_event(event: str, data: dict) -> None:
+        events.put_nowait((event, data))
+
+    async def run() -> None:
+        path = temp_path
+        try:
+            if path is None:
+                path = await download_pypi_package(package_name, version)
+                on_event("downloaded", {"package_name": package_name, "version": version})
+            result_data = await classify_temp_path(path, force_refresh=force_refresh, on_event=on_event,
+                                                   incremental=incremental)
+            on_event("result", result_data)
+        except HTTPException as e:
+            on_event("error", {"status_code": e.status_code, "detail": e.detail})
+        except Exception as e:
+            logger.error(f"Streamed classification failed: {e}")
+            on_event("error", {"status_code": 500, "detail": str(e)})
+        finally:
+            cleanup_temp_path(path)
+
+    async def stream_events():
+        task = asyncio.create_task(run())
+        event_id = 0
+        try:
+            while True:
+                try:
+                    event, data = await asyncio.wait_for(events.get(), timeout=SSE_KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                yield format_sse(event, data, event_id)
+                event_id += 1
+                if event in ("result", "error"):
+                    break
+        finally:
+            # Client went away: stop the classification.
+            task.cancel()
+
+    return StreamingResponse(stream_events(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+
+@app.post("/metadata")
+async def package_metadata(
     upload_file: UploadFile | None = File(default=None),
     package_name: str | None = Form(default=None),
     version: str | None = Form(default=None)
 ):
-    """Endpoint to classify an uploaded file or folder."""
-    temp_path = None    
-    if upload_file:
-        temp_path = await upload_file_to_temp(upload_file)
-        
-    elif package_name:
-        temp_path = download_pypi_package(package_name, version)
-    else:
+    """Package metadata and file listing read from the archive index alone; nothing is extracted or classified.
+    Zip and wheel indexes are read without decompressing anything. Tar headers are interleaved with the data,
+    so a compressed tarball is decompressed up to the extraction byte and ratio caps."""
+    if not upload_file and not package_name:
         raise HTTPException(status_code=400, detail="No package name or upload file provided ")
-    
+    temp_path = await upload_file_to_temp(upload_file) if upload_file else await download_pypi_package(package_name, version)
     try:
-        for attempt in range(1, MAX_RETRIES + 1):
-            try:
-                classification_result = await classifier.classify(temp_path)
-                result_data = parse_classification_result(classification_result)
-                return result_data
-
-            except Exception as e:
-                # Check if the error message contains 'Max turns exceeded'
-                if attempt < MAX_RETRIES:
-                    logger.error(f"Attempt {attempt} failed , retrying...")
-                    await asyncio.sleep(RETRY_DELAY)
-                else:
-                    raise HTTPException(status_code=500, detail=f"Max turns exceeded after {MAX_RETRIES} retries: {str(e)}")
+        state = MASState(package_location=temp_path)
+        with stage_timer("index"):
+            metadata = await index_metadata(state, central_directory_only=False)
+        if metadata is None:
+            raise HTTPException(status_code=400, detail=f"Cannot read the archive index of {Path(temp_path).name}")
+        return state.model_dump(mode="json", include=set(METADATA_FIELDS))
     finally:
-        # Clean up temporary files/directories
-        try:
-            if temp_path and os.path.exists(temp_path):
-                if os.path.isdir(temp_path):
-                    # If it's a directory, remove it
-                    shutil.rmtree(temp_path)
-                else:
-                    # If it's a file, check if it's in a temp subdirectory or directly in CUSTOM_TEMP_DIR
-                    parent_dir = os.path.dirname(temp_path)
-                    if parent_dir != CUSTOM_TEMP_DIR and parent_dir.startswith(CUSTOM_TEMP_DIR):
-                        # File is in a temp subdirectory (uploaded file case), remove the parent directory
-                        shutil.rmtree(parent_dir)
-                    else:
-                        # File is directly in CUSTOM_TEMP_DIR (downloaded package case), just remove the file
-                        os.remove(temp_path)
-        except Exception as cleanup_error:
-            logger.error(f"Error during cleanup: {cleanup_error}")
-    
+        cleanup_temp_path(temp_path)
 
 
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Prometheus metrics: stage and tool latency histograms, token/turn/tool counters, cache hit ratios."""
+    text = await asyncio.to_thread(render_metrics)
+    return PlainTextResponse(text, media_type="text/plain; version=0.0.4; charset=utf-8")
 
-    
 
+def parse_batch_packages(packages: str | None) -> list[dict]:
+    """Parse the `packages` form field: a JSON list of {"package_name", "version"} objects."""
+    if not packages:
+        return []
+    try:
+        requested = json.loads(packages)
+    except json.JSONDecodeError as e:
+        raise HTTPException(status_code=400, detail=f"packages must be a JSON list: {e}")
+    if not isinstance(requested, list) or not all(isinstance(p, dict) and p.get("package_name") for p in requested):
+        raise HTTPException(status_code=400, detail='packages must be a JSON list of {"package_name": ..., "version": ...} objects')
+    return [{"package_name": p["package_name"], "version": p.get("version")} for p in requested]
+
+
+@app.post("/classify/batch")
+async def classify_batch(
+    upload_files: list[UploadFile] | None = File(default=None),
+    packages: str | None = Form(default=None),
+    force_refresh: bool = Form(default=False)
+):
+    """Classify several packages concurrently and stream one NDJSON line per package as each completes.
+
+    `packages` is a JSON list of {"package_name": ..., "version": ...} objects; uploads are classified alongside them.
+    At most BATCH_CONCURRENCY packages are classified at the same time."""
+    requested = parse_batch_packages(packages)
+    upload_files = upload_files or []
+    if not requested and not upload_files:
+        raise HTTPException(status_code=400, detail="No package names or upload files provided")
+    if len(requested) + len(upload_files) > BATCH_MAX_PACKAGES:
+        raise HTTPException(status_code=400, detail=f"At most {BATCH_MAX_PACKAGES} packages per batch")
+
+    # Uploads are only readable while the request is open, save them before streaming starts.
+    jobs: list[tuple[dict, str | None]] = []
+    for upload in upload_files:
+        jobs.append(({"upload_file": upload.filename}, await upload_file_to_temp(upload)))
+    for package in requested:
+        jobs.append((package, None))
+
+    semaphore = asyncio.Semaphore(BATCH_CONCURRENCY)
+
+    async def run_one(label: dict, temp_path: str | None) -> dict:
+        try:
+            async with semaphore:
+                if temp_path is None:
+                    temp_path = await download_pypi_package(label["package_name"], label["version"])
+                result_data = await classify_temp_path(temp_path, force_refresh=force_refresh)
+            return {**label, "status": "ok", "result": result_data}
+        except HTTPException as e:
+            return {**label, "status": "error", "error": e.detail}
+        except Exception as e:
+            logger.error(f"Batch classification failed for {label}: {e}")
+            return {**label, "status": "error", "error": str(e)}
+        finally:
+            cleanup_temp_path(temp_path)
+
+    async def stream_results():
+        tasks = [asyncio.create_task(run_one(label, temp_path)) for label, temp_path in jobs]
+        try:
+            for finished in asyncio.as_completed(tasks):
+                yield json.dumps(await finished, default=str) + "\n"
+        finally:
+            # Client went away: stop the remaining classifications and wait for them to unwind,
+            # so no task still reads an upload when it is removed. Tasks cancelled before they
+            # started never reach their own cleanup, so every saved upload is removed here.
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            for _, temp_path in jobs:
+                cleanup_temp_path(temp_path)
+
+    return StreamingResponse(stream_results(), media_type="application/x-ndjson")
@@ -1,9 +1,11 @@
 import logging
-from agents import Agent, ModelSettings,Runner
-from src.utilities.tools import  get_functions, get_imports, get_python_script
+from agents import Agent, Model, ModelSettings, RunHooks, Runner
+from src.utilities.tools import  get_functions, get_import_graph, get_imports, get_python_script
 from src.utilities.package_state import MASState
 from src.utilities.prompts import CLASSIFIER_PROMPT
-from src.utilities.schemas import ClassificationAgentOutput
+from src.utilities.prescreen import ATTACH_FINDINGS, format_findings
+from src.utilities.version_history import VERSION_DIFF_MAX_FILES
+from src.utilities.schemas import ClassificationAgentOutput, VersionDiff
 from src.mampd_agents.mampd_agent_interface import MAMPDAgentInterface
 from typing import Optional
 
@@ -12,14 +14,15 @@ TEMPERATURE = 0.5
 
 class ClassificationAgent(MAMPDAgentInterface):
     def __init__(self, 
-                state: MASState= MASState(),
+                state: Optional[MASState] = None,
                 model_name: Optional[str] = None,
                 api_key: Optional[str] = None,
-                 model_url: Optional[str] = None
+                 model_url: Optional[str] = None,
+                 model: Optional[Model] = None
                 ):
-        super().__init__(state=state, model_name=model_name, api_key=api_key, model_url=model_url)
+        super().__init__(state=state, model_name=model_name, api_key=api_key, model_url=model_url, model=model)
         
-        self.classification_tools = [get_functions, get_imports, get_python_script]
+        self.classification_tools = [get_import_graph, get_functions, get_imports, get_python_script]
         self.settings = ModelSettings(
             tool_choice="auto",
             parallel_tool_calls=True,
@@ -41,6 +44,21 @@ class ClassificationAgent(MAMPDAgentInterface):
             output_type=ClassificationAgentOutput
             )
           
+    @staticmethod
+    def format_version_diff(diff: VersionDiff) -> str:
+        def listing(paths: list[str]) -> str:
+            shown = ", ".join(paths[:VERSION_DIFF_MAX_FILES])
+            more = len(paths) - VERSION_DIFF_MAX_FILES
+            return shown + (f" (and {more} more)" if more > 0 else "") if paths else "none"
+
+        return f"""INCREMENTAL SCAN against version {diff.prior_version}, previously classified {diff.prior_classification}: {diff.prior_justification}
+                Previously suspicious files: {listing(diff.prior_suspicious_files)}
+                Added files: {listing(diff.added)}
+                Changed files: {listing(diff.changed)}
+                Removed files: {listing(diff.removed)}
+                {diff.unchanged} unchanged files were already analysed with that version. Review only the added and changed files:
+                decide whether they introduce malicious behaviour (an injected payload in a patch release is the typical attack)."""
+
     def add_guideline_context(guidelines:str)->str:
         if not guidelines:
             return ''
@@ -49,14 +67,26 @@ class ClassificationAgent(MAMPDAgentInterface):
         """
         return general_guide
           
-    async def run_classification_agent(self, state: MASState):
+    async def run_classification_agent(self, state: MASState, hooks: Optional[RunHooks] = None):
         """
         Runs the classification agent to classify the package.
         """
-        exclude = {"messages", "error", "package_class", "classification_explanation"}
+        exclude = {"messages", "error", "package_class", "classification_explanation", "prescreen",
+                   "import_graph", "version_diff"}
 
         # one-liner, lets Pydantic do the work
         metadata_information = state.model_dump(exclude=exclude)
+        python_files = state.available_python_files
+        static_findings = format_findings(state.prescreen) if state.prescreen and ATTACH_FINDINGS else ""
+        version_delta = ""
+        if state.version_diff is not None:
+            # Incremental scan: only the files that differ from the prior version are offered for review.
+            delta = set(state.version_diff.added + state.version_diff.changed)
+            python_files = [f for f in python_files if f.path in delta]
+            version_delta = self.format_version_diff(state.version_diff)
+
+        # Listed as "path (size bytes, sha256:...)" so the agent can prioritize without a tool call.
+        metadata_information["available_python_files"] = [str(f) for f in python_files]
 
         self.logger.info(f"Starting classification agent with metadata: {metadata_information['package_location']}")
 
@@ -64,7 +94,8 @@ class ClassificationAgent(MAMPDAgentInterface):
                                              input=f""" Classify the package as malicious or benign given the metadata
                                              preformatted_package_path: {state.package_formatted_path}
                                                 Metadata Information: {metadata_information}
-                                                
+                                                {static_findings}
+                                                {version_delta}
                                                 """,
-                                             context=state, max_turns= 15)
+                                             context=state, max_turns= 15, hooks=hooks)
         return classification_agent_result # type: ignore
@@ -1,5 +1,5 @@
 import logging
-from agents import Agent, ModelSettings,Runner
+from agents import Agent, Model, ModelSettings, RunHooks, Runner
 from src.utilities.tools import (extract_package_info, 
                                                                  extract_package_file_info, 
                                                             )
@@ -11,12 +11,13 @@ from typing import Optional
 
 class MetaDataAgent(MAMPDAgentInterface):
      def __init__(self, 
-                state: MASState= MASState(),
+                state: Optional[MASState] = None,
                 model_name: Optional[str] = None,
                 api_key: Optional[str] = None,
-                 model_url: Optional[str] = None
+                 model_url: Optional[str] = None,
+                 model: Optional[Model] = None
                 ):
-          super().__init__(state=state, model_name=model_name, api_key=api_key, model_url=model_url)
+          super().__init__(state=state, model_name=model_name, api_key=api_key, model_url=model_url, model=model)
           
           self.data_tools = [extract_package_info, extract_package_file_info] # type: ignore
           self.settings = ModelSettings(
@@ -41,7 +42,7 @@ class MetaDataAgent(MAMPDAgentInterface):
             )
 
 
-     async def run_metadata_agent(self, state: MASState):
+     async def run_metadata_agent(self, state: MASState, hooks: Optional[RunHooks] = None):
           """
           Runs the metadata agent to extract information about the package.
           """
@@ -49,7 +50,7 @@ class MetaDataAgent(MAMPDAgentInterface):
           metadata_agent_result = await Runner.run(self.metadata_agent,
                                                     input=f""" Get the package information of this package formated in the package in the JSON preformated file.
                                                   JSON File Location: {str(state.package_formatted_path)}""",
-                                                    context=state, max_turns= 5)
+                                                    context=state, max_turns= 5, hooks=hooks)
           return metadata_agent_result # type: ignore
 
 
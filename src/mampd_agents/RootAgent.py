@@ -1,5 +1,5 @@
 import logging
-from agents import Agent, ModelSettings,Runner
+from agents import Agent, Model, ModelSettings, RunHooks, Runner
 from src.utilities.tools import unpack_archive, unpack_folder, is_archieve
 from src.utilities.package_state import MASState
 from src.utilities.prompts import SUPERVISOR_PROMPT
@@ -9,12 +9,13 @@ from typing import List, Any, Optional
 
 class RootAgent(MAMPDAgentInterface):
     def __init__(self, 
-                state: MASState= MASState(),
+                state: Optional[MASState] = None,
                 model_name: Optional[str] = None,
                 api_key: Optional[str] = None,
-                 model_url: Optional[str] = None
+                 model_url: Optional[str] = None,
+                 model: Optional[Model] = None
                 ):
-        super().__init__(state=state, model_name=model_name, api_key=api_key, model_url=model_url) # type: ignore
+        super().__init__(state=state, model_name=model_name, api_key=api_key, model_url=model_url, model=model) # type: ignore
         
         self.supervisor_tools:List[Any] = [unpack_archive, unpack_folder,is_archieve]
         self.settings = ModelSettings(
@@ -41,12 +42,12 @@ class RootAgent(MAMPDAgentInterface):
         """Sets the instructions for the supervisor agent."""
         self.supervisor_agent.instructions = instructions
 
-    async def run_root_agent(self, state: MASState):
+    async def run_root_agent(self, state: MASState, hooks: Optional[RunHooks] = None):
         """
         Runs the root agent to orchestrate the workflow of the package detection system.
         """
         self.logging.info(f"running root agent for package location: {state.package_location}")
         root_agent_result = await Runner.run(self.supervisor_agent,
                                              input=f""" Analyse the package at {state.package_location}.""",
-                                             context=state, max_turns= 5)
+                                             context=state, max_turns= 5, hooks=hooks)
         return root_agent_result # type: ignore, 
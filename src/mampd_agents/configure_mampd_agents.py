@@ -1,4 +1,5 @@
 from typing import Any,Optional
+from agents import Model
 from src.mampd_agents.MetaDataAgent import MetaDataAgent
 from src.mampd_agents.ClassificationAgent import ClassificationAgent
 from src.mampd_agents.RootAgent import RootAgent
@@ -9,13 +10,15 @@ from src.mampd_agents.mampd_agent_interface import MAMPDAgentInterface
 
 class MAMPDAgents(MAMPDAgentInterface):
     def __init__(self, model_name: Optional[str] = None, api_key: Optional[str] = None,
-                 model_url: Optional[str] = None):
-        """Initializes the moderator agents with the specified model."""
-        super().__init__(model_name=model_name, api_key=api_key, model_url=model_url) # type: ignore
+                 model_url: Optional[str] = None, model: Optional[Model] = None):
+        """Initializes the moderator agents with the specified model.
+        Pass `model` to run every agent on an already constructed `agents.Model`."""
+        super().__init__(model_name=model_name, api_key=api_key, model_url=model_url, model=model) # type: ignore
 
         self.model_name = model_name # type: ignore
         self.api_key = api_key # type: ignore
         self.model_url = model_url # type: ignore
+        self.model_override = model
 
         self.set_root_agent()
         self.set_metadata_agent()     
@@ -64,6 +67,7 @@ class MAMPDAgents(MAMPDAgentInterface):
             model_name=model_name if model_name is not None else self.model_name,  # type: ignore
             api_key=api_key if api_key is not None else self.api_key,
             model_url=model_url if model_url is not None else self.model_url,
+            model=self.model_override if model_name is None else None,
         )
         
     def set_metadata_agent(self, model_name: Optional[str] = None, api_key: Optional[str] = None,
@@ -73,6 +77,7 @@ class MAMPDAgents(MAMPDAgentInterface):
             model_name=model_name if model_name is not None else self.model_name,  # type: ignore
             api_key=api_key if api_key is not None else self.api_key,
             model_url=model_url if model_url is not None else self.model_url,
+            model=self.model_override if model_name is None else None,
         )
         
     def set_classification_agent(self, model_name: Optional[str] = None, api_key: Optional[str] = None,
@@ -82,5 +87,6 @@ class MAMPDAgents(MAMPDAgentInterface):
             model_name=model_name if model_name is not None else self.model_name,  # type: ignore
             api_key=api_key if api_key is not None else self.api_key,
             model_url=model_url if model_url is not None else self.model_url,
+            model=self.model_override if model_name is None else None,
         )
             
\ No newline at end of file
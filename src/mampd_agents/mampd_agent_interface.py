@@ -1,18 +1,27 @@
 from src.utilities.model import MASModel
 from src.utilities.package_state import MASState
+from agents import Model
 from typing import Optional
 
 
-BASE_MODEL = MASModel()
 class MAMPDAgentInterface:
-    def __init__(self, 
-                state: MASState= MASState(),
+    def __init__(self,
+                state: Optional[MASState] = None,
                 model_name: Optional[str] = None,
                 api_key: Optional[str] = None,
-                 model_url: Optional[str] = None):
-
+                 model_url: Optional[str] = None,
+                 model: Optional[Model] = None):
+        """
+        Agents hold no per-package state: every run_* call receives its own
+        MASState, so one agent instance can serve concurrent runs. `state` is
+        kept only for backwards compatibility and is not used by the runs.
+        `model` injects a ready `agents.Model` (e.g. a scripted model for
+        benchmarks) instead of building one from the model name.
+        """
         self.state = state
-        if model_name:
+        if model is not None:
+            self.model = MASModel.from_model(model)
+        elif model_name:
             if api_key:
                 self.model = MASModel(
                     model_name=model_name,
@@ -28,4 +37,4 @@ class MAMPDAgentInterface:
                     disable_tracing= False
                 )
         else:
-            self.model = BASE_MODEL
\ No newline at end of file
+            self.model = MASModel.default()
@@ -0,0 +1,194 @@
+"""
+Offline throughput / latency benchmark of the classification pipeline.
+
+Generates a synthetic corpus, then classifies it with the scripted model
+backend (no API key, no network) through `ClassificationPipeline.classify`
+and/or the `/classify` endpoint, and reports packages/second, latency
+percentiles, per-stage timings, accuracy against the corpus labels and the
+memory high-water mark as JSON.
+
+    python -m src.scripts.benchmark --packages 200 --files 20 --file-size 4096 --concurrency 16
+    python -m src.scripts.benchmark --target api --latency 0.2 --output bench.json --min-throughput 5
+
+Exits non-zero when --min-throughput is given and not reached, so it can gate CI.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import resource
+import sys
+import tempfile
+import time
+
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+from agents import set_trace_processors, set_tracing_disabled
+
+from src.mampd_agents.configure_mampd_agents import MAMPDAgents
+from src.scripts.classify_package import ClassificationPipeline
+from src.utilities.evaluation import percentiles
+from src.utilities.pipeline_executor import PipelineExecutor
+from src.utilities.scripted_model import ScriptedModel
+from src.utilities.synthetic_packages import generate_corpus
+
+
+def peak_rss_mb() -> Dict[str, float]:
+    """Peak resident set size of this process and of its (reaped) worker processes."""
+    # ru_maxrss is in KiB on Linux and in bytes on macOS.
+    scale = 1024 * 1024 if sys.platform == "darwin" else 1024
+    return {
+        "self": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale, 1),
+        "workers": round(resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / scale, 1),
+    }
+
+
+def _verdict(result: Dict[str, Any]) -> str:
+    output = result.get("classification_output")
+    return output.classification.value if output is not None else result.get("classification", "")
+
+
+def summarize(target: str, wall: float, latencies: List[float], results: List[Dict[str, Any]],
+              errors: int, labels: Dict[str, str]) -> Dict[str, Any]:
+    stages: Dict[str, List[float]] = {}
+    tokens = 0
+    correct = 0
+    for path, result in results:
+        correct += _verdict(result) == labels.get(path)
+        metrics = result.get("metrics") or {}
+        for stage, seconds in metrics.get("stages_seconds", {}).items():
+            stages.setdefault(stage, []).append(seconds)
+        tokens += sum(u["input"] + u["output"] for u in metrics.get("tokens", {}).values())
+    return {
+        "target": target,
+        "packages": len(latencies),
+        "errors": errors,
+        "wall_seconds": round(wall, 3),
+        "packages_per_second": round(len(latencies) / wall, 3) if wall else 0.0,
+        "latency_seconds": percentiles(latencies),
+        "stage_seconds": {stage: percentiles(values) for stage, values in sorted(stages.items())},
+        "tokens_total": tokens,
+        "accuracy": round(correct / len(results), 4) if results else 0.0,
+    }
+
+
+async def bench_pipeline(pipeline: ClassificationPipeline, labels: Dict[str, str], concurrency: int) -> Dict[str, Any]:
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: List[float] = []
+    results: List[Tuple[str, Dict[str, Any]]] = []
+    errors = 0
+
+    async def one(path: str) -> None:
+        nonlocal errors
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                result = await pipeline.classify(path)
+            except Exception as e:
+                errors += 1
+                print(f"error: {path}: {e}", file=sys.stderr)
+                return
+            latencies.append(time.perf_counter() - start)
+            results.append((path, result))
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(path) for path in labels))
+    return summarize("pipeline", time.perf_counter() - start, latencies, results, errors, labels)
+
+
+def bench_api(pipeline: ClassificationPipeline, labels: Dict[str, str], concurrency: int) -> Dict[str, Any]:
+    from fastapi.testclient import TestClient
+    import api.classify as api
+
+    api.pipeline = pipeline
+    latencies: List[float] = []
+    results: List[Tuple[str, Dict[str, Any]]] = []
+    errors = 0
+
+    with TestClient(api.app) as client:
+        def one(path: str) -> None:
+            nonlocal errors
+            start = time.perf_counter()
+            with open(path, "rb") as f:
+                response = client.post("/classify", data={"force_refresh": "true"},
+                                       files={"upload_file": (os.path.basename(path), f, "application/gzip")})
+            if response.status_code != 200:
+                errors += 1
+                print(f"error: {path}: {response.status_code} {response.text}", file=sys.stderr)
+                return
+            latencies.append(time.perf_counter() - start)
+            results.append((path, response.json()))
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            list(pool.map(one, labels))
+        wall = time.perf_counter() - start
+    return summarize("api", wall, latencies, results, errors, labels)
+
+
+def main(argv: List[str] | None = None) -> int:
+    arg_parser = argparse.ArgumentParser(description="Offline benchmark of the classification pipeline.")
+    arg_parser.add_argument("--packages", type=int, default=50, help="number of synthetic packages")
+    arg_parser.add_argument("--files", type=int, default=10, help="Python files per package")
+    arg_parser.add_argument("--file-size", type=int, default=2048, help="approximate bytes per Python file")
+    arg_parser.add_argument("--malicious-ratio", type=float, default=0.3)
+    arg_parser.add_argument("--format", choices=["tar.gz", "zip"], default="tar.gz")
+    arg_parser.add_argument("--corpus", help="existing corpus directory with a manifest.json (skips generation)")
+    arg_parser.add_argument("--target", choices=["pipeline", "api", "both"], default="pipeline")
+    arg_parser.add_argument("--concurrency", type=int, default=8, help="packages classified at once")
+    arg_parser.add_argument("--cpu-workers", type=int, default=None, help="process pool size (0: threads)")
+    arg_parser.add_argument("--latency", type=float, default=0.0, help="simulated seconds per model call")
+    arg_parser.add_argument("--no-prescreen", action="store_true", help="send every package to the classifier agent")
+    arg_parser.add_argument("--seed", type=int, default=0)
+    arg_parser.add_argument("--output", help="also write the JSON report to this file")
+    arg_parser.add_argument("--min-throughput", type=float, help="fail when packages/second is below this")
+    args = arg_parser.parse_args(argv)
+
+    # Offline: no trace export.
+    set_trace_processors([])
+    set_tracing_disabled(True)
+
+    with tempfile.TemporaryDirectory(prefix="mampd-bench-") as scratch:
+        if args.corpus:
+            entries = json.loads((Path(args.corpus) / "manifest.json").read_text(encoding="utf-8"))
+        else:
+            start = time.perf_counter()
+            entries = generate_corpus(scratch, args.packages, args.malicious_ratio, args.files,
+                                      args.file_size, args.format, args.seed)
+            print(f"generated {len(entries)} packages in {time.perf_counter() - start:.2f}s", file=sys.stderr)
+        labels = {entry["path"]: entry["label"] for entry in entries}
+
+        executor = PipelineExecutor(cpu_workers=args.cpu_workers) if args.cpu_workers is not None else PipelineExecutor()
+        pipeline = ClassificationPipeline(agents=MAMPDAgents(model=ScriptedModel(latency=args.latency)),
+                                          executor=executor, prescreen=not args.no_prescreen,
+                                          use_history=False)
+        reports = []
+        try:
+            if args.target in ("pipeline", "both"):
+                reports.append(asyncio.run(bench_pipeline(pipeline, labels, args.concurrency)))
+            if args.target in ("api", "both"):
+                reports.append(bench_api(pipeline, labels, args.concurrency))
+        finally:
+            pipeline.shutdown()
+
+    report = {
+        "config": {k: v for k, v in vars(args).items() if k not in {"output", "min_throughput"}},
+        "results": reports,
+        "peak_rss_mb": peak_rss_mb(),
+    }
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.output:
+        Path(args.output).write_text(text, encoding="utf-8")
+
+    if args.min_throughput is not None and any(r["packages_per_second"] < args.min_throughput for r in reports):
+        print(f"throughput below {args.min_throughput} packages/s", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,44 +2,221 @@ import configparser
 import logging
 from src.scripts import setup_logging
 from src.mampd_agents.configure_mampd_agents import MAMPDAgents
+from src.utilities.code_index import CODE_INDEX_CACHE
+from src.utilities.metrics import (CLASSIFICATIONS, EXTRACTED_BYTES, EXTRACTED_FILES, MetricsHooks, RunMetrics,
+                                   register_cache, stage_timer)
+from src.utilities.package_cache import PACKAGE_CACHE
 from src.utilities.package_state import MASState
+from src.utilities.pipeline_executor import PipelineExecutor
+from src.utilities.pipeline_stages import (analyse_package, apply_file_info, compare_with_prior, extract_metadata,
+                                          index_metadata, ingest_package, prescreen_verdict, record_version,
+                                          version_diff_verdict)
+from src.utilities.prescreen import PRESCREEN_ENABLED
+from src.utilities.progress import METADATA_FIELDS, EventCallback, ProgressHooks, emit
+from src.utilities.version_history import VersionHistory
+from src.utilities.workspace import WORKSPACES
 from agents import (
     set_trace_processors,
     trace
 )
-from typing import Any
+from typing import Any, Optional
 from dotenv import load_dotenv
 from langsmith.wrappers import OpenAIAgentsTracingProcessor
 
 
 set_trace_processors([OpenAIAgentsTracingProcessor()])
 
-classify_agents = MAMPDAgents()
 parser = configparser.ConfigParser()
 parser.read("config.ini")  # Ensure your config file is loaded
 load_dotenv()
 
+# The LLM root agent is opt-in; by default extraction runs as a deterministic stage.
+USE_ROOT_AGENT = parser.getboolean("PIPELINE_CONFIG", "USE_ROOT_AGENT", fallback=False)
+USE_METADATA_AGENT = parser.getboolean("PIPELINE_CONFIG", "USE_METADATA_AGENT", fallback=False)
+# Record per-file hashes of classified versions so later versions can be scanned incrementally.
+VERSION_HISTORY_ENABLED = parser.getboolean("CACHE_CONFIG", "VERSION_HISTORY_ENABLED", fallback=True)
+
 logger = logging.getLogger("classify_package AgentGroup")
-async def create_classify_graph(state: MASState)-> dict[str, MASState | Any]:
-
-    with trace(workflow_name="classififier-Service"):
-
-        root_result = await classify_agents.root_agent.run_root_agent(state=state) # type: ignore
-        logger.info(f"Root Agent Result completed")
-        metadata_result = await classify_agents.metadata_agent.run_metadata_agent(state=state)# type: ignore
-        logger.info(f"Metadata Agent Result completed")
-        classification_result = await classify_agents.classification_agent.run_classification_agent(state=state) # type: ignore
-        logger.info(f"Classification Agent Result completed")
-
-    return {
-        "state": state.model_dump(),
-        "root_result": root_result,
-        "metadata_result": metadata_result,
-        "classification_result": classification_result
-    } # type: ignore
-    
-async def classify(package_path: str) -> dict[str, MASState | Any]:
-    """creates the states of a classification and classifies the package."""
-    logger.info(f"Starting classification for package: {package_path}")
-    state = MASState(package_location=package_path)
-    return await create_classify_graph(state)
\ No newline at end of file
+
+register_cache("package", PACKAGE_CACHE)
+register_cache("code_index", CODE_INDEX_CACHE)
+
+
+class ClassificationPipeline:
+    """
+    Runs packages through ingestion, metadata extraction, analysis and
+    classification. Each `classify` call works on its own `MASState`; the
+    agents only hold their (stateless) definitions and the executor bounds
+    each stage, so one pipeline can serve many concurrent requests.
+    """
+
+    def __init__(self, agents: Optional[MAMPDAgents] = None, executor: Optional[PipelineExecutor] = None,
+                 use_root_agent: bool = USE_ROOT_AGENT, use_metadata_agent: bool = USE_METADATA_AGENT,
+                 prescreen: bool = PRESCREEN_ENABLED, history: Optional[VersionHistory] = None,
+                 use_history: bool = VERSION_HISTORY_ENABLED):
+        self._agents = agents
+        self.prescreen = prescreen
+        self.history = history if history is not None else (VersionHistory() if use_history else None)
+        self.executor = executor if executor is not None else PipelineExecutor()
+        self.use_root_agent = use_root_agent
+        self.use_metadata_agent = use_metadata_agent
+
+    @property
+    def agents(self) -> MAMPDAgents:
+        # Built on first use so importing the pipeline needs no model credentials.
+        if self._agents is None:
+            self._agents = MAMPDAgents()
+        return self._agents
+
+    async def create_classify_graph(self, state: MASState, use_root_agent: Optional[bool] = None,
+                                    use_metadata_agent: Optional[bool] = None,
+                                    on_event: Optional[EventCallback] = None,
+                                    incremental: bool = False) -> dict[str, MASState | Any]:
+        """Run *state* through every stage; *on_event* is called as each stage completes (see progress.py).
+        With *incremental*, a package whose earlier version was classified is judged on the changed files only.
+        Unless *state* already has a workspace, the package is extracted into a fresh one that is removed
+        when the run ends, however it ends."""
+        if state.get_workspace() is not None:
+            return await self._run_graph(state, use_root_agent, use_metadata_agent, on_event, incremental)
+        with WORKSPACES.workspace() as workspace:
+            state.set_workspace(workspace)
+            try:
+                return await self._run_graph(state, use_root_agent, use_metadata_agent, on_event, incremental)
+            finally:
+                if state.package_formatted_path:
+                    PACKAGE_CACHE.evict(state.package_formatted_path)
+                state.set_workspace(None)
+
+    async def _run_graph(self, state: MASState, use_root_agent: Optional[bool], use_metadata_agent: Optional[bool],
+                         on_event: Optional[EventCallback], incremental: bool) -> dict[str, MASState | Any]:
+        use_root_agent = self.use_root_agent if use_root_agent is None else use_root_agent
+        use_metadata_agent = self.use_metadata_agent if use_metadata_agent is None else use_metadata_agent
+
+        run_metrics = RunMetrics()
+        hooks = ProgressHooks(run_metrics, on_event) if on_event else MetricsHooks(run_metrics)
+
+        with trace(workflow_name="classififier-Service"), stage_timer("pipeline", run_metrics):
+
+            metadata_result = None
+            if not use_root_agent and not use_metadata_agent:
+                # Name, version and file listing straight from a zip/wheel central directory, before extraction.
+                with stage_timer("index", run_metrics):
+                    metadata_result = await index_metadata(state)
+                if metadata_result is not None:
+                    emit(on_event, "metadata", state.model_dump(include=set(METADATA_FIELDS)))
+            if use_root_agent:
+                async with self.executor.limit("llm"):
+                    with stage_timer("root_agent", run_metrics):
+                        root_result = await self.agents.root_agent.run_root_agent(state=state, hooks=hooks) # type: ignore
+                logger.info(f"Root Agent Result completed")
+            else:
+                with stage_timer("ingest", run_metrics):
+                    root_result = await ingest_package(state, self.executor)
+                logger.info(f"Package ingestion completed")
+            if state.package_formatted_path:
+                store = (await state.load_package()).store
+                ingested_bytes = store.ingest.get("bytes", store.total_size)
+                EXTRACTED_BYTES.inc(ingested_bytes)
+                EXTRACTED_FILES.inc(len(store.files))
+                emit(on_event, "extracted", {"files": len(store.files), "bytes": ingested_bytes,
+                                             "mb_per_second": store.ingest.get("mb_per_second"),
+                                             "truncated": state.extraction_truncated,
+                                             "warnings": state.extraction_warnings})
+            if use_metadata_agent:
+                async with self.executor.limit("llm"):
+                    with stage_timer("metadata_agent", run_metrics):
+                        metadata_result = await self.agents.metadata_agent.run_metadata_agent(state=state, hooks=hooks)# type: ignore
+                logger.info(f"Metadata Agent Result completed")
+                emit(on_event, "metadata", state.model_dump(include=set(METADATA_FIELDS)))
+            elif metadata_result is None:
+                with stage_timer("metadata", run_metrics):
+                    metadata_result = await extract_metadata(state)
+                logger.info(f"Metadata extraction completed")
+                emit(on_event, "metadata", state.model_dump(include=set(METADATA_FIELDS)))
+            elif state.package_formatted_path:
+                # The index has no file hashes; the store does.
+                apply_file_info(state, await state.load_package())
+            with stage_timer("analysis", run_metrics):
+                prescreen = await analyse_package(state, self.prescreen, self.executor)
+            if prescreen is not None:
+                emit(on_event, "prescreen", {"risk_score": prescreen.risk_score, "decision": prescreen.decision,
+                                             "findings": len(prescreen.findings)})
+            version_diff = None
+            if incremental and self.history is not None:
+                with stage_timer("version_diff", run_metrics):
+                    version_diff = await compare_with_prior(state, self.history)
+                if version_diff is not None:
+                    emit(on_event, "version_diff", version_diff.model_dump())
+            if prescreen is not None and prescreen.decision != "escalate":
+                # Obvious verdict: skip the classification agent entirely.
+                classification_result = None
+                classification_output = prescreen_verdict(state, prescreen)
+                decided_by = "prescreen"
+                logger.info(f"Pre-screen classified the package as {prescreen.decision}")
+            elif version_diff is not None and not version_diff.added and not version_diff.changed:
+                # Same files as an already classified version: its verdict stands.
+                classification_result = None
+                classification_output = version_diff_verdict(state, version_diff)
+                decided_by = "version_diff"
+                logger.info(f"No changes since {version_diff.prior_version}, reusing its verdict")
+            else:
+                emit(on_event, "classifying", {})
+                async with self.executor.limit("llm"):
+                    with stage_timer("classification_agent", run_metrics):
+                        classification_result = await self.agents.classification_agent.run_classification_agent(state=state, hooks=hooks) # type: ignore
+                classification_output = classification_result.final_output
+                decided_by = "agent"
+                logger.info(f"Classification Agent Result completed")
+        CLASSIFICATIONS.inc(classification=classification_output.classification.value, decided_by=decided_by)
+        if self.history is not None and state.package_formatted_path:
+            await record_version(state, self.history, classification_output)
+        emit(on_event, "verdict", {**classification_output.model_dump(mode="json"), "decided_by": decided_by})
+
+        return {
+            "state": state.model_dump(),
+            "root_result": root_result,
+            "metadata_result": metadata_result,
+            "classification_result": classification_result,
+            "classification_output": classification_output,
+            "decided_by": decided_by,
+            "metrics": run_metrics.as_dict()
+        } # type: ignore
+
+    async def classify(self, package_path: str, use_root_agent: Optional[bool] = None,
+                       use_metadata_agent: Optional[bool] = None,
+                       on_event: Optional[EventCallback] = None,
+                       incremental: bool = False) -> dict[str, MASState | Any]:
+        """Classify the package at *package_path* with a fresh state."""
+        logger.info(f"Starting classification for package: {package_path}")
+        state = MASState(package_location=package_path)
+        return await self.create_classify_graph(state, use_root_agent=use_root_agent,
+                                                use_metadata_agent=use_metadata_agent, on_event=on_event,
+                                                incremental=incremental)
+
+    def shutdown(self) -> None:
+        self.executor.shutdown()
+
+
+_default_pipeline: Optional[ClassificationPipeline] = None
+
+
+def get_pipeline() -> ClassificationPipeline:
+    """The process-wide pipeline used by `classify` when no pipeline is given."""
+    global _default_pipeline
+    if _default_pipeline is None:
+        _default_pipeline = ClassificationPipeline()
+    return _default_pipeline
+
+
+async def create_classify_graph(state: MASState, use_root_agent: bool = USE_ROOT_AGENT,
+                                use_metadata_agent: bool = USE_METADATA_AGENT)-> dict[str, MASState | Any]:
+    return await get_pipeline().create_classify_graph(state, use_root_agent=use_root_agent,
+                                                      use_metadata_agent=use_metadata_agent)
+
+
+async def classify(package_path: str, use_root_agent: bool = USE_ROOT_AGENT,
+                   use_metadata_agent: bool = USE_METADATA_AGENT) -> dict[str, MASState | Any]:
+    """creates the states of a classification and classifies the package.
+    Set use_root_agent / use_metadata_agent to run those stages with the LLM agents."""
+    return await get_pipeline().classify(package_path, use_root_agent=use_root_agent,
+                                         use_metadata_agent=use_metadata_agent)
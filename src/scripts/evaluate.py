@@ -0,0 +1,96 @@
+"""
+Evaluate the classifier on a labeled manifest.
+
+    python -m src.scripts.evaluate --manifest corpus/manifest.json --name gpt-4o-mini --concurrency 8
+    python -m src.scripts.evaluate --manifest corpus/manifest.json --name strict-prompt --prompt-file strict.txt
+    python -m src.scripts.evaluate --compare .temp/evaluations/gpt-4o-mini.json .temp/evaluations/strict-prompt.json
+
+Records are checkpointed to <output-dir>/<name>.jsonl as packages finish;
+rerunning the same command resumes from there (use --fresh to start over).
+The summary is written to <output-dir>/<name>.json and <name>.md.
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+
+from pathlib import Path
+from typing import List
+
+from src.mampd_agents.configure_mampd_agents import MAMPDAgents
+from src.scripts.classify_package import ClassificationPipeline
+from src.utilities.evaluation import Checkpoint, load_manifest, render_comparison, render_table, run_evaluation, summarize
+from src.utilities.pipeline_executor import PipelineExecutor
+
+
+def build_pipeline(args: argparse.Namespace) -> ClassificationPipeline:
+    if args.scripted:
+        # Offline dry run of the evaluation itself (no model calls).
+        from agents import set_trace_processors, set_tracing_disabled
+        from src.utilities.scripted_model import ScriptedModel
+
+        set_trace_processors([])
+        set_tracing_disabled(True)
+        agents = MAMPDAgents(model=ScriptedModel(latency=args.latency))
+    else:
+        agents = MAMPDAgents(model_name=args.model, model_url=args.model_url)
+    if args.prompt_file:
+        agents.classification_agent.classification_agent.instructions = Path(args.prompt_file).read_text(encoding="utf-8")
+    executor = PipelineExecutor(cpu_workers=args.cpu_workers) if args.cpu_workers is not None else PipelineExecutor()
+    # Evaluation runs must not seed the version history used by incremental scans.
+    return ClassificationPipeline(agents=agents, executor=executor, prescreen=not args.no_prescreen,
+                                  use_history=False)
+
+
+def main(argv: List[str] | None = None) -> int:
+    arg_parser = argparse.ArgumentParser(description="Evaluate the classifier on a labeled corpus.")
+    arg_parser.add_argument("--manifest", help="JSON / JSONL / CSV list of {path, label}")
+    arg_parser.add_argument("--name", default="default", help="run name (checkpoint and report file names)")
+    arg_parser.add_argument("--output-dir", default=".temp/evaluations")
+    arg_parser.add_argument("--concurrency", type=int, default=4, help="packages classified at once")
+    arg_parser.add_argument("--fresh", action="store_true", help="discard the run's checkpoint")
+    arg_parser.add_argument("--model", help="model name (defaults to config.ini)")
+    arg_parser.add_argument("--model-url", help="model base URL")
+    arg_parser.add_argument("--prompt-file", help="replace the classification agent's instructions")
+    arg_parser.add_argument("--no-prescreen", action="store_true", help="send every package to the classification agent")
+    arg_parser.add_argument("--cpu-workers", type=int, default=None, help="process pool size (0: threads)")
+    arg_parser.add_argument("--input-cost", type=float, default=0.0, help="price per million input tokens")
+    arg_parser.add_argument("--output-cost", type=float, default=0.0, help="price per million output tokens")
+    arg_parser.add_argument("--scripted", action="store_true", help="use the offline scripted model")
+    arg_parser.add_argument("--latency", type=float, default=0.0, help="simulated seconds per scripted model call")
+    arg_parser.add_argument("--compare", nargs="+", metavar="SUMMARY", help="print a comparison of summary JSON files")
+    args = arg_parser.parse_args(argv)
+
+    if args.compare:
+        summaries = [json.loads(Path(path).read_text(encoding="utf-8")) for path in args.compare]
+        print(render_comparison(summaries))
+        return 0
+    if not args.manifest:
+        arg_parser.error("--manifest is required unless --compare is given")
+
+    entries = load_manifest(args.manifest)
+    output_dir = Path(args.output_dir)
+    checkpoint = Checkpoint(output_dir / f"{args.name}.jsonl", fresh=args.fresh)
+    resumed = any(checkpoint.done(entry["path"]) for entry in entries)
+
+    pipeline = build_pipeline(args)
+    try:
+        wall = asyncio.run(run_evaluation(pipeline, entries, checkpoint, concurrency=args.concurrency))
+    finally:
+        pipeline.shutdown()
+
+    paths = {entry["path"] for entry in entries}
+    records = [record for path, record in checkpoint.records.items() if path in paths]
+    # Throughput is only meaningful when the whole manifest ran in this process.
+    summary = summarize(records, name=args.name, wall_seconds=None if resumed else wall,
+                        input_cost_per_million=args.input_cost, output_cost_per_million=args.output_cost)
+    (output_dir / f"{args.name}.json").write_text(json.dumps(summary, indent=2), encoding="utf-8")
+    table = render_table(summary)
+    (output_dir / f"{args.name}.md").write_text(table, encoding="utf-8")
+    print(table)
+    return 1 if summary["errors"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
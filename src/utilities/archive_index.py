@@ -0,0 +1,164 @@
+"""
+Metadata-only view of a package archive.
+
+Zip and wheel central directories and 7z headers list every member
+without decompressing the others, so the package name, version, author
+and file listing can be answered before (or instead of) streaming the
+whole archive into a package store. Only the core metadata member itself
+(PKG-INFO, or METADATA in the .dist-info of a wheel) is read. Tar headers
+are interleaved with the member data, so indexing a compressed tarball
+decompresses it; that walk stops at the extraction byte and ratio caps,
+and the pipeline only takes the index shortcut for zip and wheel files.
+Member paths are normalized exactly like `_unpack_archive` does, so the
+listing matches the store built later.
+"""
+
+from __future__ import annotations
+
+import logging
+import tarfile
+import zipfile
+
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from src.utilities.content_type import decode_text
+from src.utilities.extract_package import (MAX_ARCHIVE_BYTES, MAX_ARCHIVE_FILES, MAX_COMPRESSION_RATIO,
+                                           _compound_suffix, _safe_member_path, py7zr)
+from src.utilities.workspace import WORKSPACES
+
+logger = logging.getLogger("archive index")
+
+# Archives whose members can be listed without extracting them.
+INDEXABLE_EXTS = {".zip", ".whl", ".tar.gz", ".tgz", ".tar.bz2", ".7z"}
+# Archives whose index is a central directory, read without decompressing anything.
+CENTRAL_DIRECTORY_EXTS = {".zip", ".whl"}
+
+# A core metadata file larger than this is not read from the index.
+MAX_METADATA_BYTES = 4 * 1024 * 1024
+
+
+@dataclass
+class ArchiveIndex:
+    source: str
+    files: List[Dict[str, Any]] = field(default_factory=list)  # {"path", "size"}
+    metadata_text: Optional[str] = None
+    metadata_path: Optional[str] = None
+    truncated: bool = False  # more members than MAX_ARCHIVE_FILES, or a tar walk stopped at the byte caps
+
+    @property
+    def python_files(self) -> List[Dict[str, Any]]:
+        return [entry for entry in self.files if entry["path"].endswith(".py")]
+
+
+def _metadata_rank(path: str) -> Optional[tuple]:
+    """Sort key of a core metadata candidate (shallowest PKG-INFO first), None for other members."""
+    parts = path.split("/")
+    if parts[-1] == "PKG-INFO":
+        return (0, len(parts), path)
+    if parts[-1] == "METADATA" and len(parts) > 1 and parts[-2].endswith(".dist-info"):
+        return (1, len(parts), path)
+    return None
+
+
+def _add(index: ArchiveIndex, name: str, size: int) -> Optional[str]:
+    """Record member *name*; returns its store path, or None when it is skipped."""
+    rel_path = _safe_member_path(name)
+    if rel_path is None:
+        return None
+    if len(index.files) >= MAX_ARCHIVE_FILES:
+        index.truncated = True
+        return None
+    index.files.append({"path": rel_path, "size": size})
+    return rel_path
+
+
+def _index_zip(archive_path: Path, index: ArchiveIndex) -> None:
+    with zipfile.ZipFile(archive_path) as zf:
+        candidates = []
+        for info in zf.infolist():
+            if info.is_dir() or (info.external_attr >> 16) & 0o170000 == 0o120000:
+                continue
+            rel_path = _add(index, info.filename, info.file_size)
+            if rel_path is None:
+                continue
+            rank = _metadata_rank(rel_path)
+            if rank is not None and info.file_size <= MAX_METADATA_BYTES:
+                candidates.append((rank, info, rel_path))
+        if candidates:
+            _, info, rel_path = min(candidates, key=lambda c: c[0])
+            index.metadata_text, index.metadata_path = decode_text(zf.read(info))[0], rel_path
+
+
+def _index_tar(archive_path: Path, index: ArchiveIndex) -> None:
+    # Headers are read sequentially, so skipping member data still decompresses it:
+    # stop at the same byte and ratio caps as extraction.
+    max_bytes = min(MAX_ARCHIVE_BYTES, int(max(archive_path.stat().st_size, 1) * MAX_COMPRESSION_RATIO))
+    walked = 0
+    best = None
+    with tarfile.open(archive_path, mode="r:*") as tf:
+        for member in tf:
+            if not member.isfile():
+                continue
+            walked += member.size
+            if walked > max_bytes:
+                index.truncated = True
+                break
+            rel_path = _add(index, member.name, member.size)
+            if rel_path is None:
+                if index.truncated:
+                    break
+                continue
+            rank = _metadata_rank(rel_path)
+            if rank is not None and member.size <= MAX_METADATA_BYTES and (best is None or rank < best[0]):
+                best = (rank, rel_path, tf.extractfile(member).read())
+    if best is not None:
+        index.metadata_path, index.metadata_text = best[1], decode_text(best[2])[0]
+
+
+def _index_7z(archive_path: Path, index: ArchiveIndex) -> None:
+    if py7zr is None:
+        raise ModuleNotFoundError("py7zr is required to read .7z files. Install it with:  pip install py7zr")
+    with py7zr.SevenZipFile(archive_path, mode="r") as z:
+        candidates = []
+        for info in z.list():
+            if info.is_directory or getattr(info, "is_symlink", False):
+                continue
+            rel_path = _add(index, info.filename, info.uncompressed)
+            rank = _metadata_rank(rel_path) if rel_path else None
+            if rank is not None and info.uncompressed <= MAX_METADATA_BYTES:
+                candidates.append((rank, info.filename, rel_path))
+        if not candidates:
+            return
+        # py7zr cannot read a member into memory; extract just the metadata file.
+        _, name, rel_path = min(candidates, key=lambda c: c[0])
+        z.reset()
+        with WORKSPACES.workspace() as scratch:
+            z.extract(path=scratch.root, targets=[name])
+            member = scratch.root / name
+            if member.is_file() and not member.is_symlink():
+                index.metadata_text, index.metadata_path = decode_text(member.read_bytes())[0], rel_path
+
+
+def is_indexable(package_path: str | Path, central_directory_only: bool = False) -> bool:
+    package_path = Path(package_path)
+    exts = CENTRAL_DIRECTORY_EXTS if central_directory_only else INDEXABLE_EXTS
+    return package_path.is_file() and _compound_suffix(package_path) in exts
+
+
+def read_archive_index(archive_path: str | Path) -> ArchiveIndex:
+    """List the members of *archive_path* and read its core metadata, without extracting anything else."""
+    archive_path = Path(archive_path).expanduser().resolve()
+    suffix = _compound_suffix(archive_path)
+    if suffix not in INDEXABLE_EXTS:
+        raise ValueError(f"Cannot index {archive_path.name}: supported formats are {', '.join(sorted(INDEXABLE_EXTS))}")
+    index = ArchiveIndex(source=str(archive_path))
+    if suffix in {".zip", ".whl"}:
+        _index_zip(archive_path, index)
+    elif suffix == ".7z":
+        _index_7z(archive_path, index)
+    else:
+        _index_tar(archive_path, index)
+    logger.info(f"Indexed {archive_path.name}: {len(index.files)} files, metadata from {index.metadata_path}")
+    return index
@@ -0,0 +1,139 @@
+"""
+Bounded on-disk mirror of PyPI release metadata and downloaded artifacts.
+
+Layout under the cache root:
+
+    metadata/<name>.json          JSON API document of the project
+    metadata/<name>.headers.json  ETag / Last-Modified used to revalidate it
+    files/<name>/<version>/<filename>
+
+Artifacts are evicted least recently used first (by mtime, which is bumped
+on every hit) once their total size exceeds the byte budget. Metadata is
+small and kept until its project is fetched again.
+"""
+
+from __future__ import annotations
+
+import configparser
+import hashlib
+import json
+import logging
+import os
+import re
+import shutil
+import threading
+
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+logger = logging.getLogger("artifact cache")
+
+parser = configparser.ConfigParser()
+parser.read("config.ini")
+
+ARTIFACT_CACHE_DIR = parser.get("CACHE_CONFIG", "ARTIFACT_CACHE_DIR", fallback=".temp/artifact_cache")
+ARTIFACT_CACHE_MAX_BYTES = parser.getint("CACHE_CONFIG", "ARTIFACT_CACHE_MAX_BYTES", fallback=2 * 1024 ** 3)
+
+
+def _safe_component(value: str) -> str:
+    """Normalize a project name / version / filename into a single path component."""
+    return re.sub(r"[^A-Za-z0-9._+-]", "_", value).lstrip(".") or "_"
+
+
+def _file_sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _link_or_copy(src: Path, dst: Path) -> None:
+    """Hard-link *src* to *dst* when possible, otherwise copy it."""
+    dst.parent.mkdir(parents=True, exist_ok=True)
+    if dst.exists():
+        dst.unlink()
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copy2(src, dst)
+
+
+class ArtifactCache:
+    """On-disk, size-bounded LRU cache of release metadata and artifacts."""
+
+    def __init__(self, root: str | Path = ARTIFACT_CACHE_DIR, max_bytes: int = ARTIFACT_CACHE_MAX_BYTES):
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self.metadata_dir = self.root / "metadata"
+        self.files_dir = self.root / "files"
+        self.metadata_dir.mkdir(parents=True, exist_ok=True)
+        self.files_dir.mkdir(parents=True, exist_ok=True)
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    # --- release metadata -----------------------------------------------------
+
+    def get_metadata(self, package_name: str) -> Tuple[Optional[Dict[str, Any]], Dict[str, str]]:
+        """Cached JSON API document and its validators ({} when not cached)."""
+        name = _safe_component(package_name.lower())
+        doc_path = self.metadata_dir / f"{name}.json"
+        headers_path = self.metadata_dir / f"{name}.headers.json"
+        if not doc_path.is_file():
+            return None, {}
+        try:
+            doc = json.loads(doc_path.read_text(encoding="utf-8"))
+            headers = json.loads(headers_path.read_text(encoding="utf-8")) if headers_path.is_file() else {}
+        except (OSError, json.JSONDecodeError) as e:
+            logger.error(f"Ignoring unreadable cached metadata for {package_name}: {e}")
+            return None, {}
+        return doc, headers
+
+    def put_metadata(self, package_name: str, doc: Dict[str, Any], headers: Dict[str, str]) -> None:
+        name = _safe_component(package_name.lower())
+        validators = {k: v for k, v in headers.items() if k in {"etag", "last-modified"}}
+        (self.metadata_dir / f"{name}.json").write_text(json.dumps(doc), encoding="utf-8")
+        (self.metadata_dir / f"{name}.headers.json").write_text(json.dumps(validators), encoding="utf-8")
+
+    # --- artifacts --------------------------------------------------------------
+
+    def _artifact_path(self, package_name: str, version: str, filename: str) -> Path:
+        return (self.files_dir / _safe_component(package_name.lower())
+                / _safe_component(version) / _safe_component(filename))
+
+    def fetch_artifact(self, package_name: str, version: str, filename: str,
+                       dest: Path, sha256: Optional[str] = None) -> bool:
+        """
+        Materialize a cached artifact at *dest*. Returns False on a miss, or
+        when the cached copy no longer matches *sha256* (it is then dropped).
+        """
+        cached = self._artifact_path(package_name, version, filename)
+        if not cached.is_file():
+            self.misses += 1
+            return False
+        if sha256 and _file_sha256(cached) != sha256:
+            logger.error(f"Dropping corrupt cached artifact {cached}")
+            cached.unlink(missing_ok=True)
+            self.misses += 1
+            return False
+        os.utime(cached)  # bump recency for LRU eviction
+        _link_or_copy(cached, dest)
+        self.hits += 1
+        return True
+
+    def put_artifact(self, package_name: str, version: str, filename: str, src: Path) -> None:
+        """Add the downloaded file *src* to the cache and evict beyond the byte budget."""
+        _link_or_copy(src, self._artifact_path(package_name, version, filename))
+        self.evict()
+
+    def evict(self) -> None:
+        with self._lock:
+            files = [(p, p.stat()) for p in self.files_dir.rglob("*") if p.is_file()]
+            total = sum(st.st_size for _, st in files)
+            for path, st in sorted(files, key=lambda item: item[1].st_mtime):
+                if total <= self.max_bytes:
+                    break
+                path.unlink(missing_ok=True)
+                total -= st.st_size
+                logger.info(f"Evicted {path} from the artifact cache")
@@ -0,0 +1,241 @@
+"""
+Per-file index of function definitions and imports used by the code tools.
+
+Each distinct source text is parsed once: the index is cached under the
+sha256 of the content, so repeated tool calls on the same file (or the same
+file shipped by several packages) are dictionary lookups. Files that do not
+parse as Python 3 (Python 2 code, truncated or deliberately mangled files)
+are indexed from the token stream instead, and as a last resort line by line.
+"""
+
+from __future__ import annotations
+
+import ast
+import configparser
+import hashlib
+import io
+import logging
+import re
+import threading
+import tokenize
+
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import List, Optional
+
+logger = logging.getLogger("code index")
+
+parser = configparser.ConfigParser()
+parser.read("config.ini")
+
+PARSE_CACHE_MAX_ENTRIES = parser.getint("CACHE_CONFIG", "PARSE_CACHE_MAX_ENTRIES", fallback=2048)
+
+
+@dataclass
+class FunctionInfo:
+    """One function or method definition, decorators included in `source`."""
+    name: str
+    lineno: int
+    end_lineno: int
+    is_async: bool
+    source: str
+
+
+@dataclass
+class CodeIndex:
+    functions: List[FunctionInfo] = field(default_factory=list)
+    imports: List[str] = field(default_factory=list)
+    parser: str = "ast"  # "ast", "tokenize" or "lines"
+
+
+# --- AST ------------------------------------------------------------------------
+
+def _dynamic_import(node: ast.Call) -> Optional[str]:
+    """Module name of `__import__("x")` / `importlib.import_module("x")` with a literal argument."""
+    func = node.func
+    name = func.id if isinstance(func, ast.Name) else func.attr if isinstance(func, ast.Attribute) else None
+    if name not in {"__import__", "import_module"} or not node.args:
+        return None
+    arg = node.args[0]
+    return arg.value if isinstance(arg, ast.Constant) and isinstance(arg.value, str) else None
+
+
+def _collect_functions(body: List[ast.stmt], lines: List[str], prefix: str, out: List[FunctionInfo]) -> None:
+    # Functions nested in a function are part of the enclosing function's source.
+    for node in body:
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            start = min([node.lineno] + [d.lineno for d in node.decorator_list])
+            end = node.end_lineno or node.lineno
+            out.append(FunctionInfo(
+                name=prefix + node.name, lineno=node.lineno, end_lineno=end,
+                is_async=isinstance(node, ast.AsyncFunctionDef),
+                source="\n".join(lines[start - 1:end]),
+            ))
+        elif isinstance(node, ast.ClassDef):
+            _collect_functions(node.body, lines, f"{prefix}{node.name}.", out)
+        elif isinstance(node, (ast.If, ast.Try, ast.With, ast.AsyncWith)):
+            # Conditionally defined functions (version checks, try/except ImportError).
+            for block in ("body", "orelse", "finalbody"):
+                _collect_functions(getattr(node, block, []), lines, prefix, out)
+            for handler in getattr(node, "handlers", []):
+                _collect_functions(handler.body, lines, prefix, out)
+
+
+def _index_ast(tree: ast.Module, source: str) -> CodeIndex:
+    index = CodeIndex(parser="ast")
+    _collect_functions(tree.body, source.split("\n"), "", index.functions)
+    imports = []
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            imports.extend(alias.name for alias in node.names)
+        elif isinstance(node, ast.ImportFrom):
+            module = "." * node.level + (node.module or "")
+            imports.extend(f"{module}.{alias.name}" if module.strip(".") else f"{module}{alias.name}"
+                           for alias in node.names)
+        elif isinstance(node, ast.Call):
+            dynamic = _dynamic_import(node)
+            if dynamic:
+                imports.append(f"{dynamic} (dynamic import)")
+    index.imports = sorted(set(imports))
+    return index
+
+
+# --- fallbacks ----------------------------------------------------------------------
+
+_IMPORT_LINE = re.compile(r"^\s*(?:import\s+(?P<names>[\w., \t]+)|from\s+(?P<module>\.*[\w.]*)\s+import\s+\(?(?P<members>[\w., \t*]+))")
+_DEF_LINE = re.compile(r"^(?P<indent>[ \t]*)(?:async[ \t]+)?def[ \t]+(?P<name>\w+)")
+
+
+def _import_names(statement: str) -> List[str]:
+    """Imported names of one (joined) import statement, aliases dropped."""
+    match = _IMPORT_LINE.match(statement)
+    if not match:
+        return []
+    if match.group("names"):
+        return [part.split()[0] for part in match.group("names").split(",") if part.strip()]
+    module = match.group("module")
+    sep = "." if module.strip(".") else ""
+    return [f"{module}{sep}{part.split()[0]}" for part in match.group("members").split(",") if part.strip()]
+
+
+def _function_block(lines: List[str], start: int, indent: int) -> int:
+    """Index one past the last line of the block whose header is lines[start]."""
+    end = start + 1
+    while end < len(lines):
+        line = lines[end]
+        if line.strip() and len(line) - len(line.lstrip()) <= indent:
+            break
+        end += 1
+    while end > start + 1 and not lines[end - 1].strip():
+        end -= 1
+    return end
+
+
+def _index_tokens(source: str) -> CodeIndex:
+    """Index from the token stream: statement-initial `def` / `import` / `from` tokens."""
+    index = CodeIndex(parser="tokenize")
+    lines = source.split("\n")
+    imports: List[str] = []
+    statement_start = True
+    pending_async = False
+    try:
+        for tok in tokenize.generate_tokens(io.StringIO(source).readline):
+            if tok.type in (tokenize.NEWLINE, tokenize.NL, tokenize.INDENT, tokenize.DEDENT, tokenize.COMMENT):
+                statement_start = statement_start or tok.type != tokenize.COMMENT
+                continue
+            if statement_start and tok.type == tokenize.NAME:
+                if tok.string == "async":
+                    pending_async = True
+                    continue
+                row = tok.start[0] - 1
+                if tok.string == "def":
+                    match = _DEF_LINE.match(lines[row])
+                    if match:
+                        end = _function_block(lines, row, len(match.group("indent")))
+                        index.functions.append(FunctionInfo(
+                            name=match.group("name"), lineno=row + 1, end_lineno=end,
+                            is_async=pending_async, source="\n".join(lines[row:end]),
+                        ))
+                elif tok.string in ("import", "from"):
+                    # Join parenthesized / backslash-continued statements before matching.
+                    statement = lines[row]
+                    while (statement.rstrip().endswith("\\") or statement.count("(") > statement.count(")")) \
+                            and row + 1 < len(lines):
+                        row += 1
+                        statement = statement.rstrip().rstrip("\\") + " " + lines[row]
+                    imports.extend(_import_names(statement.replace("(", " ").replace(")", " ")))
+            statement_start = False
+            pending_async = False
+    except (tokenize.TokenError, IndentationError, SyntaxError) as e:
+        # Keep whatever was found before the stream broke.
+        logger.info(f"Tokenizer stopped early: {e}")
+    if not index.functions and not imports:
+        return _index_lines(source)
+    index.imports = sorted(set(imports))
+    return index
+
+
+def _index_lines(source: str) -> CodeIndex:
+    index = CodeIndex(parser="lines")
+    lines = source.split("\n")
+    imports: List[str] = []
+    for row, line in enumerate(lines):
+        match = _DEF_LINE.match(line)
+        if match:
+            end = _function_block(lines, row, len(match.group("indent")))
+            index.functions.append(FunctionInfo(
+                name=match.group("name"), lineno=row + 1, end_lineno=end,
+                is_async=line.lstrip().startswith("async"), source="\n".join(lines[row:end]),
+            ))
+        else:
+            imports.extend(_import_names(line))
+    index.imports = sorted(set(imports))
+    return index
+
+
+# --- cache ------------------------------------------------------------------------------
+
+def build_index(source: str) -> CodeIndex:
+    """Parse *source* into a `CodeIndex` (uncached)."""
+    # One line convention for ast, tokenize and the line fallback alike.
+    source = source.replace("\r\n", "\n").replace("\r", "\n")
+    try:
+        tree = ast.parse(source)
+    except (SyntaxError, ValueError, RecursionError, MemoryError):
+        return _index_tokens(source)
+    return _index_ast(tree, source)
+
+
+class CodeIndexCache:
+    """Thread-safe LRU of `CodeIndex` objects keyed by the sha256 of the source."""
+
+    def __init__(self, max_entries: int = PARSE_CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, CodeIndex]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, source: str) -> CodeIndex:
+        key = hashlib.sha256(source.encode("utf-8", "surrogatepass")).hexdigest()
+        with self._lock:
+            index = self._entries.get(key)
+            if index is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return index
+            self.misses += 1
+
+        index = build_index(source)
+        with self._lock:
+            self._entries[key] = index
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return index
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+CODE_INDEX_CACHE = CodeIndexCache()
@@ -0,0 +1,162 @@
+"""
+Content sniffing and lazy text decoding for package files.
+
+Ingestion only looks at the first bytes of a file: magic numbers and the
+file extension decide whether it is text or binary, and binaries are kept
+in the package store as references (size, sha256, entropy) instead of
+being base64-inflated into the dumps. Text is decoded when a file is first
+read: strict UTF-8, then a byte order mark or PEP 263 coding cookie, then
+charset detection (charset-normalizer, when installed), then latin-1,
+which never fails.
+"""
+
+from __future__ import annotations
+
+import codecs
+import configparser
+import math
+import re
+
+from collections import Counter
+from pathlib import PurePosixPath
+from typing import Optional, Tuple
+
+try:
+    import charset_normalizer  # optional; only used for non-UTF-8 text without a coding cookie
+except ImportError:
+    charset_normalizer = None
+
+parser = configparser.ConfigParser()
+parser.read("config.ini")
+
+# Bytes inspected at ingestion time to tell text from binary.
+SNIFF_BYTES = parser.getint("EXTRACTION_CONFIG", "SNIFF_BYTES", fallback=8192)
+# Entropy of large binaries is estimated from an evenly strided sample of this size.
+ENTROPY_SAMPLE_BYTES = parser.getint("EXTRACTION_CONFIG", "ENTROPY_SAMPLE_BYTES", fallback=1024 * 1024)
+
+TEXT = "text"
+BINARY = "binary"
+
+_MAGIC = (
+    (b"\x7fELF", "application/x-elf"),
+    (b"MZ", "application/x-msdownload"),
+    (b"\xcf\xfa\xed\xfe", "application/x-mach-binary"),
+    (b"\xce\xfa\xed\xfe", "application/x-mach-binary"),
+    (b"\xca\xfe\xba\xbe", "application/java-vm"),  # also fat Mach-O
+    (b"\x00asm", "application/wasm"),
+    (b"PK\x03\x04", "application/zip"),
+    (b"PK\x05\x06", "application/zip"),
+    (b"\x1f\x8b", "application/gzip"),
+    (b"BZh", "application/x-bzip2"),
+    (b"\xfd7zXZ\x00", "application/x-xz"),
+    (b"7z\xbc\xaf\x27\x1c", "application/x-7z-compressed"),
+    (b"\x89PNG\r\n\x1a\n", "image/png"),
+    (b"\xff\xd8\xff", "image/jpeg"),
+    (b"GIF8", "image/gif"),
+    (b"\x00\x00\x01\x00", "image/x-icon"),
+    (b"%PDF-", "application/pdf"),
+    (b"SQLite format 3\x00", "application/vnd.sqlite3"),
+)
+
+_BINARY_SUFFIXES = {
+    ".so": "application/x-sharedlib", ".pyd": "application/x-msdownload", ".dll": "application/x-msdownload",
+    ".exe": "application/x-msdownload", ".dylib": "application/x-mach-binary",
+    ".pyc": "application/x-python-code", ".pyo": "application/x-python-code",
+    ".whl": "application/zip", ".egg": "application/zip", ".zip": "application/zip", ".jar": "application/java-archive",
+    ".gz": "application/gzip", ".tgz": "application/gzip", ".bz2": "application/x-bzip2", ".xz": "application/x-xz",
+    ".7z": "application/x-7z-compressed", ".npy": "application/octet-stream", ".pkl": "application/octet-stream",
+    ".bin": "application/octet-stream", ".dat": "application/octet-stream",
+    ".png": "image/png", ".jpg": "image/jpeg", ".jpeg": "image/jpeg", ".gif": "image/gif", ".ico": "image/x-icon",
+    ".woff": "font/woff", ".woff2": "font/woff2", ".ttf": "font/ttf", ".otf": "font/otf",
+}
+
+_TEXT_SUFFIXES = {".py": "text/x-python", ".pyi": "text/x-python", ".pyw": "text/x-python", ".pyx": "text/x-cython"}
+
+_BOMS = (
+    (codecs.BOM_UTF32_LE, "utf-32"), (codecs.BOM_UTF32_BE, "utf-32"),
+    (codecs.BOM_UTF8, "utf-8-sig"),
+    (codecs.BOM_UTF16_LE, "utf-16"), (codecs.BOM_UTF16_BE, "utf-16"),
+)
+
+# Bytes that occur in text; a sample with many others is binary.
+_TEXT_BYTES = bytes({7, 8, 9, 10, 12, 13, 27} | set(range(0x20, 0x100)) - {0x7f})
+
+_CODING_COOKIE = re.compile(rb"^[ \t\f]*#.*?coding[:=][ \t]*([-\w.]+)")
+
+
+def _looks_like_text(head: bytes) -> bool:
+    return b"\x00" not in head and (not head or len(head.translate(None, _TEXT_BYTES)) / len(head) <= 0.3)
+
+
+def sniff(path: str, data: bytes) -> Tuple[str, str]:
+    """(TEXT or BINARY, content type) of *data* stored at *path*, from its first bytes."""
+    head = data[:SNIFF_BYTES]
+    looks_like_text = _looks_like_text(head)
+    for magic, content_type in _MAGIC:
+        # Printable magics ("MZ", "BZh", "GIF8") alone do not make a text file binary.
+        if head.startswith(magic) and not (looks_like_text and magic.isascii() and magic.isalnum()):
+            return BINARY, content_type
+    suffix = PurePosixPath(path).suffix.lower()
+    text_type = _TEXT_SUFFIXES.get(suffix, "text/plain")
+    if any(head.startswith(bom) for bom, _ in _BOMS):
+        return TEXT, text_type
+    if suffix in _BINARY_SUFFIXES:
+        return BINARY, _BINARY_SUFFIXES[suffix]
+    if not looks_like_text:
+        return BINARY, "application/octet-stream"
+    return TEXT, text_type
+
+
+def byte_entropy(data: bytes) -> float:
+    """Shannon entropy of *data* in bits per byte (sampled for large inputs)."""
+    if not data:
+        return 0.0
+    if len(data) > ENTROPY_SAMPLE_BYTES:
+        data = data[::len(data) // ENTROPY_SAMPLE_BYTES + 1]
+    total = len(data)
+    return round(-sum(c / total * math.log2(c / total) for c in Counter(data).values()) or 0.0, 4)
+
+
+def _declared_charset(data: bytes) -> Optional[str]:
+    """Encoding named by a PEP 263 coding cookie on one of the first two lines."""
+    for line in data.split(b"\n", 2)[:2]:
+        match = _CODING_COOKIE.match(line)
+        if match:
+            try:
+                return codecs.lookup(match.group(1).decode("ascii")).name
+            except LookupError:
+                return None
+    return None
+
+
+def detect_charset(data: bytes) -> str:
+    """Best guess at the encoding of text *data*."""
+    for bom, name in _BOMS:
+        if data.startswith(bom):
+            return name
+    try:
+        data.decode("utf-8")
+        return "utf-8"
+    except UnicodeDecodeError:
+        pass
+    declared = _declared_charset(data)
+    if declared:
+        return declared
+    if charset_normalizer is not None:
+        best = charset_normalizer.from_bytes(data).best()
+        if best is not None:
+            return best.encoding
+    return "latin-1"
+
+
+def decode_text(data: bytes) -> Tuple[str, str]:
+    """(text, charset) of *data*; undecodable bytes are replaced, never raised on."""
+    charset = detect_charset(data)
+    return data.decode(charset, errors="replace"), charset
+
+
+def describe_binary(entry: dict) -> str:
+    """The line agents get instead of a binary file's content."""
+    return (f"<<binary file {entry['path']}: {entry.get('content_type', 'application/octet-stream')}, "
+            f"{entry['size']} bytes, sha256 {entry['sha256'][:12]}, "
+            f"entropy {entry.get('entropy', 0.0):.2f} bits/byte; content not shown>>")
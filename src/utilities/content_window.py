@@ -0,0 +1,193 @@
+"""
+Budgeted views of package source files for the agent tools.
+
+`get_python_script` used to hand the model whole files, so one minified or
+blob-carrying file could fill the context on its own. `render_window`
+instead returns a line range capped at a byte budget. Large literals
+(base64 / hex strings, escaped byte strings, long numeric arrays) are
+replaced by a placeholder giving their kind, length, entropy and first
+characters, and over-long lines are cut. With raw literals nothing is
+cut: a line longer than the whole budget is paged by column instead.
+Whatever is left out is stated
+in a header and a trailer, with the arguments that fetch the next window,
+so the agent can ask for more instead of guessing.
+"""
+
+from __future__ import annotations
+
+import configparser
+import hashlib
+import re
+
+from dataclasses import dataclass
+from typing import List, Optional
+
+from src.utilities.prescreen import shannon_entropy
+
+parser = configparser.ConfigParser()
+parser.read("config.ini")
+
+# Default and maximum size of one window returned to the model.
+SCRIPT_WINDOW_BYTES = parser.getint("TOOLS_CONFIG", "SCRIPT_WINDOW_BYTES", fallback=24 * 1024)
+SCRIPT_MAX_WINDOW_BYTES = parser.getint("TOOLS_CONFIG", "SCRIPT_MAX_WINDOW_BYTES", fallback=128 * 1024)
+# Literals at least this long are summarized (0 disables summarization).
+LITERAL_SUMMARY_MIN_CHARS = parser.getint("TOOLS_CONFIG", "LITERAL_SUMMARY_MIN_CHARS", fallback=256)
+# Longer lines (minified code) are cut to this many characters.
+MAX_LINE_CHARS = parser.getint("TOOLS_CONFIG", "MAX_LINE_CHARS", fallback=2000)
+
+_PREVIEW_CHARS = 16
+
+
+def _literal_patterns(min_chars: int) -> List[tuple[str, re.Pattern]]:
+    n = max(min_chars, 1)
+    return [
+        # "\x4d\x5a..." style escaped byte strings
+        ("escaped bytes", re.compile(r"(?:\\x[0-9a-fA-F]{2}){%d,}" % max(n // 4, 1))),
+        # quoted hex / base64 / urlsafe-base64 runs (no whitespace, so prose is left alone)
+        ("blob", re.compile(r"(?<=['\"])[A-Za-z0-9+/=_\-]{%d,}(?=['\"])" % n)),
+        # [1, 2, 3, ...] / (0x1f, 0x8b, ...) numeric data arrays
+        ("numeric array", re.compile(r"(?<=[\[\(])\s*(?:-?(?:0[xX][0-9a-fA-F]+|\d+(?:\.\d+)?)\s*,\s*){%d,}"
+                                     r"-?(?:0[xX][0-9a-fA-F]+|\d+(?:\.\d+)?)\s*,?\s*(?=[\]\)])" % max(n // 4, 1))),
+    ]
+
+
+def _blob_kind(value: str) -> str:
+    if re.fullmatch(r"[0-9a-fA-F]+", value):
+        return "hex"
+    if re.fullmatch(r"[A-Za-z0-9+/]+=*", value):
+        return "base64"
+    if re.fullmatch(r"[A-Za-z0-9_\-]+=*", value):
+        return "urlsafe base64"
+    return "blob"
+
+
+def _placeholder(kind: str, value: str) -> str:
+    if kind == "blob":
+        kind = _blob_kind(value)
+    size = f"{value.count(',') + 1} items" if kind == "numeric array" else f"{len(value)} chars"
+    digest = hashlib.sha256(value.encode("utf-8", "surrogatepass")).hexdigest()[:12]
+    preview = re.sub(r"['\"\s]", "", value)[:_PREVIEW_CHARS]
+    entropy = shannon_entropy(value) or 0.0  # no "-0.00"
+    return (f"<<{kind} literal: {size}, entropy {entropy:.2f} bits/char, "
+            f"sha256 {digest}, prefix {preview}...>>")
+
+
+def summarize_literals(text: str, min_chars: int = LITERAL_SUMMARY_MIN_CHARS) -> tuple[str, int]:
+    """*text* with large literals replaced by placeholders, and how many were replaced."""
+    if min_chars <= 0 or len(text) < min_chars:
+        return text, 0
+    total = 0
+    for kind, pattern in _literal_patterns(min_chars):
+        text, count = pattern.subn(lambda m, kind=kind: _placeholder(kind, m.group(0)), text)
+        total += count
+    return text, total
+
+
+@dataclass
+class Window:
+    text: str
+    start_line: int
+    end_line: int       # last line included (start_line - 1 when nothing fits)
+    total_lines: int
+    shown_bytes: int
+    total_bytes: int
+    literals_summarized: int
+    lines_cut: int
+    start_column: int = 1               # of start_line (raw windows paging a long line)
+    next_column: Optional[int] = None   # end_line continues from this column
+
+    @property
+    def complete(self) -> bool:
+        return (self.start_line == 1 and self.end_line == self.total_lines and self.start_column == 1
+                and self.next_column is None and not self.literals_summarized and not self.lines_cut)
+
+
+def window(source: str, start_line: int = 1, end_line: Optional[int] = None,
+           max_bytes: int = SCRIPT_WINDOW_BYTES, summarize: bool = True,
+           max_line_chars: int = MAX_LINE_CHARS, start_column: int = 1) -> Window:
+    """
+    Lines *start_line*..*end_line* (1-based, inclusive) of *source*, within
+    *max_bytes*, the first one from *start_column*. Without *summarize*,
+    lines are never cut: one that does not fit the budget on its own is
+    returned up to the budget, with `next_column` set.
+    """
+    lines = source.replace("\r\n", "\n").replace("\r", "\n").split("\n")
+    if lines and lines[-1] == "":
+        lines.pop()
+    total_lines = len(lines)
+    start = max(start_line, 1)
+    stop = total_lines if end_line is None else min(max(end_line, start - 1), total_lines)
+    max_bytes = max(1, min(max_bytes, SCRIPT_MAX_WINDOW_BYTES))
+
+    # Columns only apply to raw windows: summarized lines are never paged.
+    start_column = 1 if summarize else max(start_column, 1)
+
+    out: List[str] = []
+    used = 0
+    literals = 0
+    cut = 0
+    last = start - 1
+    next_column = None
+    for number in range(start, stop + 1):
+        line = lines[number - 1]
+        offset = start_column - 1 if number == start else 0
+        if summarize:
+            line, count = summarize_literals(line)
+            literals += count
+            if max_line_chars and len(line) > max_line_chars:
+                line = line[:max_line_chars] + f" <<line cut: {len(line) - max_line_chars} more chars>>"
+                cut += 1
+        else:
+            line = line[offset:]
+            if not out and len(line.encode("utf-8", "surrogatepass")) + 1 > max_bytes:
+                # Page the line by column: as many characters as the budget holds.
+                line = line.encode("utf-8", "surrogatepass")[:max_bytes - 1].decode("utf-8", "ignore") or line[:1]
+                next_column = offset + len(line) + 1
+        size = len(line.encode("utf-8", "surrogatepass")) + 1
+        if used + size > max_bytes and out:
+            break
+        out.append(line)
+        used += size
+        last = number
+        if next_column is not None:
+            break
+    return Window(text="\n".join(out), start_line=start, end_line=last, total_lines=total_lines,
+                  shown_bytes=used, total_bytes=len(source.encode("utf-8", "surrogatepass")),
+                  literals_summarized=literals, lines_cut=cut, start_column=start_column, next_column=next_column)
+
+
+def render_window(file_name: str, source: str, start_line: int = 1, end_line: Optional[int] = None,
+                  max_bytes: Optional[int] = None, summarize: bool = True, start_column: int = 1) -> str:
+    """
+    The text returned by `get_python_script`: the file itself when it fits
+    untouched, otherwise the window framed by a header describing it and a
+    trailer saying what was left out and how to get it.
+    """
+    view = window(source, start_line, end_line, max_bytes or SCRIPT_WINDOW_BYTES, summarize,
+                  start_column=start_column)
+    if view.complete:
+        return source
+
+    notes = []
+    if view.literals_summarized:
+        notes.append(f"{view.literals_summarized} large literal(s) summarized; pass raw_literals=true to see them")
+    if view.lines_cut:
+        notes.append(f"{view.lines_cut} line(s) longer than {MAX_LINE_CHARS} chars cut; pass raw_literals=true to see them")
+    if view.start_column > 1:
+        notes.append(f"line {view.start_line} from column {view.start_column}")
+    header = (f"# {file_name}: lines {view.start_line}-{view.end_line} of {view.total_lines} "
+              f"({view.shown_bytes} of {view.total_bytes} bytes)")
+    if notes:
+        header += "; " + "; ".join(notes)
+
+    parts = [header, view.text]
+    requested_end = view.total_lines if end_line is None else min(end_line, view.total_lines)
+    if view.next_column is not None:
+        parts.append(f"# [line {view.end_line} continues past the byte budget; call get_python_script with "
+                     f"start_line={view.end_line}, start_column={view.next_column}, raw_literals=true to continue]")
+    elif view.end_line < requested_end:
+        parts.append(f"# [truncated at the byte budget: lines {view.end_line + 1}-{requested_end} not shown; "
+                     f"call get_python_script with start_line={view.end_line + 1} to continue]")
+    elif view.end_line < view.total_lines:
+        parts.append(f"# [lines {view.end_line + 1}-{view.total_lines} not requested]")
+    return "\n".join(parts)
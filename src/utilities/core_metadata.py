@@ -0,0 +1,85 @@
+"""
+Parser for Python core metadata (PKG-INFO / METADATA).
+
+Core metadata is an RFC 822 style header block, optionally followed by the
+long description as the message body. Headers may be folded across lines
+and several fields (Requires-Dist, Project-URL, Classifier, ...) may appear
+more than once.
+"""
+
+from __future__ import annotations
+
+import email.parser
+import email.policy
+import re
+
+from typing import Any, Dict, List
+
+# Fields that may legitimately appear more than once; kept as lists.
+MULTIPLE_USE_FIELDS = {
+    "classifier",
+    "dynamic",
+    "license-file",
+    "obsoletes",
+    "obsoletes-dist",
+    "platform",
+    "project-url",
+    "provides",
+    "provides-dist",
+    "provides-extra",
+    "requires",
+    "requires-dist",
+    "requires-external",
+    "supported-platform",
+}
+
+# setuptools folds Description continuation lines as 8 spaces and a '|'.
+_DESCRIPTION_CONTINUATION = re.compile(r"^(?: {8}\||\t\||\s{1,8})")
+
+
+def _unfold(value: str) -> str:
+    """Join a folded header value back onto one line."""
+    return " ".join(part.strip() for part in value.splitlines()).strip()
+
+
+def _unfold_description(value: str) -> str:
+    """Undo the rfc822 escaping applied to a multi-line Description header."""
+    lines = value.splitlines()
+    if not lines:
+        return ""
+    body = [lines[0].strip()] + [_DESCRIPTION_CONTINUATION.sub("", line, count=1) for line in lines[1:]]
+    return "\n".join(body).strip()
+
+
+def parse_core_metadata(text: str) -> Dict[str, Any]:
+    """
+    Parse PKG-INFO / METADATA content.
+
+    Returns a dict keyed by the lower-cased field name. Single-use fields map
+    to a string, multiple-use fields to a list of strings. `project-url` is
+    additionally exposed as `project-urls`, a {label: url} dict, and the
+    description is taken from the message body when the header is absent.
+    """
+    message = email.parser.HeaderParser(policy=email.policy.compat32).parsestr(text)
+
+    fields: Dict[str, Any] = {}
+    for raw_key in dict.fromkeys(k.lower() for k in message.keys()):
+        values: List[str] = [str(v) for v in message.get_all(raw_key, [])]
+        if raw_key == "description":
+            fields[raw_key] = _unfold_description(values[-1])
+        elif raw_key in MULTIPLE_USE_FIELDS:
+            fields[raw_key] = [_unfold(v) for v in values]
+        else:
+            fields[raw_key] = _unfold(values[-1])
+
+    payload = message.get_payload()
+    if isinstance(payload, str) and payload.strip():
+        fields["description"] = payload.strip()
+
+    project_urls: Dict[str, str] = {}
+    for entry in fields.get("project-url", []):
+        label, _, url = entry.partition(",")
+        project_urls[label.strip()] = (url or label).strip()
+    fields["project-urls"] = project_urls
+
+    return fields
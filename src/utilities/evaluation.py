@@ -0,0 +1,241 @@
+"""
+Evaluation of the classifier on a labeled corpus.
+
+A manifest lists packages with their ground-truth label. `run_evaluation`
+classifies them through a `ClassificationPipeline` with a concurrency cap
+and appends one record per finished package to a JSONL checkpoint, so an
+interrupted run resumes where it stopped (failed packages are retried).
+`summarize` turns the records into precision/recall/F1, a confusion matrix,
+token cost and latency percentiles; `render_table` / `render_comparison`
+format one or several runs as Markdown so models and prompt variants can be
+compared on speed and accuracy together.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import csv
+import json
+import logging
+import statistics
+import threading
+import time
+
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+logger = logging.getLogger("evaluation")
+
+LABELS = ("benign", "malicious")
+POSITIVE = "malicious"
+
+
+def load_manifest(path: str | Path) -> List[Dict[str, str]]:
+    """
+    Read a manifest of {"path", "label"} entries from a JSON list, JSONL or
+    CSV (columns `path,label`) file. Relative package paths are resolved
+    against the manifest's directory.
+    """
+    path = Path(path)
+    text = path.read_text(encoding="utf-8")
+    if path.suffix == ".csv":
+        rows: Iterable[Dict[str, Any]] = csv.DictReader(text.splitlines())
+    elif path.suffix == ".jsonl":
+        rows = [json.loads(line) for line in text.splitlines() if line.strip()]
+    else:
+        rows = json.loads(text)
+
+    entries = []
+    for row in rows:
+        label = str(row["label"]).strip().lower()
+        if label not in LABELS:
+            raise ValueError(f"{path}: unknown label {row['label']!r} for {row['path']}")
+        package = Path(row["path"]).expanduser()
+        if not package.is_absolute():
+            package = path.parent / package
+        entries.append({"path": str(package), "label": label})
+    return entries
+
+
+class Checkpoint:
+    """Append-only JSONL file of finished records, keyed by package path."""
+
+    def __init__(self, path: str | Path, fresh: bool = False):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self.records: Dict[str, Dict[str, Any]] = {}
+        if fresh:
+            self.path.unlink(missing_ok=True)
+        elif self.path.exists():
+            text = self.path.read_text(encoding="utf-8")
+            if text and not text.endswith("\n"):
+                # Terminate a torn last line so the next record starts on its own line.
+                with self.path.open("a", encoding="utf-8") as f:
+                    f.write("\n")
+            for line in text.splitlines():
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    # A record cut short by a crash: that package is simply run again.
+                    continue
+                self.records[record["path"]] = record
+
+    def done(self, path: str) -> bool:
+        record = self.records.get(path)
+        return record is not None and not record.get("error")
+
+    def add(self, record: Dict[str, Any]) -> None:
+        with self._lock:
+            self.records[record["path"]] = record
+            with self.path.open("a", encoding="utf-8") as f:
+                f.write(json.dumps(record) + "\n")
+
+
+def _record(entry: Dict[str, str], result: Optional[Dict[str, Any]], latency: float,
+            error: Optional[str] = None) -> Dict[str, Any]:
+    record: Dict[str, Any] = {"path": entry["path"], "label": entry["label"], "latency_seconds": round(latency, 6)}
+    if result is None:
+        record["error"] = error
+        return record
+    tokens = result.get("metrics", {}).get("tokens", {})
+    record.update({
+        "predicted": result["classification_output"].classification.value,
+        "decided_by": result.get("decided_by", "agent"),
+        "input_tokens": sum(usage["input"] for usage in tokens.values()),
+        "output_tokens": sum(usage["output"] for usage in tokens.values()),
+    })
+    return record
+
+
+async def run_evaluation(pipeline: Any, entries: List[Dict[str, str]], checkpoint: Checkpoint,
+                         concurrency: int = 4) -> float:
+    """
+    Classify every entry not yet in *checkpoint* with at most *concurrency*
+    packages in flight. Returns the wall time of this (possibly resumed) run.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    todo = [entry for entry in entries if not checkpoint.done(entry["path"])]
+    logger.info(f"Evaluating {len(todo)} packages ({len(entries) - len(todo)} already in the checkpoint)")
+
+    async def one(entry: Dict[str, str]) -> None:
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                result = await pipeline.classify(entry["path"])
+            except Exception as e:
+                logger.warning(f"Classification of {entry['path']} failed: {e}")
+                checkpoint.add(_record(entry, None, time.perf_counter() - start, error=f"{type(e).__name__}: {e}"))
+                return
+            checkpoint.add(_record(entry, result, time.perf_counter() - start))
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(entry) for entry in todo))
+    return time.perf_counter() - start
+
+
+def percentiles(values: List[float]) -> Dict[str, float]:
+    """Mean, p50, p95, p99 and max of *values* (nearest-rank)."""
+    if not values:
+        return {}
+    ordered = sorted(values)
+
+    def pick(q: float) -> float:
+        return ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))]
+
+    return {"mean": round(statistics.fmean(ordered), 6), "p50": round(pick(0.50), 6),
+            "p95": round(pick(0.95), 6), "p99": round(pick(0.99), 6), "max": round(ordered[-1], 6)}
+
+
+def confusion_matrix(records: List[Dict[str, Any]]) -> Dict[str, Dict[str, int]]:
+    """actual label -> predicted label -> count, over records with a prediction."""
+    matrix = {actual: {predicted: 0 for predicted in LABELS} for actual in LABELS}
+    for record in records:
+        if record.get("predicted") in LABELS:
+            matrix[record["label"]][record["predicted"]] += 1
+    return matrix
+
+
+def classification_scores(matrix: Dict[str, Dict[str, int]], positive: str = POSITIVE) -> Dict[str, float]:
+    negative = next(label for label in LABELS if label != positive)
+    tp, fn = matrix[positive][positive], matrix[positive][negative]
+    fp, tn = matrix[negative][positive], matrix[negative][negative]
+    precision = tp / (tp + fp) if tp + fp else 0.0
+    recall = tp / (tp + fn) if tp + fn else 0.0
+    f1 = 2 * precision * recall / (precision + recall) if precision + recall else 0.0
+    total = tp + fn + fp + tn
+    return {"precision": round(precision, 4), "recall": round(recall, 4), "f1": round(f1, 4),
+            "accuracy": round((tp + tn) / total, 4) if total else 0.0,
+            "false_positive_rate": round(fp / (fp + tn), 4) if fp + tn else 0.0}
+
+
+def summarize(records: List[Dict[str, Any]], name: str = "run", wall_seconds: Optional[float] = None,
+              input_cost_per_million: float = 0.0, output_cost_per_million: float = 0.0) -> Dict[str, Any]:
+    """Accuracy, cost and latency summary of one evaluation run."""
+    scored = [record for record in records if not record.get("error")]
+    matrix = confusion_matrix(scored)
+    input_tokens = sum(record.get("input_tokens", 0) for record in scored)
+    output_tokens = sum(record.get("output_tokens", 0) for record in scored)
+    cost = (input_tokens * input_cost_per_million + output_tokens * output_cost_per_million) / 1_000_000
+    decided_by: Dict[str, int] = {}
+    for record in scored:
+        decided_by[record["decided_by"]] = decided_by.get(record["decided_by"], 0) + 1
+    summary = {
+        "name": name,
+        "packages": len(records),
+        "errors": len(records) - len(scored),
+        **classification_scores(matrix),
+        "confusion_matrix": matrix,
+        "decided_by": decided_by,
+        "latency_seconds": percentiles([record["latency_seconds"] for record in scored]),
+        "input_tokens": input_tokens,
+        "output_tokens": output_tokens,
+        "cost": round(cost, 6),
+        "cost_per_package": round(cost / len(scored), 6) if scored else 0.0,
+    }
+    if wall_seconds:
+        summary["wall_seconds"] = round(wall_seconds, 3)
+        summary["packages_per_second"] = round(len(scored) / wall_seconds, 3)
+    return summary
+
+
+def render_table(summary: Dict[str, Any]) -> str:
+    """Markdown report of one run: scores, confusion matrix, cost and latency."""
+    latency = summary["latency_seconds"]
+    lines = [
+        f"## {summary['name']}",
+        "",
+        f"{summary['packages']} packages, {summary['errors']} errors; "
+        f"decided by {', '.join(f'{k}: {v}' for k, v in sorted(summary['decided_by'].items())) or 'none'}",
+        "",
+        "| precision | recall | F1 | accuracy | FPR |",
+        "|---|---|---|---|---|",
+        f"| {summary['precision']} | {summary['recall']} | {summary['f1']} | {summary['accuracy']} "
+        f"| {summary['false_positive_rate']} |",
+        "",
+        "| actual \\ predicted | " + " | ".join(LABELS) + " |",
+        "|---|" + "---|" * len(LABELS),
+    ]
+    for actual in LABELS:
+        lines.append(f"| {actual} | " + " | ".join(str(summary["confusion_matrix"][actual][p]) for p in LABELS) + " |")
+    lines += [
+        "",
+        "| latency p50 | p95 | p99 | packages/s | input tokens | output tokens | cost | cost/package |",
+        "|---|---|---|---|---|---|---|---|",
+        f"| {latency.get('p50', '-')} | {latency.get('p95', '-')} | {latency.get('p99', '-')} "
+        f"| {summary.get('packages_per_second', '-')} | {summary['input_tokens']} | {summary['output_tokens']} "
+        f"| {summary['cost']} | {summary['cost_per_package']} |",
+    ]
+    return "\n".join(lines) + "\n"
+
+
+def render_comparison(summaries: List[Dict[str, Any]]) -> str:
+    """One Markdown row per run, for side-by-side comparison."""
+    lines = ["| run | packages | errors | precision | recall | F1 | FPR | p50 s | p95 s | packages/s | cost/package |",
+             "|---|---|---|---|---|---|---|---|---|---|---|"]
+    for s in summaries:
+        latency = s["latency_seconds"]
+        lines.append(f"| {s['name']} | {s['packages']} | {s['errors']} | {s['precision']} | {s['recall']} | {s['f1']} "
+                     f"| {s['false_positive_rate']} | {latency.get('p50', '-')} | {latency.get('p95', '-')} "
+                     f"| {s.get('packages_per_second', '-')} | {s['cost_per_package']} |")
+    return "\n".join(lines) + "\n"
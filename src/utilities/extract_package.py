@@ -1,27 +1,48 @@
 from __future__ import annotations
 
-import base64
+import configparser
 import json
+import logging
+import os
+import re
 import shutil
+import tempfile
 import zipfile
 import gzip
-import shutil
 import tarfile
 
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Dict
+from typing import IO, Any, Dict, Iterator, List, Optional, Tuple
+
+from src.utilities.content_type import TEXT, decode_text
+from src.utilities.package_store import PackageStore, PackageStoreWriter, index_file, json_record
 
 try:
     import py7zr  # lightweight dependency; only needed for .7z
 except ImportError:  # defer the error until it’s actually required
     py7zr = None
 
-EXTRACT_ROOT = Path(".temp") / "packages"  # where we unpack wheels / zips
-EXTRACT_ROOT.mkdir(parents=True, exist_ok=True)
+parser = configparser.ConfigParser()
+parser.read("config.ini")
+
+# The indexed package store is the primary format; the legacy monolithic
+# `<base>_dump.json` is only written when explicitly requested.
+EXPORT_JSON_DUMP = parser.getboolean("EXTRACTION_CONFIG", "EXPORT_JSON_DUMP", fallback=False)
+# Binaries are indexed (type, size, sha256, entropy) but their bytes are not stored unless asked for.
+KEEP_BINARY_CONTENT = parser.getboolean("EXTRACTION_CONFIG", "KEEP_BINARY_CONTENT", fallback=False)
+# Threads reading and hashing the files of a source folder (1: on the calling thread).
+INGEST_WORKERS = parser.getint("EXTRACTION_CONFIG", "INGEST_WORKERS", fallback=8)
 
-PLAIN_ROOT   = Path(".temp") / "plain"     # single‑package JSON dumps
-PLAIN_ROOT.mkdir(parents=True, exist_ok=True)
+# Limits applied while streaming archive members into the package store.
+# The packages we scan are potentially hostile, so none of these are optional.
+MAX_ARCHIVE_FILES = parser.getint("EXTRACTION_CONFIG", "MAX_ARCHIVE_FILES", fallback=20000)
+MAX_ARCHIVE_BYTES = parser.getint("EXTRACTION_CONFIG", "MAX_ARCHIVE_BYTES", fallback=512 * 1024 * 1024)
+MAX_MEMBER_BYTES = parser.getint("EXTRACTION_CONFIG", "MAX_MEMBER_BYTES", fallback=64 * 1024 * 1024)
+MAX_COMPRESSION_RATIO = parser.getfloat("EXTRACTION_CONFIG", "MAX_COMPRESSION_RATIO", fallback=200.0)
 
+logger = logging.getLogger("extract package")
 
 
 SUPPORTED_EXTS = {
@@ -51,12 +72,62 @@ def _base_name(path: Path, eff_suffix: str) -> str:
     return path.name[: -len(eff_suffix)]
 
 
-def read_file_raw(p: Path) -> str:
-    """Return UTF‑8 text if possible; otherwise Base‑64 of the raw bytes."""
-    try:
-        return p.read_text(encoding="utf-8")
-    except UnicodeDecodeError:
-        return base64.b64encode(p.read_bytes()).decode()
+def _walk_files(root: Path) -> Iterator[Path]:
+    """Regular files under *root* in sorted depth-first order; symlinks are not followed."""
+    stack = [root]
+    while stack:
+        with os.scandir(stack.pop()) as it:
+            entries = sorted(it, key=lambda e: e.name)
+        subdirs = []
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                subdirs.append(Path(entry.path))
+            elif entry.is_file(follow_symlinks=False):
+                yield Path(entry.path)
+        stack.extend(reversed(subdirs))
+
+
+def _read_batch(batch: List[Tuple[Path, str]]) -> List[Tuple[str, bytes, Dict[str, Any]]]:
+    out = []
+    for path, rel_path in batch:
+        data = path.read_bytes()
+        out.append((rel_path, data, index_file(rel_path, data)))
+    return out
+
+
+def _batches(src: Path, max_files: int = 64, max_bytes: int = 4 * 1024 * 1024) -> Iterator[List[Tuple[Path, str]]]:
+    """Files under *src* grouped so per-task overhead stays small next to the I/O."""
+    batch: List[Tuple[Path, str]] = []
+    size = 0
+    for f in _walk_files(src):
+        batch.append((f, f.relative_to(src).as_posix()))
+        size += f.stat().st_size
+        if len(batch) >= max_files or size >= max_bytes:
+            yield batch
+            batch, size = [], 0
+    if batch:
+        yield batch
+
+
+def read_tree(src: Path, workers: int = INGEST_WORKERS) -> Iterator[Tuple[str, bytes, Dict[str, Any]]]:
+    """
+    Yield (relative path, bytes, `index_file` entry) for every file under
+    *src*, in walk order. Files are read, sniffed and hashed in batches by
+    up to *workers* threads ahead of the consumer; at most 2 x *workers*
+    batches are in flight, so memory stays bounded on large trees.
+    """
+    if workers <= 1:
+        for batch in _batches(src):
+            yield from _read_batch(batch)
+        return
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="ingest") as pool:
+        pending: deque = deque()
+        for batch in _batches(src):
+            pending.append(pool.submit(_read_batch, batch))
+            if len(pending) >= workers * 2:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
 
 
 def folder_to_json(src: str | Path, dst: str | Path) -> Path:
@@ -64,11 +135,16 @@ def folder_to_json(src: str | Path, dst: str | Path) -> Path:
     Recursively walk *src* and write one JSON at *dst*
     (adding “.json” if the caller omitted it).
 
-    JSON structure:
+    JSON structure (keyed by relative path, so nested files with the
+    same basename do not overwrite each other):
         {
-            "<basename>": {
+            "<relative/path>": {
                 "file_path": "<relative/path>",
-                "content":   "<text | base64>"
+                "content":   "<text>"
+            },
+            "<relative/path of a binary>": {
+                "file_path": "<relative/path>",
+                "binary":    {"content_type", "size", "sha256", "entropy"}
             },
             ...
         }
@@ -88,23 +164,223 @@ def folder_to_json(src: str | Path, dst: str | Path) -> Path:
     if dst.suffix.lower() != ".json":
         dst = dst.with_suffix(".json")
 
-    data: Dict[str, Dict[str, str]] = {}
-    for f in src.rglob("*"):
-        if f.is_file():
-            data[f.name] = {
-                "file_path": str(f.relative_to(src)),
-                "content"  : read_file_raw(f),
-            }
+    data: Dict[str, Dict[str, object]] = {}
+    for rel_path, content, entry in read_tree(src):
+        data[rel_path] = json_record(entry, decode_text(content)[0] if entry["kind"] == TEXT else None)
 
     dst.parent.mkdir(parents=True, exist_ok=True)
     dst.write_text(json.dumps(data, ensure_ascii=False, indent=4), encoding="utf-8")
     return dst
 
 
-def _unpack_archive(archive_path: Path) -> Path:
+def folder_to_package_store(src: str | Path, dst: str | Path, workers: int = INGEST_WORKERS,
+                            max_bytes: Optional[int] = None) -> Path:
+    """
+    Recursively walk *src* and write an indexed package store at *dst*
+    (see `package_store`), reading and hashing files with *workers*
+    threads. Ingestion stops, marking the store truncated, once *max_bytes*
+    (the workspace quota) would be exceeded. The legacy JSON dump is
+    exported next to it when EXPORT_JSON_DUMP is enabled.
+
+    Returns the Path of the store manifest.
     """
-    Unpack *archive_path* into EXTRACT_ROOT/<basename> and dump a JSON
-    description of that folder via `folder_to_json`.
+    src = Path(src).expanduser()
+
+    if not src.is_dir():
+        raise ValueError(f"Source {src} is not a directory.")
+
+    with PackageStoreWriter(dst, source=str(src), keep_binary=KEEP_BINARY_CONTENT) as writer:
+        ingested = 0
+        for rel_path, data, entry in read_tree(src, workers):
+            if max_bytes is not None and ingested + len(data) > max_bytes:
+                writer.truncate(f"workspace quota of {max_bytes} bytes reached")
+                break
+            writer.add_file(rel_path, data, entry)
+            ingested += len(data)
+    _log_ingest(src, writer)
+
+    if EXPORT_JSON_DUMP:
+        _export_json_dump(writer.manifest_path, src.name)
+
+    return writer.manifest_path
+
+
+def _log_ingest(source: Path, writer: PackageStoreWriter) -> None:
+    stats = writer.ingest
+    logger.info(f"Ingested {stats['files']} files ({stats['bytes'] / 1e6:.1f} MB) from {source.name} "
+                f"in {stats['seconds']:.2f}s ({stats['mb_per_second']} MB/s)")
+
+
+def _export_json_dump(manifest_path: Path, base: str) -> Path:
+    """Write the legacy `<base>_dump.json` next to the package store."""
+    with PackageStore(manifest_path) as store:
+        return store.to_json(manifest_path.with_name(f"{base}_dump.json"))
+
+
+def _safe_member_path(name: str) -> Optional[str]:
+    """
+    Normalize an archive member name to a relative POSIX path, or None if it
+    is absolute or escapes the package root (path traversal).
+    """
+    name = name.replace("\\", "/")
+    if name.startswith("/") or re.match(r"^[A-Za-z]:", name):
+        return None
+    parts = [part for part in name.split("/") if part not in ("", ".")]
+    if not parts or ".." in parts:
+        return None
+    return "/".join(parts)
+
+
+class _ExtractionBudget:
+    """
+    Enforces the file count, byte and compression ratio caps while members
+    are streamed into a `PackageStoreWriter`.
+    """
+
+    def __init__(self, writer: PackageStoreWriter, archive_size: int,
+                 max_files: int = MAX_ARCHIVE_FILES,
+                 max_bytes: int = MAX_ARCHIVE_BYTES,
+                 max_member_bytes: int = MAX_MEMBER_BYTES,
+                 max_ratio: float = MAX_COMPRESSION_RATIO):
+        self.writer = writer
+        self.max_files = max_files
+        self.max_member_bytes = max_member_bytes
+        self.max_ratio = max_ratio
+        # Total output is capped both absolutely and relative to the archive size.
+        self.max_bytes = min(max_bytes, int(max(archive_size, 1) * max_ratio))
+        self.num_files = 0
+        self.num_bytes = 0
+
+    @property
+    def exhausted(self) -> bool:
+        return self.writer.truncated
+
+    def admit(self, name: str, declared_size: Optional[int] = None,
+              compressed_size: Optional[int] = None) -> Optional[str]:
+        """Safe relative path for member *name*, or None if it must be skipped."""
+        rel_path = _safe_member_path(name)
+        if rel_path is None:
+            self.writer.skip(name, "unsafe path")
+            return None
+        if declared_size is not None and declared_size > self.max_member_bytes:
+            self._skip_declared(rel_path, "member too large", declared_size)
+            return None
+        if declared_size and compressed_size is not None and declared_size / max(compressed_size, 1) > self.max_ratio:
+            self._skip_declared(rel_path, "compression ratio too high", declared_size)
+            return None
+        if self.num_files >= self.max_files:
+            self.writer.truncate(f"more than {self.max_files} files")
+            return None
+        # Counted on admission, so listings that are extracted later (7z) are capped too.
+        self.num_files += 1
+        return rel_path
+
+    def _skip_declared(self, rel_path: str, reason: str, declared_size: int) -> None:
+        # Skipped members still cost decompression (a tar stream is read past them),
+        # so their declared size is charged against the byte budget.
+        self.writer.skip(rel_path, reason)
+        self.num_bytes += declared_size
+        if self.num_bytes > self.max_bytes:
+            self.writer.truncate(f"more than {self.max_bytes} uncompressed bytes")
+
+    def add(self, rel_path: str, stream: IO[bytes]) -> None:
+        """Read at most the remaining budget from *stream* and store it."""
+        remaining = self.max_bytes - self.num_bytes
+        data = stream.read(min(self.max_member_bytes, remaining) + 1)
+        if len(data) > self.max_member_bytes:
+            self.writer.skip(rel_path, "member too large")
+            return
+        if len(data) > remaining:
+            self.writer.truncate(f"more than {self.max_bytes} uncompressed bytes")
+            return
+        self.writer.add_file(rel_path, data)
+        self.num_bytes += len(data)
+
+
+def _stream_zip(archive_path: Path, budget: _ExtractionBudget) -> None:
+    with zipfile.ZipFile(archive_path) as zf:
+        for info in zf.infolist():
+            if budget.exhausted:
+                break
+            if info.is_dir():
+                continue
+            if (info.external_attr >> 16) & 0o170000 == 0o120000:
+                budget.writer.skip(info.filename, "symlink")
+                continue
+            rel_path = budget.admit(info.filename, info.file_size, info.compress_size)
+            if rel_path is not None:
+                with zf.open(info) as member:
+                    budget.add(rel_path, member)
+
+
+def _stream_tar(archive_path: Path, budget: _ExtractionBudget) -> None:
+    # Iterating the TarFile reads headers sequentially, members are never written to disk.
+    # Reaching the next header decompresses skipped members too; the budget charges them.
+    with tarfile.open(archive_path, mode="r:*") as tf:
+        for member in tf:
+            if budget.exhausted:
+                break
+            if member.isdir():
+                continue
+            if not member.isfile():
+                budget.writer.skip(member.name, "symlink" if member.issym() or member.islnk() else "special file")
+                continue
+            rel_path = budget.admit(member.name, member.size)
+            if rel_path is not None:
+                budget.add(rel_path, tf.extractfile(member))
+
+
+def _stream_7z(archive_path: Path, budget: _ExtractionBudget) -> None:
+    if py7zr is None:
+        raise ModuleNotFoundError(
+            "py7zr is required to extract .7z files. "
+            "Install it with:  pip install py7zr"
+        )
+    with py7zr.SevenZipFile(archive_path, mode="r") as z:
+        targets = []
+        declared = 0
+        for info in z.list():
+            if budget.exhausted:
+                break
+            if info.is_directory:
+                continue
+            if getattr(info, "is_symlink", False):
+                budget.writer.skip(info.filename, "symlink")
+                continue
+            if budget.admit(info.filename, info.uncompressed, info.compressed) is not None:
+                # The targets are extracted to disk in one go: cap them by their declared sizes first.
+                declared += info.uncompressed or 0
+                if declared > budget.max_bytes:
+                    budget.writer.truncate(f"more than {budget.max_bytes} uncompressed bytes")
+                    break
+                targets.append(info.filename)
+        if not targets:
+            return
+        # py7zr cannot stream members; extract only the admitted ones to a private scratch dir.
+        z.reset()
+        with tempfile.TemporaryDirectory(dir=budget.writer.manifest_path.parent) as scratch:
+            z.extract(path=scratch, targets=targets)
+            # A file count cap hit while listing still leaves the admitted targets to store.
+            listing_truncated = budget.exhausted
+            for name in targets:
+                if budget.exhausted and not listing_truncated:
+                    break
+                member = Path(scratch) / name
+                if member.is_file() and not member.is_symlink():
+                    with open(member, "rb") as stream:
+                        budget.add(_safe_member_path(name), stream)
+
+
+def _unpack_archive(archive_path: Path, workspace_dir: str | Path, max_bytes: Optional[int] = None) -> Path:
+    """
+    Stream the members of *archive_path* straight into a package store at
+    <workspace_dir>/<basename>, without extracting them to disk first.
+
+    File count, total size (at most *max_bytes*, the workspace quota),
+    per-member size and compression ratio are capped
+    (see the MAX_* settings); symlinks, special files and members that would
+    escape the package root are skipped. The manifest records what was
+    skipped and whether the limits truncated the package.
 
     Supported extensions: .zip, .whl, .tar.gz, .tgz, .tar.bz2, .gz, .7z
     """
@@ -119,40 +395,50 @@ def _unpack_archive(archive_path: Path) -> Path:
         )
 
     base = _base_name(archive_path, eff_suffix)
-    dest_dir = EXTRACT_ROOT / base
-    if dest_dir.exists():
-        shutil.rmtree(dest_dir)
-    dest_dir.mkdir(parents=True, exist_ok=True)
 
-    # --- dispatch on suffix -------------------------------------------------
-    if eff_suffix in {".zip", ".whl"}:
-        with zipfile.ZipFile(archive_path) as zf:
-            zf.extractall(dest_dir)
+    dst = Path(workspace_dir) / base
+    with PackageStoreWriter(dst, source=str(archive_path), keep_binary=KEEP_BINARY_CONTENT) as writer:
+        budget = _ExtractionBudget(writer, archive_path.stat().st_size,
+                                   max_bytes=min(MAX_ARCHIVE_BYTES, max_bytes or MAX_ARCHIVE_BYTES))
 
-    elif eff_suffix in {".tar.gz", ".tgz", ".tar.bz2"}:
-        with tarfile.open(archive_path, mode="r:*") as tf:
-            tf.extractall(dest_dir)
+        # --- dispatch on suffix -------------------------------------------------
+        if eff_suffix in {".zip", ".whl"}:
+            _stream_zip(archive_path, budget)
 
-    elif eff_suffix == ".gz":
-        # Treat as a single gzip‑compressed file
-        out_file = dest_dir / Path(base).name
-        with gzip.open(archive_path, "rb") as src, open(out_file, "wb") as dst:
-            shutil.copyfileobj(src, dst)
+        elif eff_suffix in {".tar.gz", ".tgz", ".tar.bz2"}:
+            _stream_tar(archive_path, budget)
 
-    elif eff_suffix == ".7z":
-        if py7zr is None:
-            raise ModuleNotFoundError(
-                "py7zr is required to extract .7z files. "
-                "Install it with:  pip install py7zr"
-            )
-        with py7zr.SevenZipFile(archive_path, mode="r") as z:
-            z.extractall(dest_dir)
+        elif eff_suffix == ".gz":
+            # Treat as a single gzip‑compressed file
+            with gzip.open(archive_path, "rb") as src:
+                budget.add(Path(base).name, src)
 
-    out_json = PLAIN_ROOT / f"{base}_dump.json"
-    return folder_to_json(dest_dir, out_json)
+        elif eff_suffix == ".7z":
+            _stream_7z(archive_path, budget)
 
+    _log_ingest(archive_path, writer)
+    if writer.truncated or writer.skipped:
+        logger.info(f"Extraction of {archive_path.name}: truncated={writer.truncated} "
+                    f"({writer.truncation_reason}), {len(writer.skipped)} members skipped")
 
+    if EXPORT_JSON_DUMP:
+        _export_json_dump(writer.manifest_path, base)
 
+    return writer.manifest_path
 
 
+def format_package(package_path: str | Path, workspace_dir: str | Path,
+                   max_bytes: Optional[int] = None) -> Path:
+    """
+    Deterministically turn *package_path* into a package store inside
+    *workspace_dir*, holding at most *max_bytes*: folders are indexed in
+    place, supported archives are unpacked first. The caller owns
+    *workspace_dir* and removes it (see workspace.py).
 
+    Returns the Path of the store manifest.
+    """
+    package_path = Path(package_path).expanduser().resolve()
+    if package_path.is_dir():
+        return folder_to_package_store(package_path, Path(workspace_dir) / package_path.name,
+                                       max_bytes=max_bytes)
+    return _unpack_archive(package_path, workspace_dir, max_bytes)
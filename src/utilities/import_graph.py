@@ -0,0 +1,139 @@
+"""
+Resolved import graph of the Python modules shipped in a package.
+
+Every module is named the way Python would import it (walking up through
+directories that contain an `__init__.py`), and each of its imports is
+resolved against those names: imports of the package's own modules become
+internal edges, everything else is recorded by its top-level name as an
+external dependency. The graph is built once per run and lets the
+classification agent choose which files to read without a chain of
+get_python_script / get_imports round-trips.
+"""
+
+from __future__ import annotations
+
+import logging
+
+from collections import deque
+from pathlib import PurePosixPath
+from typing import Dict, List, Optional
+
+from src.utilities.code_index import CODE_INDEX_CACHE
+from src.utilities.content_type import TEXT
+from src.utilities.package_cache import CachedPackage
+from src.utilities.schemas import ImportGraph, ModuleImports
+
+logger = logging.getLogger("import graph")
+
+DYNAMIC_SUFFIX = " (dynamic import)"
+MAX_RENDERED_MODULES = 200
+
+
+def _module_names(paths: List[str]) -> Dict[str, str]:
+    """Dotted module name -> path for every .py file in *paths*."""
+    package_dirs = {PurePosixPath(p).parent for p in paths if PurePosixPath(p).name == "__init__.py"}
+    modules: Dict[str, str] = {}
+    for path in paths:
+        pure = PurePosixPath(path)
+        parts = [] if pure.name == "__init__.py" else [pure.stem]
+        directory = pure.parent
+        while directory in package_dirs and directory != PurePosixPath("."):
+            parts.insert(0, directory.name)
+            directory = directory.parent
+        name = ".".join(parts) or "__init__"
+        if name in modules:
+            # Same dotted name in two trees (e.g. a vendored copy): keep both apart.
+            name = f"{name} ({path})"
+        modules[name] = path
+    return modules
+
+
+def _resolve(target: str, modules: Dict[str, str]) -> Optional[str]:
+    """Longest prefix of *target* that is a module of the package."""
+    parts = target.split(".")
+    for i in range(len(parts), 0, -1):
+        candidate = ".".join(parts[:i])
+        if candidate in modules:
+            return candidate
+    return None
+
+
+def _absolute(name: str, module: str, is_package: bool) -> str:
+    """Absolute form of the (possibly relative) import *name* made from *module*."""
+    level = len(name) - len(name.lstrip("."))
+    if not level:
+        return name
+    package = module.split(".") if is_package else module.split(".")[:-1]
+    base = package[:max(len(package) - (level - 1), 0)]
+    rest = name[level:]
+    return ".".join(base + ([rest] if rest else []))
+
+
+def build_import_graph(package: CachedPackage) -> ImportGraph:
+    """Index every Python file of *package* and resolve its imports."""
+    paths = [entry["path"] for entry in package.store.iter_files()
+             if entry["path"].endswith(".py") and entry["kind"] == TEXT]
+    modules = _module_names(paths)
+    graph = ImportGraph()
+
+    for module, path in modules.items():
+        node = ModuleImports(path=path)
+        is_package = PurePosixPath(path).name == "__init__.py"
+        internal, external, dynamic = set(), set(), set()
+        for name in CODE_INDEX_CACHE.get(package.read_text(path) or "").imports:
+            if name.endswith(DYNAMIC_SUFFIX):
+                name = name[:-len(DYNAMIC_SUFFIX)]
+                dynamic.add(name)
+            target = _absolute(name, module, is_package)
+            resolved = _resolve(target, modules) if target else None
+            if resolved and resolved != module:
+                internal.add(resolved)
+            elif not resolved and not name.startswith("."):
+                external.add(target.split(".")[0])
+        node.internal, node.external, node.dynamic = sorted(internal), sorted(external), sorted(dynamic)
+        graph.modules[module] = node
+
+        pure = PurePosixPath(path)
+        if pure.name in {"setup.py", "__main__.py"} or (is_package and "." not in module):
+            graph.entry_points.append(module)
+
+    # Shallowest first, so the real setup.py precedes any nested copies.
+    graph.entry_points.sort(key=lambda m: (len(PurePosixPath(modules[m]).parts), m))
+    logger.info(f"Import graph built: {len(graph.modules)} modules, {len(graph.entry_points)} entry points")
+    return graph
+
+
+def render_import_graph(graph: ImportGraph, max_modules: int = MAX_RENDERED_MODULES) -> str:
+    """
+    Compact text form of *graph*: entry points first, then the modules they
+    reach (breadth first), then the remaining modules, up to *max_modules*.
+    """
+    if not graph.modules:
+        return "No Python modules found in the package."
+
+    order: List[str] = []
+    seen = set()
+    queue = deque(graph.entry_points)
+    while queue:
+        module = queue.popleft()
+        if module in seen:
+            continue
+        seen.add(module)
+        order.append(module)
+        queue.extend(graph.modules[module].internal)
+    order.extend(m for m in sorted(graph.modules) if m not in seen)
+
+    lines = [f"Entry points: {', '.join(graph.entry_points) or 'none'}"]
+    for module in order[:max_modules]:
+        node = graph.modules[module]
+        line = f"{module} [{node.path}]"
+        if node.internal:
+            line += f" -> internal: {', '.join(node.internal)}"
+        if node.external:
+            line += f" | external: {', '.join(node.external)}"
+        if node.dynamic:
+            line += f" | dynamic: {', '.join(node.dynamic)}"
+        lines.append(line)
+    if len(order) > max_modules:
+        lines.append(f"... {len(order) - max_modules} more modules not shown")
+    return "\n".join(lines)
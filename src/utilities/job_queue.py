@@ -0,0 +1,215 @@
+"""
+Persistent queue of classification jobs.
+
+Jobs are rows in a local SQLite database, so queued work and finished
+results survive an API restart. Several API processes may share the
+database: a claimed job records its owner (host and pid) and holds a lease
+that the owner renews while it runs. Jobs whose lease expired are claimed
+again by any worker, and jobs of dead local processes are put back in the
+queue on startup, while jobs of live processes are left alone. The queue is bounded; once
+`max_pending` jobs are queued or running, `submit` raises `QueueFullError`
+so the API can push back on clients instead of piling up work.
+"""
+
+from __future__ import annotations
+
+import configparser
+import json
+import logging
+import os
+import socket
+import sqlite3
+import time
+import uuid
+
+from contextlib import closing
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+from src.utilities.workspace import _pid_alive
+
+logger = logging.getLogger("job queue")
+
+parser = configparser.ConfigParser()
+parser.read("config.ini")
+
+JOB_DB_PATH = parser.get("API_CONFIG", "JOB_DB_PATH", fallback=".temp/jobs.sqlite3")
+JOB_QUEUE_MAX_PENDING = parser.getint("API_CONFIG", "JOB_QUEUE_MAX_PENDING", fallback=1000)
+JOB_RESULT_TTL_SECONDS = parser.getint("API_CONFIG", "JOB_RESULT_TTL_SECONDS", fallback=24 * 3600)
+# A running job whose owner has not renewed its lease for this long is claimed again.
+JOB_LEASE_SECONDS = parser.getint("API_CONFIG", "JOB_LEASE_SECONDS", fallback=300)
+
+QUEUED, RUNNING, DONE, FAILED = "queued", "running", "done", "failed"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id          TEXT PRIMARY KEY,
+    status      TEXT NOT NULL,
+    request     TEXT NOT NULL,
+    result      TEXT,
+    error       TEXT,
+    error_code  INTEGER,
+    created_at  REAL NOT NULL,
+    started_at  REAL,
+    finished_at REAL,
+    owner       TEXT,
+    lease_until REAL
+)
+"""
+# Databases created before leases existed.
+_LEASE_COLUMNS = {"owner": "TEXT", "lease_until": "REAL"}
+_INDEX = "CREATE INDEX IF NOT EXISTS jobs_status_created ON jobs (status, created_at)"
+
+
+class QueueFullError(Exception):
+    """The queue already holds `max_pending` unfinished jobs."""
+
+    def __init__(self, pending: int, retry_after: int):
+        super().__init__(f"Job queue is full ({pending} pending jobs)")
+        self.pending = pending
+        self.retry_after = retry_after
+
+
+class JobQueue:
+    """SQLite-backed FIFO job queue with status tracking and result storage."""
+
+    def __init__(self,
+                 db_path: str | Path = JOB_DB_PATH,
+                 max_pending: int = JOB_QUEUE_MAX_PENDING,
+                 result_ttl_seconds: int = JOB_RESULT_TTL_SECONDS,
+                 lease_seconds: int = JOB_LEASE_SECONDS):
+        self.db_path = Path(db_path)
+        self.max_pending = max_pending
+        self.result_ttl_seconds = result_ttl_seconds
+        self.lease_seconds = lease_seconds
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        with closing(self._connect()) as conn, conn:
+            conn.execute(_SCHEMA)
+            conn.execute(_INDEX)
+            columns = {row["name"] for row in conn.execute("PRAGMA table_info(jobs)")}
+            for name, kind in _LEASE_COLUMNS.items():
+                if name not in columns:
+                    conn.execute(f"ALTER TABLE jobs ADD COLUMN {name} {kind}")
+
+    @property
+    def owner(self) -> str:
+        # Evaluated on use: server workers fork after the queue is created.
+        return f"{socket.gethostname()}:{os.getpid()}"
+
+    def _connect(self) -> sqlite3.Connection:
+        # One short-lived connection per call keeps this safe from worker threads.
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def submit(self, request: Dict[str, Any], job_id: Optional[str] = None, workers: int = 1) -> str:
+        """Queue *request* and return its job id; raises QueueFullError when the queue is full."""
+        job_id = job_id or uuid.uuid4().hex
+        with closing(self._connect()) as conn:
+            # IMMEDIATE: the capacity check and the insert must not interleave with other submitters.
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                pending = conn.execute("SELECT COUNT(*) FROM jobs WHERE status IN (?, ?)", (QUEUED, RUNNING)).fetchone()[0]
+                if pending >= self.max_pending:
+                    conn.execute("ROLLBACK")
+                    raise QueueFullError(pending, self.retry_after(pending, workers))
+                conn.execute("INSERT INTO jobs (id, status, request, created_at) VALUES (?, ?, ?, ?)",
+                             (job_id, QUEUED, json.dumps(request), time.time()))
+                conn.execute("COMMIT")
+            except sqlite3.Error:
+                conn.execute("ROLLBACK")
+                raise
+        return job_id
+
+    def claim(self) -> Optional[Tuple[str, Dict[str, Any]]]:
+        """Mark the oldest queued job as running and return (id, request), or None if idle."""
+        now = time.time()
+        with closing(self._connect()) as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            # Jobs whose owner stopped renewing (crashed, or on a host that went away) are up for grabs.
+            expired = conn.execute("UPDATE jobs SET status = ?, started_at = NULL, owner = NULL, lease_until = NULL "
+                                   "WHERE status = ? AND lease_until < ?", (QUEUED, RUNNING, now)).rowcount
+            if expired:
+                logger.info(f"Re-queued {expired} jobs whose lease expired")
+            row = conn.execute("SELECT id, request FROM jobs WHERE status = ? ORDER BY created_at LIMIT 1",
+                               (QUEUED,)).fetchone()
+            if row is None:
+                conn.execute("COMMIT")
+                return None
+            conn.execute("UPDATE jobs SET status = ?, started_at = ?, owner = ?, lease_until = ? WHERE id = ?",
+                         (RUNNING, now, self.owner, now + self.lease_seconds, row["id"]))
+            conn.execute("COMMIT")
+        return row["id"], json.loads(row["request"])
+
+    def renew(self, job_id: str) -> None:
+        """Extend the lease of a job this process is running."""
+        with closing(self._connect()) as conn:
+            conn.execute("UPDATE jobs SET lease_until = ? WHERE id = ? AND status = ? AND owner = ?",
+                         (time.time() + self.lease_seconds, job_id, RUNNING, self.owner))
+
+    def complete(self, job_id: str, result: Dict[str, Any]) -> None:
+        with closing(self._connect()) as conn:
+            conn.execute("UPDATE jobs SET status = ?, result = ?, finished_at = ? WHERE id = ?",
+                         (DONE, json.dumps(result, default=str), time.time(), job_id))
+
+    def fail(self, job_id: str, error: str, error_code: int = 500) -> None:
+        with closing(self._connect()) as conn:
+            conn.execute("UPDATE jobs SET status = ?, error = ?, error_code = ?, finished_at = ? WHERE id = ?",
+                         (FAILED, error, error_code, time.time(), job_id))
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """The job row as a dict (result decoded), or None if unknown or expired."""
+        with closing(self._connect()) as conn:
+            row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        job = dict(row)
+        job["request"] = json.loads(job["request"])
+        job["result"] = json.loads(job["result"]) if job["result"] else None
+        return job
+
+    def requeue_running(self) -> int:
+        """
+        Put jobs interrupted by a restart back in the queue: those of dead
+        processes on this host (or carrying this process's reused pid),
+        those without an owner, and those whose lease expired. Jobs that
+        another live process is running are left alone. Returns how many.
+        """
+        host = socket.gethostname()
+        now = time.time()
+        with closing(self._connect()) as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            stale = []
+            for row in conn.execute("SELECT id, owner, lease_until FROM jobs WHERE status = ?", (RUNNING,)).fetchall():
+                owner_host, _, pid = (row["owner"] or "").rpartition(":")
+                local_dead = owner_host == host and pid.isdigit() and (int(pid) == os.getpid() or not _pid_alive(int(pid)))
+                if row["owner"] is None or row["lease_until"] is None or row["lease_until"] < now or local_dead:
+                    stale.append(row["id"])
+            conn.executemany("UPDATE jobs SET status = ?, started_at = NULL, owner = NULL, lease_until = NULL "
+                             "WHERE id = ?", [(QUEUED, job_id) for job_id in stale])
+            conn.execute("COMMIT")
+        if stale:
+            logger.info(f"Re-queued {len(stale)} jobs interrupted by a restart")
+        return len(stale)
+
+    def purge_finished(self) -> int:
+        """Drop finished jobs older than the result TTL."""
+        with closing(self._connect()) as conn:
+            return conn.execute("DELETE FROM jobs WHERE status IN (?, ?) AND finished_at < ?",
+                                (DONE, FAILED, time.time() - self.result_ttl_seconds)).rowcount
+
+    def pending(self) -> int:
+        with closing(self._connect()) as conn:
+            return conn.execute("SELECT COUNT(*) FROM jobs WHERE status IN (?, ?)", (QUEUED, RUNNING)).fetchone()[0]
+
+    def retry_after(self, pending: int, workers: int = 1, default: int = 30) -> int:
+        """Seconds until a slot is likely free, from the mean duration of recent jobs."""
+        with closing(self._connect()) as conn:
+            row = conn.execute(
+                "SELECT AVG(finished_at - started_at) FROM (SELECT finished_at, started_at FROM jobs "
+                "WHERE status = ? AND started_at IS NOT NULL ORDER BY finished_at DESC LIMIT 50)", (DONE,)
+            ).fetchone()
+        if not row or row[0] is None:
+            return default
+        # Roughly one worker round must finish before the oldest queued job starts.
+        return max(1, int(row[0] * max(pending - self.max_pending + 1, 1) / max(workers, 1) + 0.5))
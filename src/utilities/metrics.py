@@ -0,0 +1,267 @@
+"""
+Process-wide metrics in the Prometheus text exposition format.
+
+A small in-repo registry (counters, histograms and callback gauges) so the
+API can serve `/metrics` without an extra dependency. Alongside the
+process-wide series, every classification run gets a `RunMetrics` record of
+its own stage timings, token usage and tool calls, returned with the result.
+`MetricsHooks` feeds both from the openai-agents run lifecycle.
+"""
+
+from __future__ import annotations
+
+import bisect
+import math
+import threading
+import time
+
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from agents import Agent, RunContextWrapper, RunHooks, Tool
+from agents.items import ModelResponse
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+
+LabelValues = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = list(zip(names, values)) + ([extra] if extra else [])
+    return "{" + ",".join(f'{n}="{_escape(str(v))}"' for n, v in pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, Any]) -> LabelValues:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1, **labels: Any) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return self.header() + [f"{self.name}{_format_labels(self.labelnames, k)} {_format_value(v)}" for k, v in items]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # per label set: (bucket counts, sum, count)
+        self._values: Dict[LabelValues, List[Any]] = {}
+
+    def observe(self, value: float, **labels: Any) -> None:
+        key = self._key(labels)
+        with self._lock:
+            entry = self._values.setdefault(key, [[0] * len(self.buckets), 0.0, 0])
+            index = bisect.bisect_left(self.buckets, value)
+            if index < len(self.buckets):
+                entry[0][index] += 1
+            entry[1] += value
+            entry[2] += 1
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = sorted((k, (list(v[0]), v[1], v[2])) for k, v in self._values.items())
+        lines = self.header()
+        for key, (counts, total, count) in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, ('le', _format_value(bound)))} {cumulative}")
+            lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, ('le', '+Inf'))} {count}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {count}")
+        return lines
+
+
+class CallbackGauge(_Metric):
+    """Gauge whose values are read from *callback* at scrape time."""
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str],
+                 callback: Callable[[], Dict[LabelValues, float]]):
+        super().__init__(name, documentation, labelnames)
+        self.callback = callback
+
+    def render(self) -> List[str]:
+        values = sorted(self.callback().items())
+        return self.header() + [f"{self.name}{_format_labels(self.labelnames, k)} {_format_value(v)}" for k, v in values]
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            # Re-registering a name (e.g. a module reloaded) replaces the old series.
+            self._metrics[metric.name] = metric
+        return metric
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return "\n".join(line for metric in metrics for line in metric.render()) + "\n"
+
+
+REGISTRY = Registry()
+
+STAGE_SECONDS = REGISTRY.register(Histogram(
+    "mampd_stage_duration_seconds", "Wall time of each pipeline stage.", ["stage"]))
+TOOL_SECONDS = REGISTRY.register(Histogram(
+    "mampd_tool_duration_seconds", "Wall time of each function_tool invocation.", ["agent", "tool"]))
+TOOL_CALLS = REGISTRY.register(Counter(
+    "mampd_tool_calls_total", "function_tool invocations.", ["agent", "tool"]))
+LLM_SECONDS = REGISTRY.register(Histogram(
+    "mampd_llm_request_duration_seconds", "Latency of each model request.", ["agent"]))
+LLM_TURNS = REGISTRY.register(Counter(
+    "mampd_llm_turns_total", "Model requests (agent turns).", ["agent"]))
+LLM_TOKENS = REGISTRY.register(Counter(
+    "mampd_llm_tokens_total", "Model tokens used.", ["agent", "kind"]))
+EXTRACTED_BYTES = REGISTRY.register(Counter(
+    "mampd_extracted_bytes_total", "Uncompressed bytes written to package stores."))
+EXTRACTED_FILES = REGISTRY.register(Counter(
+    "mampd_extracted_files_total", "Files written to package stores."))
+CLASSIFICATIONS = REGISTRY.register(Counter(
+    "mampd_classifications_total", "Finished classifications.", ["classification", "decided_by"]))
+
+
+_CACHES: Dict[str, Any] = {}
+
+
+def register_cache(name: str, cache: Any) -> None:
+    """Export the `hits` / `misses` counters of *cache* and its hit ratio."""
+    _CACHES[name] = cache
+
+
+def _cache_counts(attr: str) -> Callable[[], Dict[LabelValues, float]]:
+    return lambda: {(name,): getattr(cache, attr) for name, cache in list(_CACHES.items())}
+
+
+def _cache_ratio() -> Dict[LabelValues, float]:
+    return {(name,): cache.hits / (cache.hits + cache.misses) if cache.hits + cache.misses else 0.0
+            for name, cache in list(_CACHES.items())}
+
+
+REGISTRY.register(CallbackGauge("mampd_cache_hits", "Cache hits since start.", ["cache"], _cache_counts("hits")))
+REGISTRY.register(CallbackGauge("mampd_cache_misses", "Cache misses since start.", ["cache"], _cache_counts("misses")))
+REGISTRY.register(CallbackGauge("mampd_cache_hit_ratio", "Cache hit ratio since start.", ["cache"], _cache_ratio))
+
+
+def render_metrics() -> str:
+    return REGISTRY.render()
+
+
+class RunMetrics:
+    """Timings, token usage and tool calls of one classification run."""
+
+    def __init__(self):
+        self.stages: Dict[str, float] = {}
+        self.tools: List[Dict[str, Any]] = []
+        self.tokens: Dict[str, Dict[str, int]] = {}
+        self.turns: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def record_stage(self, stage: str, seconds: float) -> None:
+        with self._lock:
+            self.stages[stage] = round(self.stages.get(stage, 0.0) + seconds, 6)
+
+    def as_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "stages_seconds": dict(self.stages),
+                "tokens": {agent: dict(usage) for agent, usage in self.tokens.items()},
+                "turns": dict(self.turns),
+                "tool_calls": list(self.tools),
+            }
+
+
+@contextmanager
+def stage_timer(stage: str, run_metrics: Optional[RunMetrics] = None) -> Iterator[None]:
+    """Time the enclosed block into the stage histogram (and *run_metrics*)."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        STAGE_SECONDS.observe(elapsed, stage=stage)
+        if run_metrics is not None:
+            run_metrics.record_stage(stage, elapsed)
+
+
+class MetricsHooks(RunHooks[Any]):
+    """Run hooks recording model latency, tokens, turns and tool timings."""
+
+    def __init__(self, run_metrics: Optional[RunMetrics] = None):
+        self.run_metrics = run_metrics
+        self._llm_started: Dict[str, List[float]] = {}
+        self._tool_started: Dict[Tuple[str, str], List[float]] = {}
+
+    async def on_llm_start(self, context: RunContextWrapper[Any], agent: Agent[Any],
+                           system_prompt: Optional[str], input_items: Any) -> None:
+        self._llm_started.setdefault(agent.name, []).append(time.perf_counter())
+
+    async def on_llm_end(self, context: RunContextWrapper[Any], agent: Agent[Any], response: ModelResponse) -> None:
+        started = self._llm_started.get(agent.name)
+        if started:
+            LLM_SECONDS.observe(time.perf_counter() - started.pop(0), agent=agent.name)
+        usage = response.usage
+        LLM_TURNS.inc(agent=agent.name)
+        LLM_TOKENS.inc(usage.input_tokens, agent=agent.name, kind="input")
+        LLM_TOKENS.inc(usage.output_tokens, agent=agent.name, kind="output")
+        if self.run_metrics is not None:
+            with self.run_metrics._lock:
+                tokens = self.run_metrics.tokens.setdefault(agent.name, {"input": 0, "output": 0})
+                tokens["input"] += usage.input_tokens
+                tokens["output"] += usage.output_tokens
+                self.run_metrics.turns[agent.name] = self.run_metrics.turns.get(agent.name, 0) + 1
+
+    async def on_tool_start(self, context: RunContextWrapper[Any], agent: Agent[Any], tool: Tool) -> None:
+        self._tool_started.setdefault((agent.name, tool.name), []).append(time.perf_counter())
+
+    async def on_tool_end(self, context: RunContextWrapper[Any], agent: Agent[Any], tool: Tool, result: str) -> None:
+        started = self._tool_started.get((agent.name, tool.name))
+        # Parallel calls of the same tool are matched first-in first-out.
+        elapsed = time.perf_counter() - started.pop(0) if started else 0.0
+        TOOL_SECONDS.observe(elapsed, agent=agent.name, tool=tool.name)
+        TOOL_CALLS.inc(agent=agent.name, tool=tool.name)
+        if self.run_metrics is not None:
+            with self.run_metrics._lock:
+                self.run_metrics.tools.append({"agent": agent.name, "tool": tool.name, "seconds": round(elapsed, 6)})
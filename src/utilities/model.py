@@ -5,6 +5,7 @@ from typing import Optional
 
 from openai import AsyncOpenAI
 from agents import (
+    Model,
     ModelProvider,
     OpenAIChatCompletionsModel,
     set_tracing_disabled,
@@ -25,11 +26,14 @@ parser.read("config.ini")  # Ensure your config file is loaded
 
 BASE_MODEL_NAME = parser.get("MODEL_CONFIG", "MASMPD_BASE_MODEL", fallback="gpt-4o-mini")
 BASE_API_KEY = os.getenv("MODEL_API_KEY", "")
+_default_model: Optional["MASModel"] = None
+
 class MASModel():
     def __init__(self, 
                  model_name: str = BASE_MODEL_NAME, 
                  api_key: str = BASE_API_KEY,
-                 disable_tracing: bool = False):
+                 disable_tracing: bool = False,
+                 model_url: Optional[str] = None):
 
         if not model_name or not api_key:
             logger.error(
@@ -41,7 +45,7 @@ class MASModel():
 
         self.model_name = model_name
         try:
-            self.model = LitellmModel(model=self.model_name, api_key=api_key)
+            self.model = LitellmModel(model=self.model_name, api_key=api_key, base_url=model_url)
              
                 
         except (BadRequestError, NotFoundError, Timeout) as e:
@@ -49,6 +53,22 @@ class MASModel():
             raise
         set_tracing_disabled(disabled=disable_tracing)
 
+    @classmethod
+    def default(cls) -> "MASModel":
+        """The model configured in config.ini, created on first use and shared."""
+        global _default_model
+        if _default_model is None:
+            _default_model = cls()
+        return _default_model
+
+    @classmethod
+    def from_model(cls, model: Model, model_name: Optional[str] = None) -> "MASModel":
+        """Wrap an already constructed `agents.Model` (no API key needed)."""
+        wrapped = cls.__new__(cls)
+        wrapped.model_name = model_name or type(model).__name__
+        wrapped.model = model
+        return wrapped
+
     def get_model(self):
         """get model"""
         
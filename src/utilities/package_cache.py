@@ -0,0 +1,138 @@
+"""
+Process-wide cache of loaded package stores.
+
+Every agent tool in a classification run works on the same package. A
+`CachedPackage` loads the store once into memory and memoizes decoded file
+contents and file listings; `PackageCache` shares those objects across runs
+and evicts the least recently used ones once a byte budget is exceeded, so
+the API worker's memory stays flat under load.
+"""
+
+from __future__ import annotations
+
+import configparser
+import logging
+import threading
+
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from src.utilities.package_store import PackageStore
+
+logger = logging.getLogger("package cache")
+
+parser = configparser.ConfigParser()
+parser.read("config.ini")
+
+PACKAGE_CACHE_MAX_BYTES = parser.getint("CACHE_CONFIG", "PACKAGE_CACHE_MAX_BYTES", fallback=256 * 1024 * 1024)
+
+
+class CachedPackage:
+    """An in-memory package store with memoized text decoding."""
+
+    def __init__(self, manifest_path: str | Path):
+        self.manifest_path = Path(manifest_path).expanduser().resolve()
+        self.store = PackageStore(self.manifest_path, in_memory=True)
+        self._texts: Dict[str, Optional[str]] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def nbytes(self) -> int:
+        """Approximate resident size: the blob plus the decoded text copies."""
+        return self.store.total_size + sum(len(t) for t in self._texts.values() if t)
+
+    @property
+    def file_names(self) -> List[str]:
+        """Relative paths of every file in the package."""
+        return list(self.store.by_path.keys())
+
+    @property
+    def python_files(self) -> List[Dict[str, Any]]:
+        """Manifest entries (path, size, sha256, ...) of the package's .py files."""
+        return [entry for entry in self.store.files if entry["path"].endswith(".py")]
+
+    def candidates(self, name: str) -> List[str]:
+        return self.store.candidates(name)
+
+    def read_text(self, name: str) -> Optional[str]:
+        """Decoded content of *name*, decoded at most once per package."""
+        with self._lock:
+            if name in self._texts:
+                return self._texts[name]
+        text = self.store.read_text(name)
+        with self._lock:
+            self._texts[name] = text
+        return text
+
+    def metadata_text(self) -> Optional[str]:
+        """
+        Raw PKG-INFO (sdist) or METADATA (wheel) content, if present. An sdist
+        also carries a PKG-INFO under its .egg-info; the shallowest one wins.
+        """
+        for name in ("PKG-INFO", "METADATA"):
+            paths = self.candidates(name)
+            if paths:
+                return self.read_text(min(paths, key=lambda path: (path.count("/"), path)))
+        return None
+
+
+class PackageCache:
+    """Thread-safe LRU of `CachedPackage` objects bounded by total bytes."""
+
+    def __init__(self, max_bytes: int = PACKAGE_CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[Tuple[str, int], CachedPackage]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _key(manifest_path: str | Path) -> Tuple[str, int]:
+        # The mtime guards against a store re-written at the same path.
+        path = Path(manifest_path).expanduser().resolve()
+        return str(path), path.stat().st_mtime_ns
+
+    def get(self, manifest_path: str | Path) -> CachedPackage:
+        """Return the cached package for *manifest_path*, loading it on a miss."""
+        key = self._key(manifest_path)
+        with self._lock:
+            package = self._entries.get(key)
+            if package is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return package
+            self.misses += 1
+
+        # Load outside the lock so concurrent runs on other packages don't wait.
+        package = CachedPackage(manifest_path)
+        if package.nbytes > self.max_bytes:
+            logger.info(f"Package {key[0]} ({package.nbytes} bytes) exceeds the cache budget, not cached")
+            return package
+
+        with self._lock:
+            package = self._entries.setdefault(key, package)
+            self._entries.move_to_end(key)
+            self._evict()
+        return package
+
+    def _evict(self) -> None:
+        total = sum(p.nbytes for p in self._entries.values())
+        while total > self.max_bytes and len(self._entries) > 1:
+            key, evicted = self._entries.popitem(last=False)
+            total -= evicted.nbytes
+            logger.info(f"Evicted package {key[0]} from the package cache")
+
+    def evict(self, manifest_path: str | Path) -> None:
+        """Drop *manifest_path* from the cache, e.g. once its workspace is removed."""
+        path = str(Path(manifest_path).expanduser().resolve())
+        with self._lock:
+            for key in [key for key in self._entries if key[0] == path]:
+                del self._entries[key]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+PACKAGE_CACHE = PackageCache()
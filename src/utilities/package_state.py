@@ -1,6 +1,12 @@
-from pydantic import BaseModel, Field
+import asyncio
+
+from pathlib import Path
+from pydantic import BaseModel, Field, PrivateAttr
 from typing import Any, Optional, Dict, List
 from typing_extensions import Annotated
+from src.utilities.package_cache import PACKAGE_CACHE, CachedPackage
+from src.utilities.schemas import ImportGraph, PackageFile, PrescreenReport, VersionDiff
+from src.utilities.workspace import Workspace
 
 
 class MASState(BaseModel):
@@ -13,22 +19,34 @@ class MASState(BaseModel):
     package_homepage: Optional[str] = None
     package_summary: Optional[str] = None
     package_description: Optional[str] = None
+    requires_dist: List[str] = Field(default_factory=list)
+    project_urls: Dict[str, str] = Field(default_factory=dict)
+    classifiers: List[str] = Field(default_factory=list)
 
     package_formatted_path: Optional[str] = None
+    extraction_truncated: bool = False
+    extraction_warnings: List[str] = Field(default_factory=list)
+    import_graph: Optional[ImportGraph] = None
 
     num_of_files: Optional[int] = None
     num_of_python_files: Optional[int] = None
 
-    available_python_files: List[str] = Field(default_factory=list)
+    available_python_files: List[PackageFile] = Field(default_factory=list)
     package_behaviour: Dict[str, Any] = Field(default_factory=dict)
     suspicious_malicious_files: Dict[str, Any] = Field(default_factory=dict)
     guidelines: Optional[str] = None
+    prescreen: Optional[PrescreenReport] = None
+    version_diff: Optional[VersionDiff] = None
 
     messages: List[str] = Field(default_factory=list)
     package_class: Annotated[List[Any], None] = Field(default_factory=list) 
     classification_explanation: Annotated[List[Any], None] = Field(default_factory=list)
     error: Optional[str] = None
 
+    # Loaded package shared by every tool call of this run; not serialized.
+    _package: Optional[CachedPackage] = PrivateAttr(default=None)
+    _workspace: Optional[Workspace] = PrivateAttr(default=None)
+
     async def add_message(self, update: Any) -> None:
         self.messages.append(str(update))
 
@@ -40,5 +58,27 @@ class MASState(BaseModel):
             raise ValueError("Package formatted path is not set.")
         return self.package_formatted_path
 
+    def set_workspace(self, workspace: Optional[Workspace]) -> None:
+        self._workspace = workspace
+
+    def get_workspace(self) -> Optional[Workspace]:
+        """The run's scratch workspace the package is extracted into, if any."""
+        return self._workspace
 
+    def require_workspace(self) -> Workspace:
+        """The run's workspace; extraction has nowhere to go (and nothing to clean it up) outside a run."""
+        if self._workspace is None:
+            raise ValueError("No workspace set: packages are only extracted within a classification run.")
+        return self._workspace
+
+    def get_package(self) -> CachedPackage:
+        """Return the run's loaded package, loading it through the shared cache once."""
+        if self.package_formatted_path is None:
+            raise ValueError("Package formatted path is not set.")
+        if self._package is None or str(self._package.manifest_path) != str(Path(self.package_formatted_path).expanduser().resolve()):
+            self._package = PACKAGE_CACHE.get(self.package_formatted_path)
+        return self._package
 
+    async def load_package(self) -> CachedPackage:
+        """`get_package` off the event loop: the first call of a run reads the whole store."""
+        return await asyncio.to_thread(self.get_package)
@@ -0,0 +1,293 @@
+"""
+Indexed, random-access on-disk representation of an extracted package.
+
+A package store is two files that live side by side:
+
+    <base>.manifest.json   small JSON index, one entry per file
+    <base>.blob            the raw bytes of every file, concatenated
+
+Each manifest entry records the file's relative path, size, sha256,
+kind (text or binary, sniffed from its first bytes), content type and byte
+offset into the blob, so a single file can be served by slicing a memory
+map of the blob without parsing anything else. Binaries are kept as
+references only (size, sha256, entropy; offset None) unless the writer is
+asked to keep them, and text is decoded on first read.
+Files are keyed by their full relative path; a secondary basename index
+resolves short names ("setup.py") only when they are unambiguous.
+
+Every write gets a uniquely named blob and the manifest is replaced
+atomically as the last step, so concurrent writers of the same store never
+leave a reader with a manifest that does not match its blob.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import mmap
+import os
+import time
+import uuid
+
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+from src.utilities.content_type import BINARY, TEXT, byte_entropy, decode_text, describe_binary, sniff
+
+FORMAT_VERSION = 2
+MANIFEST_SUFFIX = ".manifest.json"
+BLOB_SUFFIX = ".blob"
+
+
+def _store_paths(dst: str | Path) -> tuple[Path, Path]:
+    """Return (manifest, blob) paths for a store rooted at *dst*."""
+    dst = Path(dst).expanduser()
+    name = dst.name
+    for suffix in (MANIFEST_SUFFIX, BLOB_SUFFIX, ".json"):
+        if name.endswith(suffix):
+            name = name[: -len(suffix)]
+            break
+    return dst.with_name(name + MANIFEST_SUFFIX), dst.with_name(name + BLOB_SUFFIX)
+
+
+def json_record(entry: Dict[str, Any], text: Optional[str]) -> Dict[str, Any]:
+    """
+    One file of the legacy JSON layout: `{file_path, content}` for text,
+    `{file_path, binary: {content_type, size, sha256, entropy}}` for binaries.
+    """
+    if entry["kind"] == BINARY:
+        return {"file_path": entry["path"],
+                "binary": {key: entry.get(key) for key in ("content_type", "size", "sha256", "entropy")}}
+    return {"file_path": entry["path"], "content": text}
+
+
+def index_file(rel_path: str, data: bytes) -> Dict[str, Any]:
+    """
+    Manifest entry of *data* without its blob offset: sniffing, hashing and
+    (for binaries) entropy. Thread-safe, so ingestion can run it in a pool.
+    """
+    path = Path(rel_path).as_posix()
+    kind, content_type = sniff(path, data)
+    entry = {
+        "path"        : path,
+        "size"        : len(data),
+        "sha256"      : hashlib.sha256(data).hexdigest(),
+        "kind"        : kind,
+        "content_type": content_type,
+        "offset"      : None,
+    }
+    if kind == BINARY:
+        entry["entropy"] = byte_entropy(data)
+    return entry
+
+
+class PackageStoreWriter:
+    """
+    Append files to a new package store.
+
+    Usage:
+        with PackageStoreWriter(dst) as writer:
+            writer.add_file("pkg/__init__.py", data)
+        manifest_path = writer.manifest_path
+    """
+
+    def __init__(self, dst: str | Path, source: Optional[str] = None, keep_binary: bool = False):
+        self.manifest_path, blob_path = _store_paths(dst)
+        self.blob_path = blob_path.with_name(f"{blob_path.stem}.{uuid.uuid4().hex[:12]}{BLOB_SUFFIX}")
+        self.manifest_path.parent.mkdir(parents=True, exist_ok=True)
+        self.source = source
+        self.keep_binary = keep_binary
+        self.files: List[Dict[str, Any]] = []
+        # Members left out during extraction, and whether limits cut it short.
+        self.skipped: List[Dict[str, str]] = []
+        self.truncated = False
+        self.truncation_reason: Optional[str] = None
+        self._offset = 0
+        self._bytes_in = 0
+        self._started = time.perf_counter()
+        self._blob = open(self.blob_path, "wb")
+        self.ingest: Dict[str, Any] = {}
+
+    def add_file(self, rel_path: str, data: bytes, entry: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        Index *data* under *rel_path*, appending it to the blob unless it is a
+        binary not kept. *entry* is its `index_file` result when already computed.
+        """
+        entry = dict(entry) if entry is not None else index_file(rel_path, data)
+        self._bytes_in += len(data)
+        if entry["kind"] == TEXT or self.keep_binary:
+            entry["offset"] = self._offset
+            self._blob.write(data)
+            self._offset += len(data)
+        self.files.append(entry)
+        return entry
+
+    def skip(self, rel_path: str, reason: str) -> None:
+        """Record a member that was deliberately not stored."""
+        self.skipped.append({"path": rel_path, "reason": reason})
+
+    def truncate(self, reason: str) -> None:
+        """Mark the store as incomplete: a limit stopped ingestion early."""
+        self.truncated = True
+        self.truncation_reason = reason
+
+    def close(self) -> Path:
+        """Flush the blob and write the manifest. Returns the manifest path."""
+        if self._blob.closed:
+            return self.manifest_path
+        self._blob.close()
+        seconds = time.perf_counter() - self._started
+        # Bytes read from the source and the wall time from opening the writer to closing it.
+        self.ingest = {"files": len(self.files), "bytes": self._bytes_in, "seconds": round(seconds, 6),
+                       "mb_per_second": round(self._bytes_in / 1e6 / seconds, 3) if seconds > 0 else 0.0}
+        manifest = {
+            "format_version": FORMAT_VERSION,
+            "source"        : self.source,
+            "blob"          : self.blob_path.name,
+            "total_size"    : self._offset,
+            "truncated"     : self.truncated,
+            "truncation_reason": self.truncation_reason,
+            "skipped"       : self.skipped,
+            "ingest"        : self.ingest,
+            "files"         : self.files,
+        }
+        previous_blob = None
+        try:
+            previous_blob = json.loads(self.manifest_path.read_text(encoding="utf-8")).get("blob")
+        except (OSError, ValueError):
+            pass
+        tmp_manifest = self.manifest_path.with_name(f"{self.manifest_path.name}.{uuid.uuid4().hex[:12]}.tmp")
+        tmp_manifest.write_text(json.dumps(manifest, ensure_ascii=False), encoding="utf-8")
+        os.replace(tmp_manifest, self.manifest_path)
+        if previous_blob and previous_blob != self.blob_path.name:
+            # Readers already holding the old blob keep it alive until they close it.
+            self.manifest_path.with_name(previous_blob).unlink(missing_ok=True)
+        return self.manifest_path
+
+    def __enter__(self) -> "PackageStoreWriter":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+
+class PackageStore:
+    """
+    Read-only view over a package store.
+
+    Only the manifest is parsed on open; file contents are sliced out of a
+    memory map of the blob on demand. With `in_memory=True` the blob is read
+    once into a bytes buffer instead and no file handle is kept open.
+    """
+
+    def __init__(self, manifest_path: str | Path, in_memory: bool = False):
+        self.manifest_path = Path(manifest_path).expanduser()
+        if not self.manifest_path.is_file():
+            raise FileNotFoundError(f"Package manifest does not exist: {self.manifest_path}")
+
+        for attempt in range(2):
+            self.manifest: Dict[str, Any] = json.loads(self.manifest_path.read_text(encoding="utf-8"))
+            self.blob_path = self.manifest_path.with_name(self.manifest["blob"])
+            # The store was re-written between reading the manifest and opening its blob.
+            if self.blob_path.is_file() or attempt:
+                break
+        self.files: List[Dict[str, Any]] = self.manifest.get("files", [])
+        if self.manifest.get("format_version", 1) < 2:
+            # Version 1 stored every file and only told UTF-8 text from the rest.
+            for entry in self.files:
+                entry.setdefault("kind", TEXT if entry.get("encoding") == "utf-8" else BINARY)
+
+        # Primary index by relative path; basename -> entries for short-name lookups.
+        self.by_path: Dict[str, Dict[str, Any]] = {}
+        self.by_name: Dict[str, List[Dict[str, Any]]] = {}
+        for entry in self.files:
+            self.by_path[entry["path"]] = entry
+            self.by_name.setdefault(entry["path"].rsplit("/", 1)[-1], []).append(entry)
+
+        self.total_size: int = self.manifest.get("total_size", 0)
+        self.ingest: Dict[str, Any] = self.manifest.get("ingest", {})
+        self._mm: Optional[mmap.mmap | bytes] = None
+        if in_memory:
+            self._fh = None
+            self._mm = self.blob_path.read_bytes()
+        else:
+            self._fh = open(self.blob_path, "rb")
+            # mmap refuses zero-length files; an empty package has nothing to map.
+            if self.total_size > 0:
+                self._mm = mmap.mmap(self._fh.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def candidates(self, name: str) -> List[str]:
+        """
+        Paths *name* may refer to: the exact relative path, else every file
+        whose path ends with it ("pkg/__init__.py", "__init__.py").
+        """
+        name = name.replace("\\", "/").strip()
+        while name.startswith("./"):
+            name = name[2:]
+        if name in self.by_path:
+            return [name]
+        basename = name.rsplit("/", 1)[-1]
+        return [entry["path"] for entry in self.by_name.get(basename, [])
+                if entry["path"] == name or entry["path"].endswith("/" + name)]
+
+    def entry(self, name: str) -> Optional[Dict[str, Any]]:
+        """Look up a file by relative path, or by a path suffix / basename matching exactly one file."""
+        entry = self.by_path.get(name)
+        if entry is not None:
+            return entry
+        matches = self.candidates(name)
+        # An ambiguous short name must not silently pick one of the files.
+        return self.by_path[matches[0]] if len(matches) == 1 else None
+
+    def read_bytes(self, name: str) -> Optional[bytes]:
+        """Raw bytes of *name*, or None if the file is not in the package or its content was not kept."""
+        entry = self.entry(name)
+        if entry is None or entry["offset"] is None:
+            return None
+        if self._mm is None or entry["size"] == 0:
+            return b""
+        start = entry["offset"]
+        return self._mm[start:start + entry["size"]]
+
+    def read_text(self, name: str) -> Optional[str]:
+        """
+        Content of *name* as the agents expect it: decoded text for text
+        files, a one-line reference (type, size, hash, entropy) for
+        binaries. None if the file is not in the package.
+        """
+        entry = self.entry(name)
+        if entry is None:
+            return None
+        if entry["kind"] == BINARY:
+            return describe_binary(entry)
+        text, entry["charset"] = decode_text(self.read_bytes(name) or b"")
+        return text
+
+    def iter_files(self) -> Iterator[Dict[str, Any]]:
+        return iter(self.files)
+
+    def to_json(self, dst: str | Path) -> Path:
+        """Export the store in the legacy `<relative path>: {file_path, content}` JSON layout."""
+        dst = Path(dst).expanduser()
+        if dst.suffix.lower() != ".json":
+            dst = dst.with_suffix(".json")
+        data = {
+            entry["path"]: json_record(entry, self.read_text(entry["path"]) if entry["kind"] == TEXT else None)
+            for entry in self.files
+        }
+        dst.parent.mkdir(parents=True, exist_ok=True)
+        dst.write_text(json.dumps(data, ensure_ascii=False, indent=4), encoding="utf-8")
+        return dst
+
+    def close(self) -> None:
+        if isinstance(self._mm, mmap.mmap):
+            self._mm.close()
+            self._mm = None
+        if self._fh is not None and not self._fh.closed:
+            self._fh.close()
+
+    def __enter__(self) -> "PackageStore":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
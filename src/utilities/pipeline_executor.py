@@ -0,0 +1,87 @@
+"""
+Shared executor for the stages of concurrent classification runs.
+
+CPU-bound stages (archive extraction, hashing, AST analysis) are submitted
+to a process pool so they run in parallel and never hold the event loop's
+GIL; LLM stages stay on the event loop. Every stage has its own concurrency
+limit, so e.g. a burst of large archives cannot starve the model calls of
+packages that are already extracted, and the number of in-flight model
+requests is bounded independently of the number of queued packages.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import configparser
+import logging
+import multiprocessing
+import os
+
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Callable, Dict, Optional, TypeVar
+
+logger = logging.getLogger("pipeline executor")
+
+parser = configparser.ConfigParser()
+parser.read("config.ini")
+
+# 0 runs the CPU stages in threads instead of worker processes.
+CPU_WORKERS = parser.getint("PIPELINE_CONFIG", "CPU_WORKERS", fallback=os.cpu_count() or 1)
+STAGE_CONCURRENCY: Dict[str, int] = {
+    "ingest": parser.getint("PIPELINE_CONFIG", "INGEST_CONCURRENCY", fallback=max(CPU_WORKERS, 1)),
+    "analysis": parser.getint("PIPELINE_CONFIG", "ANALYSIS_CONCURRENCY", fallback=max(CPU_WORKERS, 1)),
+    "hash": parser.getint("PIPELINE_CONFIG", "HASH_CONCURRENCY", fallback=max(CPU_WORKERS, 1)),
+    "llm": parser.getint("PIPELINE_CONFIG", "LLM_CONCURRENCY", fallback=8),
+}
+
+T = TypeVar("T")
+
+
+class PipelineExecutor:
+    """Process pool for CPU stages plus one semaphore per stage."""
+
+    def __init__(self, cpu_workers: int = CPU_WORKERS, stage_concurrency: Optional[Dict[str, int]] = None):
+        self.cpu_workers = cpu_workers
+        self.stage_concurrency = {**STAGE_CONCURRENCY, **(stage_concurrency or {})}
+        self._pool: Optional[ProcessPoolExecutor] = None
+        # Semaphores bind to the loop they are first used on, so create them lazily per loop.
+        self._semaphores: Dict[tuple, asyncio.Semaphore] = {}
+
+    @property
+    def pool(self) -> Optional[ProcessPoolExecutor]:
+        if self._pool is None and self.cpu_workers > 0:
+            # spawn: forking a process that already runs an event loop and threads is unsafe.
+            self._pool = ProcessPoolExecutor(max_workers=self.cpu_workers,
+                                             mp_context=multiprocessing.get_context("spawn"))
+            logger.info(f"Started process pool with {self.cpu_workers} workers")
+        return self._pool
+
+    def _semaphore(self, stage: str) -> asyncio.Semaphore:
+        key = (stage, id(asyncio.get_running_loop()))
+        semaphore = self._semaphores.get(key)
+        if semaphore is None:
+            semaphore = self._semaphores[key] = asyncio.Semaphore(max(self.stage_concurrency.get(stage, 1), 1))
+        return semaphore
+
+    @asynccontextmanager
+    async def limit(self, stage: str) -> AsyncIterator[None]:
+        """Hold one of the concurrency slots of *stage* (used around LLM calls)."""
+        async with self._semaphore(stage):
+            yield
+
+    async def run_cpu(self, stage: str, fn: Callable[..., T], *args: Any) -> T:
+        """
+        Run the picklable top-level function *fn* in the process pool (or a
+        thread when the pool is disabled) under the limit of *stage*.
+        """
+        async with self.limit(stage):
+            pool = self.pool
+            if pool is None:
+                return await asyncio.to_thread(fn, *args)
+            return await asyncio.get_running_loop().run_in_executor(pool, fn, *args)
+
+    def shutdown(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=True, cancel_futures=True)
+            self._pool = None
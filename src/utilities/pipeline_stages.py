@@ -0,0 +1,252 @@
+"""
+Deterministic (non-LLM) stages of the classification pipeline.
+
+These stages fill `MASState` directly for the steps whose outcome does not
+need a model decision. The equivalent LLM agents remain available as
+opt-in modes in `classify_package`.
+
+CPU-bound work is submitted through a `PipelineExecutor` when one is given
+(worker processes); without one it runs in a thread. Functions executed in
+worker processes take and return only picklable values.
+"""
+
+import asyncio
+import logging
+
+from typing import Any, Callable, Dict, Optional, Tuple, TypeVar
+
+from src.utilities.archive_index import ArchiveIndex, is_indexable, read_archive_index
+from src.utilities.core_metadata import parse_core_metadata
+from src.utilities.extract_package import format_package
+from src.utilities.import_graph import build_import_graph
+from src.utilities.package_cache import CachedPackage
+from src.utilities.package_state import MASState
+from src.utilities.pipeline_executor import PipelineExecutor
+from src.utilities.prescreen import prescreen_package
+from src.utilities.schemas import (ClassificationAgentOutput, ImportGraph, MetadataAgentOutput,
+                                   PackageFile, PrescreenReport, RootAgentOutput, VersionDiff)
+from src.utilities.version_history import VersionHistory, file_hashes
+
+logger = logging.getLogger("pipeline stages")
+
+T = TypeVar("T")
+
+
+async def _run_cpu(executor: Optional[PipelineExecutor], stage: str, fn: Callable[..., T], *args: Any) -> T:
+    # Blocking work never runs on the event loop itself.
+    if executor is None:
+        return await asyncio.to_thread(fn, *args)
+    return await executor.run_cpu(stage, fn, *args)
+
+
+async def ingest_package(state: MASState, executor: Optional[PipelineExecutor] = None) -> RootAgentOutput:
+    """
+    Extract and index the package at `state.package_location` without an
+    LLM round-trip; archive vs folder is decided from the path itself.
+    """
+    logger.info(f"Ingesting package location: {state.package_location}")
+    workspace = state.require_workspace()
+    package_formatted_path = await _run_cpu(executor, "ingest", format_package, state.package_location,
+                                            str(workspace.root), workspace.max_bytes)
+
+    state.package_formatted_path = str(package_formatted_path)
+    apply_extraction_report(state, await state.load_package())
+    state.messages.append("Archive extraction and Formatting completed")
+    return RootAgentOutput(package_formatted_path=str(package_formatted_path))
+
+
+def analyse_store(manifest_path: str, truncated: bool,
+                  with_prescreen: bool) -> Tuple[ImportGraph, Optional[PrescreenReport]]:
+    """Import graph and (optionally) static pre-screen of one package store, parsed once."""
+    # A private load rather than PACKAGE_CACHE: pool workers must not pin packages in memory.
+    package = CachedPackage(manifest_path)
+    try:
+        graph = build_import_graph(package)
+        report = prescreen_package(package, truncated) if with_prescreen else None
+    finally:
+        package.store.close()
+    return graph, report
+
+
+async def analyse_package(state: MASState, with_prescreen: bool,
+                          executor: Optional[PipelineExecutor] = None) -> Optional[PrescreenReport]:
+    """Fill `state.import_graph` and `state.prescreen` from the ingested package."""
+    graph, report = await _run_cpu(executor, "analysis", analyse_store,
+                                   str((await state.load_package()).manifest_path), state.extraction_truncated,
+                                   with_prescreen)
+    state.import_graph = graph
+    if report is not None:
+        state.prescreen = report
+        state.messages.append(f"Static pre-screen completed: risk score {report.risk_score}, decision {report.decision}")
+    return report
+
+
+def apply_extraction_report(state: MASState, package: CachedPackage) -> None:
+    """Surface the extraction limits report recorded in the package manifest."""
+    manifest = package.store.manifest
+    state.extraction_truncated = bool(manifest.get("truncated", False))
+    warnings = [f"{item['path']}: {item['reason']}" for item in manifest.get("skipped", [])]
+    if state.extraction_truncated:
+        warnings.insert(0, f"Extraction truncated: {manifest.get('truncation_reason')}")
+    state.extraction_warnings = warnings
+
+
+def apply_core_metadata(state: MASState, fields: Dict[str, Any]) -> None:
+    """Copy parsed core metadata fields onto *state*, 'NA' for missing ones."""
+    project_urls = fields.get("project-urls", {})
+    homepage = fields.get("home-page") or next(
+        (url for label, url in project_urls.items() if label.lower() in {"homepage", "home", "home-page"}), "NA"
+    )
+    state.package_name = fields.get("name", "NA")
+    state.package_version = fields.get("version", "NA")
+    state.author_name = fields.get("author", "NA")
+    state.author_email = fields.get("author-email", "NA")
+    state.package_homepage = homepage
+    state.metadata_version = fields.get("metadata-version", "NA")
+    state.package_summary = fields.get("summary", "NA")
+    state.package_description = fields.get("description", "NA")
+    state.requires_dist = fields.get("requires-dist", [])
+    state.project_urls = project_urls
+    state.classifiers = fields.get("classifier", [])
+
+
+def apply_file_info(state: MASState, package: CachedPackage) -> None:
+    """Fill the file counts and the Python file listing (paths, sizes, hashes) of *state*."""
+    python_files = package.python_files
+    state.num_of_files = len(package.file_names)
+    state.num_of_python_files = len(python_files)
+    state.available_python_files = [PackageFile(path=entry["path"], size=entry["size"], sha256=entry["sha256"])
+                                    for entry in python_files]
+
+
+def apply_index_file_info(state: MASState, index: ArchiveIndex) -> None:
+    """File counts and Python file listing from an archive index (no hashes until the package is ingested)."""
+    python_files = index.python_files
+    state.num_of_files = len(index.files)
+    state.num_of_python_files = len(python_files)
+    state.available_python_files = [PackageFile(path=entry["path"], size=entry["size"]) for entry in python_files]
+
+
+def _apply_metadata_text(state: MASState, pkg_info: Optional[str]) -> None:
+    if pkg_info:
+        apply_core_metadata(state, parse_core_metadata(pkg_info))
+        state.messages.append("Package extraction completed successfully")
+    else:
+        apply_core_metadata(state, {})
+        state.error = "metadata details of the package is not found"
+        logger.info(f"No PKG-INFO/METADATA found in {state.package_formatted_path or state.package_location}")
+
+
+def _metadata_output(state: MASState) -> MetadataAgentOutput:
+    return MetadataAgentOutput(
+        package_name=state.package_name,
+        package_version=state.package_version,
+        metadata_version=state.metadata_version,
+        author_name=state.author_name,
+        author_email=state.author_email,
+        package_homepage=state.package_homepage,
+        package_summary=state.package_summary,
+        package_description=state.package_description,
+        num_of_files=state.num_of_files,
+        num_of_python_files=state.num_of_python_files,
+        available_python_files=[f.path for f in state.available_python_files],
+    )
+
+
+async def extract_metadata(state: MASState) -> MetadataAgentOutput:
+    """
+    Fill the package metadata and file information of *state* straight
+    from the package store, without an LLM round-trip.
+    """
+    package = await state.load_package()
+    _apply_metadata_text(state, package.metadata_text())
+    apply_file_info(state, package)
+    state.messages.append("Information about files in the package extracted")
+    logger.info(f"Metadata extraction completed for {state.package_name}")
+    return _metadata_output(state)
+
+
+async def index_metadata(state: MASState, central_directory_only: bool = True) -> Optional[MetadataAgentOutput]:
+    """
+    Fill the package metadata and file listing of *state* from the archive
+    index of `state.package_location`, before the package is ingested.
+    None when the location is not an indexable archive. By default only zip
+    and wheel files qualify: indexing a tarball decompresses it, and the
+    ingestion that follows would decompress it a second time.
+    """
+    if not is_indexable(state.package_location, central_directory_only):
+        return None
+    try:
+        # Header reads only: a thread is cheaper than a trip through the process pool.
+        index = await asyncio.to_thread(read_archive_index, state.package_location)
+    except Exception as e:
+        # Full ingestion reports broken archives properly; the index is only a shortcut.
+        logger.info(f"Archive index of {state.package_location} unavailable: {e}")
+        return None
+    _apply_metadata_text(state, index.metadata_text)
+    apply_index_file_info(state, index)
+    state.messages.append("Information about files in the package read from the archive index")
+    logger.info(f"Metadata read from the archive index for {state.package_name}")
+    return _metadata_output(state)
+
+
+def prescreen_verdict(state: MASState, report: PrescreenReport) -> ClassificationAgentOutput:
+    """Classification for a package the pre-screen policy decided on by itself."""
+    if report.findings:
+        evidence = "; ".join(f"{f.file}:{f.line} {f.detail}" for f in report.findings[:10])
+    else:
+        evidence = f"no static risk indicators in {report.files_scanned} Python files"
+    justification = f"Static pre-screen (risk score {report.risk_score}/100): {evidence}."
+    state.package_class.append(report.decision)
+    state.classification_explanation.append(justification)
+    return ClassificationAgentOutput(
+        classification=report.decision,
+        justification=justification,
+        suspicious_files=sorted({f.file for f in report.findings}),
+    )
+
+
+def _has_version(state: MASState) -> bool:
+    return bool(state.package_name and state.package_version and "NA" not in (state.package_name, state.package_version))
+
+
+async def compare_with_prior(state: MASState, history: VersionHistory) -> Optional[VersionDiff]:
+    """Fill `state.version_diff` against the nearest previously classified version, if any."""
+    if not _has_version(state):
+        logger.info("No package name/version: incremental scan falls back to a full scan")
+        return None
+    package = await state.load_package()
+    diff = await asyncio.to_thread(history.compare, state.package_name, state.package_version,
+                                   package.store.files, package.read_text)
+    if diff is None:
+        logger.info(f"No earlier version of {state.package_name} classified: full scan")
+        return None
+    state.version_diff = diff
+    state.messages.append(f"Compared with {diff.prior_version}: {len(diff.added)} added, "
+                          f"{len(diff.changed)} changed, {len(diff.removed)} removed files")
+    return diff
+
+
+def version_diff_verdict(state: MASState, diff: VersionDiff) -> ClassificationAgentOutput:
+    """Classification of a version with no added or changed files: the prior version's verdict."""
+    justification = (f"No files added or changed since {diff.prior_version} ({len(diff.removed)} removed), "
+                     f"which was classified {diff.prior_classification}: {diff.prior_justification}")
+    state.package_class.append(diff.prior_classification)
+    state.classification_explanation.append(justification)
+    return ClassificationAgentOutput(
+        classification=diff.prior_classification,
+        justification=justification,
+        suspicious_files=list(diff.prior_suspicious_files),
+    )
+
+
+async def record_version(state: MASState, history: VersionHistory, output: ClassificationAgentOutput) -> None:
+    """Remember this version's file hashes and verdict for later incremental scans."""
+    if not _has_version(state) or state.extraction_truncated:
+        # A truncated store does not hold every file, its hashes would hide later changes.
+        return
+    package = await state.load_package()
+    files = await asyncio.to_thread(file_hashes, package.store.files, package.read_text)
+    await asyncio.to_thread(history.record, state.package_name, state.package_version,
+                            output.classification.value, output.justification, list(output.suspicious_files),
+                            files)
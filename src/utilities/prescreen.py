@@ -0,0 +1,311 @@
+"""
+Deterministic static pre-screen of a package before any LLM call.
+
+Every Python file of the package is parsed once and checked for a small set
+of high-signal indicators (encoded payloads passed to exec/eval, network or
+process calls at install/import time, install hooks, obfuscated blobs).
+Each indicator has a weight and counts once per package; the summed risk
+score is then mapped by a configurable policy to an automatic verdict or
+an escalation to the classification agent. Only strong indicators can
+make a package malicious on their own: weak ones (import-time network or
+process calls, install hooks, blobs) merely escalate, however many there
+are.
+"""
+
+from __future__ import annotations
+
+import ast
+import configparser
+import logging
+import math
+import re
+
+from collections import Counter
+from pathlib import PurePosixPath
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from src.utilities.content_type import TEXT
+from src.utilities.package_cache import CachedPackage
+from src.utilities.schemas import PrescreenFinding, PrescreenReport
+
+logger = logging.getLogger("prescreen")
+
+parser = configparser.ConfigParser()
+parser.read("config.ini")
+
+PRESCREEN_ENABLED = parser.getboolean("PRESCREEN_CONFIG", "ENABLED", fallback=True)
+# score >= AUTO_MALICIOUS_SCORE: classified malicious without the LLM.
+AUTO_MALICIOUS_SCORE = parser.getint("PRESCREEN_CONFIG", "AUTO_MALICIOUS_SCORE", fallback=80)
+# score <= AUTO_BENIGN_SCORE: classified benign without the LLM (-1, the default, disables).
+AUTO_BENIGN_SCORE = parser.getint("PRESCREEN_CONFIG", "AUTO_BENIGN_SCORE", fallback=-1)
+# Escalated packages get the findings appended to the classifier input.
+ATTACH_FINDINGS = parser.getboolean("PRESCREEN_CONFIG", "ATTACH_FINDINGS", fallback=True)
+MAX_FILE_BYTES = parser.getint("PRESCREEN_CONFIG", "MAX_FILE_BYTES", fallback=1024 * 1024)
+
+INDICATOR_WEIGHTS: Dict[str, int] = {
+    "exec_encoded_payload": 80,
+    "setup_network_call": 40,
+    "import_time_process": 30,
+    "import_time_network": 25,
+    "install_hook": 20,
+    "obfuscated_blob": 15,
+    "dynamic_exec": 10,
+}
+
+# A package scoring AUTO_MALICIOUS_SCORE is only auto-classified malicious with one of these.
+STRONG_INDICATORS = {"exec_encoded_payload", "setup_network_call"}
+
+_HTTP_VERBS = ("get", "post", "put", "patch", "delete", "head", "options", "request", "stream")
+# Calls that open a connection or send a request; module helpers such as urllib.parse.urljoin are not.
+NETWORK_CALLS = (
+    {f"{module}.{verb}" for module in ("requests", "httpx", "aiohttp") for verb in _HTTP_VERBS}
+    | {"socket.socket", "socket.create_connection", "socket.socketpair",
+       "urllib.request.urlopen", "urllib.request.urlretrieve", "urllib.urlopen", "urllib.urlretrieve",
+       "urllib2.urlopen", "urllib3.request", "urllib3.PoolManager",
+       "http.client.HTTPConnection", "http.client.HTTPSConnection", "httplib.HTTPConnection",
+       "httplib.HTTPSConnection", "ftplib.FTP", "ftplib.FTP_TLS", "smtplib.SMTP", "smtplib.SMTP_SSL",
+       "telnetlib.Telnet", "pycurl.Curl"}
+)
+PROCESS_CALLS = {"os.system", "os.popen", "os.spawnl", "os.spawnv", "os.execv", "os.execl", "os.startfile",
+                 "subprocess.Popen", "subprocess.run", "subprocess.call", "subprocess.check_call",
+                 "subprocess.check_output", "subprocess.getoutput", "commands.getoutput", "pty.spawn"}
+# Matched on the last name component: these names only ever decode or decompress.
+DECODE_LEAVES = {"b64decode", "b32decode", "b16decode", "a85decode", "b85decode", "decodebytes",
+                 "decompress", "unhexlify", "fromhex"}
+# Matched in full: plain str/bytes .decode() and json.loads are too common in legitimate code.
+DECODE_CALLS = {"codecs.decode", "pickle.loads", "marshal.loads", "dill.loads", "cloudpickle.loads"}
+IMPORT_CALLS = {"__import__", "builtins.__import__", "importlib.import_module", "importlib.__import__"}
+# The builtins only, as bare names or through builtins: model.eval() is not exec.
+EXEC_CALLS = {"exec", "eval", "compile", "builtins.exec", "builtins.eval", "__builtins__.exec"}
+INSTALL_COMMANDS = {"install", "develop", "egg_info", "build_py", "sdist", "bdist_egg", "build_ext"}
+
+SOURCE_SUFFIXES = {".py", ".pyw"}
+# Executed by the interpreter (.pth import lines at startup, bytecode) but not parsed here.
+UNSCANNED_SUFFIXES = {".pth", ".pyc", ".pyo"}
+
+_ENCODED_EXEC_FALLBACK = re.compile(r"\b(?:exec|eval)\s*\(\s*[\w.]*(?:b64decode|decompress|unhexlify|fromhex|loads)\s*\(")
+_BLOB_RE = re.compile(r"^[A-Za-z0-9+/=\s]+$|^[0-9a-fA-F\s]+$")
+
+
+def shannon_entropy(data: str | bytes) -> float:
+    """Shannon entropy in bits per symbol."""
+    if not data:
+        return 0.0
+    counts = Counter(data)
+    total = len(data)
+    return -sum(c / total * math.log2(c / total) for c in counts.values())
+
+
+class _IndicatorVisitor(ast.NodeVisitor):
+    """Collects indicators from one module, tracking function nesting and import aliases."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.is_setup = PurePosixPath(path).name == "setup.py"
+        self.findings: List[PrescreenFinding] = []
+        self.aliases: Dict[str, str] = {}
+        self.depth = 0  # > 0 inside a function body, i.e. not run at import time
+        self.has_cmdclass = False
+        self.hook_classes: List[ast.ClassDef] = []
+
+    def _add(self, indicator: str, node: ast.AST, detail: str) -> None:
+        self.findings.append(PrescreenFinding(
+            indicator=indicator, file=self.path, line=getattr(node, "lineno", 0),
+            detail=detail, weight=INDICATOR_WEIGHTS[indicator],
+        ))
+
+    def _resolve(self, node: ast.AST) -> Optional[str]:
+        """'a.b.c' for Name/Attribute chains (aliases and literal dynamic imports resolved), else None."""
+        parts = []
+        while isinstance(node, ast.Attribute):
+            parts.append(node.attr)
+            node = node.value
+        if isinstance(node, ast.Name):
+            head = self.aliases.get(node.id, node.id)
+        else:
+            head = self._imported_module(node)
+            if head is None:
+                return None
+        return ".".join([head, *reversed(parts)])
+
+    def _imported_module(self, node: ast.AST) -> Optional[str]:
+        """'os' for __import__('os') or importlib.import_module('os'), None for anything else."""
+        if not (isinstance(node, ast.Call) and node.args and isinstance(node.args[0], ast.Constant)
+                and isinstance(node.args[0].value, str)):
+            return None
+        return node.args[0].value if self._resolve(node.func) in IMPORT_CALLS else None
+
+    def _is_decode_call(self, node: ast.Call) -> bool:
+        name = self._resolve(node.func) or ""
+        return name in DECODE_CALLS or name.rsplit(".", 1)[-1] in DECODE_LEAVES
+
+    # --- imports --------------------------------------------------------------
+
+    def visit_Import(self, node: ast.Import) -> None:
+        for alias in node.names:
+            if alias.asname:
+                self.aliases[alias.asname] = alias.name
+            else:
+                top = alias.name.split(".")[0]
+                self.aliases[top] = top
+
+    def visit_ImportFrom(self, node: ast.ImportFrom) -> None:
+        for alias in node.names:
+            if node.module:
+                self.aliases[alias.asname or alias.name] = f"{node.module}.{alias.name}"
+
+    # --- scopes ---------------------------------------------------------------
+
+    def _visit_function(self, node: ast.AST) -> None:
+        self.depth += 1
+        self.generic_visit(node)
+        self.depth -= 1
+
+    visit_FunctionDef = _visit_function
+    visit_AsyncFunctionDef = _visit_function
+    visit_Lambda = _visit_function
+
+    def visit_ClassDef(self, node: ast.ClassDef) -> None:
+        if self.is_setup:
+            bases = {(self._resolve(b) or "").rsplit(".", 1)[-1] for b in node.bases}
+            if bases & INSTALL_COMMANDS:
+                self.hook_classes.append(node)
+        self.generic_visit(node)
+
+    # --- calls and literals -------------------------------------------------------
+
+    def visit_keyword(self, node: ast.keyword) -> None:
+        if node.arg == "cmdclass":
+            self.has_cmdclass = True
+        self.generic_visit(node)
+
+    def visit_Call(self, node: ast.Call) -> None:
+        name = self._resolve(node.func) or ""
+        leaf = name.rsplit(".", 1)[-1]
+
+        if name in EXEC_CALLS:
+            decoded = any(
+                isinstance(inner, ast.Call) and self._is_decode_call(inner)
+                for arg in node.args for inner in ast.walk(arg)
+            )
+            if decoded:
+                self._add("exec_encoded_payload", node, f"{leaf}() of a decoded/decompressed payload")
+            elif self.depth == 0:
+                self._add("dynamic_exec", node, f"{leaf}() at import time")
+
+        elif name in NETWORK_CALLS:
+            if self.is_setup:
+                self._add("setup_network_call", node, f"{name}() in setup.py")
+            elif self.depth == 0:
+                self._add("import_time_network", node, f"{name}() at import time")
+
+        elif name in PROCESS_CALLS and (self.depth == 0 or self.is_setup):
+            self._add("import_time_process", node, f"{name}() {'in setup.py' if self.is_setup else 'at import time'}")
+
+        self.generic_visit(node)
+
+    def visit_Constant(self, node: ast.Constant) -> None:
+        value = node.value
+        if isinstance(value, bytes):
+            value = value.decode("latin-1")
+        if isinstance(value, str) and len(value) >= 256 and _BLOB_RE.match(value) and shannon_entropy(value) >= 3.5:
+            self._add("obfuscated_blob", node, f"{len(value)}-character encoded literal")
+
+    def finish(self) -> List[PrescreenFinding]:
+        if self.has_cmdclass:
+            for cls in self.hook_classes:
+                self._add("install_hook", cls, f"custom setup command class {cls.name}")
+        return self.findings
+
+
+def _scan(path: str, source: str) -> Tuple[List[PrescreenFinding], bool]:
+    """(indicators found in one Python source file, whether it parsed)."""
+    try:
+        tree = ast.parse(source, filename=path)
+    except (SyntaxError, ValueError):
+        # Unparseable (e.g. Python 2) code: fall back to the one blatant pattern.
+        match = _ENCODED_EXEC_FALLBACK.search(source)
+        if not match:
+            return [], False
+        line = source.count("\n", 0, match.start()) + 1
+        return [PrescreenFinding(indicator="exec_encoded_payload", file=path, line=line,
+                                 detail="exec/eval of a decoded payload (unparsed source)",
+                                 weight=INDICATOR_WEIGHTS["exec_encoded_payload"])], False
+    visitor = _IndicatorVisitor(path)
+    visitor.visit(tree)
+    return visitor.finish(), True
+
+
+def scan_source(path: str, source: str) -> List[PrescreenFinding]:
+    """Indicators found in one Python source file."""
+    return _scan(path, source)[0]
+
+
+def score_findings(findings: Iterable[PrescreenFinding]) -> int:
+    """Sum of indicator weights, each indicator counted once per package, capped at 100."""
+    unique = {f.indicator: f.weight for f in findings}
+    return min(100, sum(unique.values()))
+
+
+def decide(risk_score: int, truncated: bool = False, unscanned: int = 0, strong: bool = False) -> str:
+    """
+    Map a risk score to 'malicious', 'benign' or 'escalate' under the
+    configured policy; *strong* says whether a strong indicator was found.
+    """
+    if risk_score >= AUTO_MALICIOUS_SCORE and strong:
+        return "malicious"
+    # An incomplete extraction, or code the scan could not check, is never auto-cleared.
+    if risk_score <= AUTO_BENIGN_SCORE and not truncated and not unscanned:
+        return "benign"
+    return "escalate"
+
+
+def prescreen_package(package: CachedPackage, truncated: bool = False) -> PrescreenReport:
+    """
+    Scan every Python file of *package* and apply the policy. Executable
+    files that are not scanned (oversized, binary or unparseable sources,
+    .pth and bytecode files) are listed in the report and force escalation.
+    """
+    findings: List[PrescreenFinding] = []
+    unscanned: List[str] = []
+    scanned = 0
+    for entry in package.store.iter_files():
+        suffix = PurePosixPath(entry["path"]).suffix.lower()
+        if suffix in UNSCANNED_SUFFIXES:
+            unscanned.append(entry["path"])
+            continue
+        if suffix not in SOURCE_SUFFIXES:
+            continue
+        if entry["kind"] != TEXT or entry["size"] > MAX_FILE_BYTES:
+            unscanned.append(entry["path"])
+            continue
+        file_findings, parsed = _scan(entry["path"], package.read_text(entry["path"]) or "")
+        findings.extend(file_findings)
+        if parsed:
+            scanned += 1
+        else:
+            unscanned.append(entry["path"])
+
+    risk_score = score_findings(findings)
+    report = PrescreenReport(
+        risk_score=risk_score,
+        decision=decide(risk_score, truncated, len(unscanned),
+                        strong=any(f.indicator in STRONG_INDICATORS for f in findings)),
+        files_scanned=scanned,
+        files_unscanned=unscanned,
+        findings=findings,
+    )
+    logger.info(f"Pre-screen scanned {scanned} files ({len(unscanned)} unscanned): "
+                f"risk score {risk_score}, decision {report.decision}")
+    return report
+
+
+def format_findings(report: PrescreenReport) -> str:
+    """Findings as a compact list for the classifier input."""
+    unscanned = ""
+    if report.files_unscanned:
+        unscanned = f"\nNot scanned (check these yourself): {', '.join(report.files_unscanned)}"
+    if not report.findings:
+        return "No static indicators found." + unscanned
+    lines = [f"- [{f.indicator}] {f.file}:{f.line} {f.detail}" for f in report.findings]
+    return f"Static pre-screen risk score {report.risk_score}/100:\n" + "\n".join(lines) + unscanned
@@ -0,0 +1,70 @@
+"""
+Progress events of a classification run.
+
+`ClassificationPipeline.classify` takes an optional `on_event(event, data)`
+callback and calls it as each stage completes, so callers can show partial
+results (the package metadata, the pre-screen report) while the classifier
+is still running. `ProgressHooks` adds one event per agent tool call on top
+of the `MetricsHooks` instrumentation, and `format_sse` renders an event
+for the `/classify/stream` endpoint.
+
+Events, in order: "extracted", "metadata", "prescreen" (when the pre-screen
+ran), "version_diff" (incremental scans with an earlier version),
+"classifying" (only when the classification agent runs), "tool_call" /
+"tool_result" (per agent tool call), "verdict". For zip and wheel files,
+"metadata" is read from the central directory and comes before "extracted".
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+
+from typing import Any, Callable, Dict, Optional
+
+from agents import Agent, RunContextWrapper, Tool
+
+from src.utilities.metrics import MetricsHooks, RunMetrics
+
+logger = logging.getLogger("progress")
+
+EventCallback = Callable[[str, Dict[str, Any]], None]
+
+# State fields sent with the "metadata" event.
+METADATA_FIELDS = ("package_name", "package_version", "author_name", "author_email", "package_homepage",
+                   "package_summary", "package_description", "requires_dist", "project_urls",
+                   "num_of_files", "num_of_python_files", "available_python_files")
+
+
+def emit(on_event: Optional[EventCallback], event: str, data: Dict[str, Any]) -> None:
+    """Call *on_event*; a failing listener must not fail the classification."""
+    if on_event is None:
+        return
+    try:
+        on_event(event, data)
+    except Exception as e:
+        logger.warning(f"Progress listener failed on {event}: {e}")
+
+
+class ProgressHooks(MetricsHooks):
+    """`MetricsHooks` that also reports every tool call to *on_event*."""
+
+    def __init__(self, run_metrics: Optional[RunMetrics], on_event: EventCallback):
+        super().__init__(run_metrics)
+        self.on_event = on_event
+
+    async def on_tool_start(self, context: RunContextWrapper[Any], agent: Agent[Any], tool: Tool) -> None:
+        await super().on_tool_start(context, agent, tool)
+        # Tool runs get a ToolContext carrying the call's JSON arguments.
+        emit(self.on_event, "tool_call", {"agent": agent.name, "tool": tool.name,
+                                          "arguments": getattr(context, "tool_arguments", None)})
+
+    async def on_tool_end(self, context: RunContextWrapper[Any], agent: Agent[Any], tool: Tool, result: str) -> None:
+        await super().on_tool_end(context, agent, tool, result)
+        emit(self.on_event, "tool_result", {"agent": agent.name, "tool": tool.name, "output_chars": len(str(result))})
+
+
+def format_sse(event: str, data: Any, event_id: Optional[int] = None) -> str:
+    """One server-sent event; *data* is sent as a single line of JSON."""
+    head = f"id: {event_id}\n" if event_id is not None else ""
+    return f"{head}event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
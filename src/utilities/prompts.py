@@ -81,9 +81,11 @@ Your responsibilities:
 
 Focus primarily on setup.py and init.py files. Use the get_python_script tool to access their contents if they are part of the available python files listed in the metadata information.
 
+get_python_script returns large files in windows. The first line then states which lines and bytes are shown, and the last line says how to fetch the rest (start_line / end_line). Large encoded blobs and data arrays are shown as a summary with their length and entropy. Request more of a file only when the part shown is not enough to decide.
+
 If these files are missing, check for similarly named files (e.g., __init__.py.py, setup.p.py) and mark those for analysis.
 
-Inspect imports in these files to identify other Python files they depend on.
+Call the get_import_graph tool once to see which package modules and external libraries setup.py and __init__.py import, with the file path of every module, instead of reading each file to find its imports.
 
 Compare imported files against available package files to detect suspicious or unexpected dependencies.
 
@@ -0,0 +1,179 @@
+"""
+Async PyPI client used to fetch packages for classification.
+
+A single `httpx.AsyncClient` (and therefore a single connection pool) is
+shared by every request. Artifacts are streamed to disk in chunks and
+verified against the sha256 digest published in the PyPI JSON API.
+
+With an `ArtifactCache`, release metadata is revalidated with ETag /
+Last-Modified instead of re-downloaded, artifacts are served from the
+local mirror, and cached metadata is used when the index is unreachable.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import configparser
+import hashlib
+import logging
+import os
+
+from pathlib import Path
+from typing import Any, Dict, Optional
+from urllib.parse import urljoin
+
+import aiofiles
+import httpx
+
+from src.utilities.artifact_cache import ArtifactCache
+
+logger = logging.getLogger("pypi client")
+
+parser = configparser.ConfigParser()
+parser.read("config.ini")
+
+PYPI_INDEX_URL = parser.get("PYPI_CONFIG", "PYPI_INDEX_URL", fallback="https://pypi.org")
+PYPI_MAX_CONNECTIONS = parser.getint("PYPI_CONFIG", "PYPI_MAX_CONNECTIONS", fallback=20)
+PYPI_TIMEOUT = parser.getfloat("PYPI_CONFIG", "PYPI_TIMEOUT", fallback=30.0)
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
+
+
+class PyPIError(Exception):
+    """Base error for PyPI lookups and downloads."""
+
+
+class PackageNotFoundError(PyPIError):
+    """The package, or the requested version of it, does not exist on the index."""
+
+
+class DigestMismatchError(PyPIError):
+    """The downloaded artifact does not match the digest published by the index."""
+
+
+class PyPIDownloader:
+    """Look up releases and stream artifacts from a PyPI-compatible JSON API."""
+
+    def __init__(self,
+                 index_url: str = PYPI_INDEX_URL,
+                 max_connections: int = PYPI_MAX_CONNECTIONS,
+                 timeout: float = PYPI_TIMEOUT,
+                 artifact_cache: Optional[ArtifactCache] = None):
+        self.index_url = index_url.rstrip("/") + "/"
+        self.artifact_cache = artifact_cache
+        self.max_connections = max_connections
+        self.timeout = timeout
+        self._client: Optional[httpx.AsyncClient] = None
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        # Created lazily so the client binds to the running event loop.
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                limits=httpx.Limits(max_connections=self.max_connections,
+                                    max_keepalive_connections=self.max_connections),
+                timeout=self.timeout,
+                follow_redirects=True,
+            )
+        return self._client
+
+    async def get_release_info(self, package_name: str) -> Dict[str, Any]:
+        """The JSON API document for *package_name*, revalidated against the cache if enabled."""
+        cached, validators = (await asyncio.to_thread(self.artifact_cache.get_metadata, package_name)
+                              if self.artifact_cache else (None, {}))
+        headers = {}
+        if cached is not None:
+            if "etag" in validators:
+                headers["If-None-Match"] = validators["etag"]
+            if "last-modified" in validators:
+                headers["If-Modified-Since"] = validators["last-modified"]
+
+        try:
+            response = await self.client.get(urljoin(self.index_url, f"pypi/{package_name}/json"), headers=headers)
+        except httpx.TransportError as e:
+            if cached is None:
+                raise
+            logger.info(f"Index unreachable ({e}), using cached metadata for {package_name}")
+            return cached
+
+        if response.status_code == 304 and cached is not None:
+            return cached
+        if response.status_code == 404:
+            raise PackageNotFoundError(f"Package {package_name} not found on {self.index_url}")
+        response.raise_for_status()
+        info = response.json()
+        if self.artifact_cache:
+            await asyncio.to_thread(self.artifact_cache.put_metadata, package_name, info, dict(response.headers))
+        return info
+
+    @staticmethod
+    def select_release_file(info: Dict[str, Any], package_name: str, version: Optional[str] = None) -> Dict[str, Any]:
+        """Pick the sdist of *version* (latest if omitted), falling back to the first file."""
+        version = version or info["info"]["version"]
+        releases = info["releases"].get(version)
+        if not releases:
+            raise PackageNotFoundError(f"No package found for {package_name}=={version}")
+        return next((r for r in releases if r["packagetype"] == "sdist"), releases[0])
+
+    async def download(self, package_name: str, version: Optional[str], dest_dir: str | Path) -> Path:
+        """
+        Download the sdist of *package_name*==*version* into *dest_dir* and
+        return its path. The file is streamed to disk and its sha256 is
+        checked against the digest in the JSON API.
+        """
+        info = None
+        if version and self.artifact_cache:
+            # Files of a published release are immutable, so a pinned version
+            # already in the cached metadata needs no round-trip at all.
+            cached, _ = await asyncio.to_thread(self.artifact_cache.get_metadata, package_name)
+            if cached and cached["releases"].get(version):
+                info = cached
+        if info is None:
+            info = await self.get_release_info(package_name)
+        version = version or info["info"]["version"]
+        release_file = self.select_release_file(info, package_name, version)
+
+        if self.artifact_cache:
+            dest = Path(dest_dir) / release_file["filename"]
+            expected = release_file.get("digests", {}).get("sha256")
+            if await asyncio.to_thread(self.artifact_cache.fetch_artifact, package_name, version,
+                                       release_file["filename"], dest, expected):
+                logger.info(f"Served {dest} from the artifact cache")
+                return dest
+
+        dest = await self.download_file(release_file, dest_dir)
+        if self.artifact_cache:
+            await asyncio.to_thread(self.artifact_cache.put_artifact, package_name, version,
+                                    release_file["filename"], dest)
+        return dest
+
+    async def download_file(self, release_file: Dict[str, Any], dest_dir: str | Path) -> Path:
+        """Stream one release file entry of the JSON API into *dest_dir*."""
+        dest = Path(dest_dir) / release_file["filename"]
+        expected = release_file.get("digests", {}).get("sha256")
+        sha256 = hashlib.sha256()
+
+        try:
+            async with self.client.stream("GET", urljoin(self.index_url, release_file["url"])) as response:
+                response.raise_for_status()
+                async with aiofiles.open(dest, "wb") as f:
+                    async for chunk in response.aiter_bytes(DOWNLOAD_CHUNK_SIZE):
+                        sha256.update(chunk)
+                        await f.write(chunk)
+        except BaseException:
+            if dest.exists():
+                os.remove(dest)
+            raise
+
+        if expected and sha256.hexdigest() != expected:
+            os.remove(dest)
+            raise DigestMismatchError(
+                f"sha256 mismatch for {release_file['filename']}: expected {expected}, got {sha256.hexdigest()}"
+            )
+
+        logger.info(f"Downloaded {dest}")
+        return dest
+
+    async def aclose(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
@@ -1,5 +1,6 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from enum import Enum
+from typing import Optional
 
 class RootAgentOutput(BaseModel):
     package_formatted_path: str
@@ -17,6 +18,16 @@ class MetadataAgentOutput(BaseModel):
     num_of_python_files: int
     available_python_files: list[str]
     
+class PackageFile(BaseModel):
+    path: str  # relative to the package root
+    size: int
+    sha256: Optional[str] = None  # None while only the archive index has been read
+
+    def __str__(self) -> str:
+        if self.sha256 is None:
+            return f"{self.path} ({self.size} bytes)"
+        return f"{self.path} ({self.size} bytes, sha256:{self.sha256[:12]})"
+
 class Classification(str, Enum):
     benign = "benign"
     malicious = "malicious"
@@ -27,3 +38,39 @@ class ClassificationAgentOutput(BaseModel):
     suspicious_files: list[str] = []
 
 
+
+
+class PrescreenFinding(BaseModel):
+    indicator: str
+    file: str
+    line: int
+    detail: str
+    weight: int
+
+class PrescreenReport(BaseModel):
+    risk_score: int
+    decision: str  # "malicious", "benign" or "escalate"
+    files_scanned: int
+    files_unscanned: list[str] = Field(default_factory=list)  # executable files the pre-screen could not check
+    findings: list[PrescreenFinding] = Field(default_factory=list)
+
+class ModuleImports(BaseModel):
+    path: str
+    internal: list[str] = Field(default_factory=list)  # modules of this package
+    external: list[str] = Field(default_factory=list)  # top-level names of other distributions / stdlib
+    dynamic: list[str] = Field(default_factory=list)   # literal __import__ / import_module targets
+
+class ImportGraph(BaseModel):
+    modules: dict[str, ModuleImports] = Field(default_factory=dict)
+    entry_points: list[str] = Field(default_factory=list)  # setup.py and top-level package __init__ modules
+
+class VersionDiff(BaseModel):
+    """Files added/changed since the nearest previously classified version, and that version's verdict."""
+    prior_version: str
+    prior_classification: str
+    prior_justification: str
+    prior_suspicious_files: list[str] = Field(default_factory=list)
+    added: list[str] = Field(default_factory=list)
+    changed: list[str] = Field(default_factory=list)
+    removed: list[str] = Field(default_factory=list)
+    unchanged: int = 0
@@ -0,0 +1,188 @@
+"""
+Deterministic stand-in for the LLM backend, for benchmarks and offline runs.
+
+`ScriptedModel` implements `agents.Model`, for plain and streamed runs, and
+replays a fixed script per agent (recognised by its output type): the same
+tool calls the real agents are expected to make, then a schema-valid final
+output. It keeps no state
+between calls; the current step is derived from the conversation itself, so
+one instance can serve any number of concurrent runs. An optional fixed
+latency and a token estimate make the timings and usage counters look like
+a real backend's without any network access.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import re
+
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional
+
+from agents import Model, ModelProvider
+from agents.items import ModelResponse
+from agents.usage import Usage
+from openai.types.responses import (Response, ResponseCompletedEvent, ResponseFunctionToolCall, ResponseOutputMessage,
+                                    ResponseOutputText, ResponseUsage)
+from openai.types.responses.response_usage import InputTokensDetails, OutputTokensDetails
+
+# Markers in the classifier input / tool outputs that the default policy treats as malicious evidence.
+MALICIOUS_MARKERS = ("[exec_encoded_payload]", "[setup_network_call]", "[import_time_process]",
+                     "[import_time_network]", "dynamic: ")
+
+
+def _get(item: Any, key: str) -> Any:
+    return item.get(key) if isinstance(item, dict) else getattr(item, key, None)
+
+
+def _text(input: str | List[Any]) -> str:
+    """All text of the conversation so far: user content and tool outputs."""
+    if isinstance(input, str):
+        return input
+    parts = []
+    for item in input:
+        content = _get(item, "content")
+        if isinstance(content, str):
+            parts.append(content)
+        elif isinstance(content, list):
+            parts.extend(str(_get(c, "text") or "") for c in content)
+        output = _get(item, "output")
+        if output is not None:
+            parts.append(str(output))
+    return "\n".join(parts)
+
+
+def _tool_outputs(input: str | List[Any]) -> List[str]:
+    if isinstance(input, str):
+        return []
+    return [str(_get(item, "output")) for item in input if _get(item, "type") == "function_call_output"]
+
+
+def _steps_done(input: str | List[Any]) -> int:
+    """Number of model turns that already ended in tool calls."""
+    if isinstance(input, str):
+        return 0
+    call_ids = [_get(item, "call_id") for item in input if _get(item, "type") == "function_call"]
+    # Parallel calls of one turn share the "<turn>-" prefix of their call ids.
+    return len({str(call_id).split("-")[0] for call_id in call_ids})
+
+
+def default_verdict(conversation: str) -> str:
+    return "malicious" if any(marker in conversation for marker in MALICIOUS_MARKERS) else "benign"
+
+
+# --- per-agent scripts ------------------------------------------------------------------
+# A script maps (step, conversation text, tool outputs) to either a list of
+# (tool name, arguments) calls or the final output object.
+
+def _root_script(step: int, text: str, outputs: List[str], verdict: Callable[[str], str]) -> Any:
+    path = re.search(r"Analyse the package at (.+?)\.\s*$", text.strip().splitlines()[0])
+    location = path.group(1) if path else ""
+    if step == 0:
+        tool = "unpack_folders" if not re.search(r"\.(zip|tar|gz|tgz|bz2|xz|7z|whl)$", location) else "unpack_archive_tool"
+        return [(tool, {"folder_path" if tool == "unpack_folders" else "zip_path": location})]
+    formatted = re.search(r"formatted package content (\S+)", "\n".join(outputs))
+    return {"package_formatted_path": formatted.group(1) if formatted else ""}
+
+
+def _metadata_script(step: int, text: str, outputs: List[str], verdict: Callable[[str], str]) -> Any:
+    location = re.search(r"JSON File Location: (\S+)", text)
+    path = location.group(1) if location else ""
+    if step == 0:
+        return [("extract_package_information", {"formatted_package_path": path}),
+                ("get_number_of_package_files", {"package_formatted_file_path": path})]
+    counts = re.search(r"(\d+) files, (\d+) Python files", "\n".join(outputs))
+    return {
+        "package_name": "NA", "package_version": "NA", "metadata_version": "NA", "author_name": "NA",
+        "author_email": "NA", "package_homepage": "NA", "package_summary": "NA", "package_description": "NA",
+        "num_of_files": int(counts.group(1)) if counts else 0,
+        "num_of_python_files": int(counts.group(2)) if counts else 0,
+        "available_python_files": [],
+    }
+
+
+def _classification_script(step: int, text: str, outputs: List[str], verdict: Callable[[str], str]) -> Any:
+    if step == 0:
+        return [("get_import_graph", {})]
+    if step == 1:
+        # Read the entry points named by the graph, like the prompt asks.
+        paths = re.findall(r"^\S+ \[([^\]]+\.py)\]", outputs[0] if outputs else "", re.MULTILINE)[:3]
+        if paths:
+            return [("get_python_script", {"file_name": path}) for path in paths]
+    classification = verdict(text)
+    suspicious = sorted(set(re.findall(r"\] (\S+\.py):\d+", text))) if classification == "malicious" else []
+    return {"classification": classification, "justification": f"Scripted verdict: {classification}.",
+            "suspicious_files": suspicious}
+
+
+SCRIPTS: Dict[str, Callable[..., Any]] = {
+    "RootAgentOutput": _root_script,
+    "MetadataAgentOutput": _metadata_script,
+    "ClassificationAgentOutput": _classification_script,
+}
+
+
+class ScriptedModel(Model):
+    """An `agents.Model` that replays the per-agent scripts above."""
+
+    def __init__(self, latency: float = 0.0, verdict: Callable[[str], str] = default_verdict,
+                 scripts: Optional[Dict[str, Callable[..., Any]]] = None):
+        self.latency = latency
+        self.verdict = verdict
+        self.scripts = {**SCRIPTS, **(scripts or {})}
+
+    async def get_response(self, system_instructions, input, model_settings, tools, output_schema,
+                           handoffs, tracing, *, previous_response_id=None, conversation_id=None,
+                           prompt=None) -> ModelResponse:
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        schema_name = output_schema.name() if output_schema is not None else ""
+        script = self.scripts.get(schema_name)
+        step = _steps_done(input)
+        text = _text(input)
+        result = script(step, text, _tool_outputs(input), self.verdict) if script else "done"
+
+        if isinstance(result, list):
+            output = [ResponseFunctionToolCall(type="function_call", call_id=f"{step}-{i}", name=name,
+                                               arguments=json.dumps(arguments))
+                      for i, (name, arguments) in enumerate(result)]
+            reply = json.dumps([call.model_dump() for call in output])
+        else:
+            reply = result if isinstance(result, str) else json.dumps(result)
+            output = [ResponseOutputMessage(id=f"msg-{step}", type="message", role="assistant", status="completed",
+                                            content=[ResponseOutputText(type="output_text", text=reply, annotations=[])])]
+
+        # Rough 4-characters-per-token estimate, so usage counters move realistically.
+        input_tokens = (len(system_instructions or "") + len(text)) // 4
+        output_tokens = len(reply) // 4
+        usage = Usage(requests=1, input_tokens=input_tokens, output_tokens=output_tokens,
+                      total_tokens=input_tokens + output_tokens)
+        return ModelResponse(output=output, usage=usage, response_id=None)
+
+    async def stream_response(self, system_instructions, input, model_settings, tools, output_schema,
+                              handoffs, tracing, *, previous_response_id=None, conversation_id=None,
+                              prompt=None) -> AsyncIterator[Any]:
+        """The scripted turn as a single `response.completed` event, which is all `Runner.run_streamed` needs."""
+        response = await self.get_response(system_instructions, input, model_settings, tools, output_schema,
+                                           handoffs, tracing, previous_response_id=previous_response_id,
+                                           conversation_id=conversation_id, prompt=prompt)
+        usage = ResponseUsage(input_tokens=response.usage.input_tokens, output_tokens=response.usage.output_tokens,
+                              total_tokens=response.usage.total_tokens,
+                              input_tokens_details=InputTokensDetails(cached_tokens=0),
+                              output_tokens_details=OutputTokensDetails(reasoning_tokens=0))
+        yield ResponseCompletedEvent(
+            type="response.completed", sequence_number=0,
+            response=Response(id=f"scripted-{_steps_done(input)}", created_at=0, model="scripted", object="response",
+                              output=response.output, parallel_tool_calls=False, tool_choice="auto", tools=[],
+                              usage=usage),
+        )
+
+
+class ScriptedModelProvider(ModelProvider):
+    """Returns the same `ScriptedModel` for every model name (for `RunConfig(model_provider=...)`)."""
+
+    def __init__(self, model: Optional[ScriptedModel] = None):
+        self.model = model or ScriptedModel()
+
+    def get_model(self, model_name: Optional[str]) -> Model:
+        return self.model
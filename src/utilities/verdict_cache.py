@@ -0,0 +1,126 @@
+"""
+Persistent, content-addressed cache of classification verdicts.
+
+Verdicts are keyed by the sha256 of the classified artifact together with
+the model name and a fingerprint of the classifier prompt, so the same
+bytes classified by the same model and prompt are only analysed once.
+Only full scans are cached: an incremental verdict depends on which
+earlier version was in the history when it ran.
+Entries expire after a TTL and the least recently used ones are evicted
+once the stored results exceed a byte budget.
+"""
+
+from __future__ import annotations
+
+import configparser
+import hashlib
+import json
+import logging
+import sqlite3
+import time
+
+from contextlib import closing
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from src.utilities.prompts import CLASSIFIER_PROMPT
+
+logger = logging.getLogger("verdict cache")
+
+parser = configparser.ConfigParser()
+parser.read("config.ini")
+
+VERDICT_CACHE_PATH = parser.get("CACHE_CONFIG", "VERDICT_CACHE_PATH", fallback=".temp/verdict_cache.sqlite3")
+VERDICT_CACHE_TTL_SECONDS = parser.getint("CACHE_CONFIG", "VERDICT_CACHE_TTL_SECONDS", fallback=7 * 24 * 3600)
+VERDICT_CACHE_MAX_BYTES = parser.getint("CACHE_CONFIG", "VERDICT_CACHE_MAX_BYTES", fallback=64 * 1024 * 1024)
+
+# Changes whenever the classifier prompt is edited, invalidating old verdicts.
+PROMPT_VERSION = hashlib.sha256(CLASSIFIER_PROMPT.encode("utf-8")).hexdigest()[:12]
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS verdicts (
+    artifact_sha256 TEXT NOT NULL,
+    model_name      TEXT NOT NULL,
+    prompt_version  TEXT NOT NULL,
+    result          TEXT NOT NULL,
+    size            INTEGER NOT NULL,
+    created_at      REAL NOT NULL,
+    last_access     REAL NOT NULL,
+    PRIMARY KEY (artifact_sha256, model_name, prompt_version)
+)
+"""
+
+
+def artifact_sha256(path: str | Path, chunk_size: int = 1024 * 1024) -> str:
+    """sha256 of the file at *path*, read in chunks."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class VerdictCache:
+    """SQLite-backed verdict cache with TTL and size-based LRU eviction."""
+
+    def __init__(self,
+                 db_path: str | Path = VERDICT_CACHE_PATH,
+                 ttl_seconds: int = VERDICT_CACHE_TTL_SECONDS,
+                 max_bytes: int = VERDICT_CACHE_MAX_BYTES,
+                 prompt_version: str = PROMPT_VERSION):
+        self.db_path = Path(db_path)
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.prompt_version = prompt_version
+        self.hits = 0
+        self.misses = 0
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        with closing(self._connect()) as conn, conn:
+            conn.execute(_SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        # One short-lived connection per call keeps this safe from worker threads.
+        return sqlite3.connect(self.db_path, timeout=30)
+
+    def get(self, artifact_hash: str, model_name: str) -> Optional[Dict[str, Any]]:
+        """The cached result for this artifact and model, or None on a miss or expiry."""
+        now = time.time()
+        with closing(self._connect()) as conn, conn:
+            conn.execute("DELETE FROM verdicts WHERE created_at < ?", (now - self.ttl_seconds,))
+            row = conn.execute(
+                "SELECT result FROM verdicts WHERE artifact_sha256 = ? AND model_name = ? AND prompt_version = ?",
+                (artifact_hash, model_name, self.prompt_version),
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            conn.execute(
+                "UPDATE verdicts SET last_access = ? WHERE artifact_sha256 = ? AND model_name = ? AND prompt_version = ?",
+                (now, artifact_hash, model_name, self.prompt_version),
+            )
+        self.hits += 1
+        return json.loads(row[0])
+
+    def put(self, artifact_hash: str, model_name: str, result: Dict[str, Any]) -> None:
+        """Store *result* and evict least recently used entries beyond the byte budget."""
+        payload = json.dumps(result, default=str)
+        now = time.time()
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO verdicts VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (artifact_hash, model_name, self.prompt_version, payload, len(payload), now, now),
+            )
+            total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM verdicts").fetchone()[0]
+            if total > self.max_bytes:
+                evicted = 0
+                for rowid, size in conn.execute("SELECT rowid, size FROM verdicts ORDER BY last_access").fetchall():
+                    if total <= self.max_bytes:
+                        break
+                    conn.execute("DELETE FROM verdicts WHERE rowid = ?", (rowid,))
+                    total -= size
+                    evicted += 1
+                logger.info(f"Evicted {evicted} verdicts from the verdict cache")
+
+    def invalidate(self, artifact_hash: str) -> None:
+        with closing(self._connect()) as conn, conn:
+            conn.execute("DELETE FROM verdicts WHERE artifact_sha256 = ?", (artifact_hash,))
@@ -0,0 +1,207 @@
+"""
+Per-file history of classified package versions, for incremental scans.
+
+After every classification the per-file sha256 of the package (taken from
+its store manifest) is recorded together with the verdict, keyed by the
+normalized project name and version. When `foo==1.2.4` is then scanned in
+incremental mode, `nearest_prior` finds the closest lower version already
+classified and `diff_files` reduces the scan to the files that were added
+or changed since. That delta and the prior verdict are all the
+classification agent is given, and an unchanged file set reuses the prior
+verdict outright. Patch releases that slip a payload into one file are
+exactly what this catches cheaply. Packaging metadata is compared too,
+since a release can also turn malicious by adding a dependency or an
+entry point. Only the dependency fields of PKG-INFO / METADATA count,
+since the version field changes with every release. Versioned
+`.dist-info` / `.data` directory names are compared without their version.
+"""
+
+from __future__ import annotations
+
+import configparser
+import hashlib
+import json
+import logging
+import re
+import sqlite3
+import time
+
+from contextlib import closing
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from packaging.version import InvalidVersion, Version
+
+from src.utilities.core_metadata import parse_core_metadata
+from src.utilities.schemas import VersionDiff
+
+logger = logging.getLogger("version history")
+
+parser = configparser.ConfigParser()
+parser.read("config.ini")
+
+VERSION_HISTORY_PATH = parser.get("CACHE_CONFIG", "VERSION_HISTORY_PATH", fallback=".temp/version_history.sqlite3")
+# Files listed in the diff handed to the agent; the counts always cover everything.
+VERSION_DIFF_MAX_FILES = parser.getint("CACHE_CONFIG", "VERSION_DIFF_MAX_FILES", fallback=200)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS versions (
+    project        TEXT NOT NULL,
+    version        TEXT NOT NULL,
+    classification TEXT NOT NULL,
+    justification  TEXT NOT NULL,
+    suspicious     TEXT NOT NULL,
+    files          TEXT NOT NULL,
+    created_at     REAL NOT NULL,
+    PRIMARY KEY (project, version)
+)
+"""
+
+
+def normalize_project(name: str) -> str:
+    """PEP 503 normalized project name."""
+    return re.sub(r"[-_.]+", "-", name).lower()
+
+
+def _root_prefix(paths: Iterable[str]) -> str:
+    """The '<name>-<version>/' directory every path of an sdist starts with, if any."""
+    paths = list(paths)
+    heads = {path.split("/", 1)[0] for path in paths}
+    if len(heads) == 1 and all("/" in path for path in paths):
+        return heads.pop() + "/"
+    return ""
+
+
+# File lists rewritten by every build; they neither run nor name a dependency.
+_BUILD_NOISE = {"RECORD", "SOURCES.txt"}
+_CORE_METADATA = {"PKG-INFO", "METADATA"}
+# The core metadata fields that change what gets installed.
+_DEPENDENCY_FIELDS = ("requires-dist", "requires", "requires-python", "requires-external",
+                      "provides-extra", "obsoletes-dist")
+# '<name>-<version>.dist-info' / '.data' in wheels.
+_VERSIONED_DIR = re.compile(r"^([^-/]+)-[^/]+\.(dist-info|data)$")
+
+ReadText = Callable[[str], Optional[str]]
+
+
+def _stable_path(rel_path: str) -> str:
+    head, sep, rest = rel_path.partition("/")
+    return _VERSIONED_DIR.sub(r"\1.\2", head) + sep + rest if sep else rel_path
+
+
+def _dependency_digest(text: str) -> str:
+    fields = parse_core_metadata(text)
+    payload = json.dumps({key: fields.get(key) for key in _DEPENDENCY_FIELDS}, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def stable_files(entries: Iterable[Dict[str, Any]], read_text: Optional[ReadText] = None) -> Dict[str, Tuple[str, str]]:
+    """
+    Version-independent path -> (store path, hash), from store manifest
+    entries. Core metadata is hashed on its dependency fields when
+    *read_text* is given (otherwise on its bytes, so it always differs).
+    """
+    entries = list(entries)
+    prefix = _root_prefix(entry["path"] for entry in entries)
+    files = {}
+    for entry in entries:
+        rel_path = entry["path"][len(prefix):]
+        name = rel_path.rsplit("/", 1)[-1]
+        if name in _BUILD_NOISE:
+            continue
+        digest = entry["sha256"]
+        if name in _CORE_METADATA and read_text is not None:
+            text = read_text(entry["path"])
+            if text is not None:
+                digest = "deps:" + _dependency_digest(text)
+        files[_stable_path(rel_path)] = (entry["path"], digest)
+    return files
+
+
+def file_hashes(entries: Iterable[Dict[str, Any]], read_text: Optional[ReadText] = None) -> Dict[str, str]:
+    """Version-independent path -> hash of every file that can change the package's behaviour."""
+    return {path: digest for path, (_, digest) in stable_files(entries, read_text).items()}
+
+
+def diff_files(prior: Dict[str, str], current: Dict[str, str]) -> Dict[str, List[str]]:
+    return {
+        "added": sorted(path for path in current if path not in prior),
+        "changed": sorted(path for path in current if path in prior and prior[path] != current[path]),
+        "removed": sorted(path for path in prior if path not in current),
+    }
+
+
+def _version_key(version: str) -> Optional[Version]:
+    try:
+        return Version(version)
+    except InvalidVersion:
+        return None
+
+
+class VersionHistory:
+    """SQLite-backed record of classified versions and their file hashes."""
+
+    def __init__(self, db_path: str | Path = VERSION_HISTORY_PATH):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        with closing(self._connect()) as conn, conn:
+            conn.execute(_SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        # One short-lived connection per call keeps this safe from worker threads.
+        return sqlite3.connect(self.db_path, timeout=30)
+
+    def record(self, project: str, version: str, classification: str, justification: str,
+               suspicious_files: List[str], files: Dict[str, str]) -> None:
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO versions VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (normalize_project(project), version, classification, justification,
+                 json.dumps(suspicious_files), json.dumps(files), time.time()),
+            )
+
+    def nearest_prior(self, project: str, version: str) -> Optional[Dict[str, Any]]:
+        """
+        The classified version of *project* closest below *version*. When
+        versions do not parse, the most recently classified other version.
+        """
+        with closing(self._connect()) as conn:
+            rows = conn.execute(
+                "SELECT version, classification, justification, suspicious, files, created_at "
+                "FROM versions WHERE project = ? AND version != ?",
+                (normalize_project(project), version),
+            ).fetchall()
+        if not rows:
+            return None
+        current = _version_key(version)
+        candidates = [(key, row) for row in rows if (key := _version_key(row[0])) is not None]
+        if current is not None and candidates:
+            lower = [(key, row) for key, row in candidates if key < current]
+            if not lower:
+                return None
+            row = max(lower, key=lambda item: item[0])[1]
+        else:
+            row = max(rows, key=lambda r: r[5])
+        return {"version": row[0], "classification": row[1], "justification": row[2],
+                "suspicious_files": json.loads(row[3]), "files": json.loads(row[4])}
+
+    def compare(self, project: str, version: str, entries: Iterable[Dict[str, Any]],
+                read_text: Optional[ReadText] = None) -> Optional[VersionDiff]:
+        """Diff the store *entries* of *project*==*version* against its nearest prior version."""
+        prior = self.nearest_prior(project, version)
+        if prior is None:
+            return None
+        files = stable_files(entries, read_text)
+        current = {path: digest for path, (_, digest) in files.items()}
+        diff = diff_files(prior["files"], current)
+        return VersionDiff(
+            prior_version=prior["version"],
+            prior_classification=prior["classification"],
+            prior_justification=prior["justification"],
+            prior_suspicious_files=prior["suspicious_files"],
+            # Paths as they appear in this package's store, so the tools can open them.
+            added=[files[path][0] for path in diff["added"]],
+            changed=[files[path][0] for path in diff["changed"]],
+            removed=diff["removed"],
+            unchanged=len(current) - len(diff["added"]) - len(diff["changed"]),
+        )
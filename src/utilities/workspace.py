@@ -0,0 +1,142 @@
+"""
+Per-run scratch directories for package extraction.
+
+Every classification gets its own workspace under WORKSPACE_ROOT (point it
+at a tmpfs such as /dev/shm to keep extraction off the disk). The package
+store and any scratch files of the run live there, so concurrent runs on
+packages with the same name never share paths, and the workspace is
+removed when the run finishes. Its byte quota is handed to the extraction
+limits, so one package cannot fill the disk. Workspace directories are
+named `<pid>-<random>`; `WorkspaceManager.sweep` (run at API startup)
+removes those whose process is gone or that are older than
+WORKSPACE_MAX_AGE_SECONDS, which covers runs killed before their cleanup.
+"""
+
+from __future__ import annotations
+
+import configparser
+import logging
+import os
+import shutil
+import tempfile
+import time
+
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator, Optional
+
+logger = logging.getLogger("workspace")
+
+parser = configparser.ConfigParser()
+parser.read("config.ini")
+
+WORKSPACE_ROOT = parser.get("WORKSPACE_CONFIG", "WORKSPACE_ROOT", fallback=".temp/workspaces")
+WORKSPACE_MAX_BYTES = parser.getint("WORKSPACE_CONFIG", "WORKSPACE_MAX_BYTES", fallback=1024 ** 3)
+WORKSPACE_MAX_AGE_SECONDS = parser.getint("WORKSPACE_CONFIG", "WORKSPACE_MAX_AGE_SECONDS", fallback=24 * 3600)
+# Leave finished workspaces in place (until the next sweep) to inspect extracted stores.
+KEEP_WORKSPACES = parser.getboolean("WORKSPACE_CONFIG", "KEEP_WORKSPACES", fallback=False)
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def directory_size(path: str | Path) -> int:
+    """Bytes of the regular files under *path* (symlinks not followed)."""
+    total = 0
+    stack = [str(path)]
+    while stack:
+        try:
+            with os.scandir(stack.pop()) as it:
+                for entry in it:
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(entry.path)
+                    elif entry.is_file(follow_symlinks=False):
+                        total += entry.stat(follow_symlinks=False).st_size
+        except FileNotFoundError:
+            continue
+    return total
+
+
+class Workspace:
+    """One run's scratch directory and its byte quota."""
+
+    def __init__(self, root: Path, max_bytes: int = WORKSPACE_MAX_BYTES, keep: bool = KEEP_WORKSPACES):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.keep = keep
+
+    def usage(self) -> int:
+        return directory_size(self.root)
+
+    def remaining(self) -> int:
+        return max(self.max_bytes - self.usage(), 0)
+
+    def cleanup(self) -> None:
+        if self.keep:
+            logger.info(f"Keeping workspace {self.root} ({self.usage()} bytes)")
+            return
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def __enter__(self) -> "Workspace":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.cleanup()
+
+
+class WorkspaceManager:
+    """Creates workspaces under *root* and sweeps the ones left behind."""
+
+    def __init__(self, root: str | Path = WORKSPACE_ROOT, max_bytes: int = WORKSPACE_MAX_BYTES,
+                 max_age_seconds: int = WORKSPACE_MAX_AGE_SECONDS):
+        self.root = Path(root).expanduser()
+        self.max_bytes = max_bytes
+        self.max_age_seconds = max_age_seconds
+
+    def create(self, max_bytes: Optional[int] = None) -> Workspace:
+        """A new, empty workspace owned by this process."""
+        self.root.mkdir(parents=True, exist_ok=True)
+        root = Path(tempfile.mkdtemp(dir=self.root, prefix=f"{os.getpid()}-"))
+        return Workspace(root, self.max_bytes if max_bytes is None else max_bytes)
+
+    @contextmanager
+    def workspace(self, max_bytes: Optional[int] = None) -> Iterator[Workspace]:
+        """A workspace removed when the block exits, whether or not it raised."""
+        with self.create(max_bytes) as workspace:
+            yield workspace
+
+    def sweep(self, startup: bool = False) -> int:
+        """
+        Remove workspaces of dead processes and expired ones; returns how many
+        were removed. At *startup* this process owns nothing yet, so
+        workspaces carrying its pid (reused, e.g. pid 1 in a container) go too.
+        """
+        if not self.root.is_dir():
+            return 0
+        removed = 0
+        now = time.time()
+        for path in self.root.iterdir():
+            if not path.is_dir():
+                continue
+            pid = path.name.split("-", 1)[0]
+            try:
+                expired = now - path.stat().st_mtime > self.max_age_seconds
+            except FileNotFoundError:
+                continue
+            stale = not pid.isdigit() or not _pid_alive(int(pid)) or (startup and int(pid) == os.getpid())
+            if expired or stale:
+                shutil.rmtree(path, ignore_errors=True)
+                removed += 1
+        if removed:
+            logger.info(f"Swept {removed} stale workspaces from {self.root}")
+        return removed
+
+
+WORKSPACES = WorkspaceManager()
@@ -26,22 +26,74 @@ version = st.text_input("Enter Version")
 upload_file = st.file_uploader("Upload Package", type=["tar.gz", "zip", "py"])
 
 
+def stream_events(response):
+    """Yield (event, data) pairs from a server-sent events response."""
+    event = "message"
+    for line in response.iter_lines(decode_unicode=True):
+        if not line:
+            continue
+        if line.startswith(":"):
+            # keep-alive comment
+            continue
+        if line.startswith("event:"):
+            event = line[len("event:"):].strip()
+        elif line.startswith("data:"):
+            yield event, json.loads(line[len("data:"):].strip())
+            event = "message"
+
+
 if st.button("Check Package", type="primary", use_container_width=True):
-    response = requests.post(
-        f"{API_URL}/classify", 
-        files={"upload_file": upload_file} if upload_file else None,
-        data={"package_name": package_name, "version": version, "model_choice": model_choice}
-    )
-    result_data = response.json()
-    if response.status_code == 200:
+    result_data = None
+    metadata_area = st.empty()
+    with st.status("Classifying package...", expanded=True) as status:
+        with requests.post(
+            f"{API_URL}/classify/stream",
+            files={"upload_file": upload_file} if upload_file else None,
+            data={"package_name": package_name, "version": version},
+            stream=True,
+        ) as response:
+            if response.status_code != 200:
+                status.update(label="Classification failed", state="error")
+                st.error(f"Failed to classify package: {response.status_code} {response.text}")
+            else:
+                for event, data in stream_events(response):
+                    if event == "downloaded":
+                        st.write(f"Downloaded {data['package_name']} {data['version'] or ''}")
+                    elif event == "cache_hit":
+                        st.write("Verdict found in cache")
+                    elif event == "extracted":
+                        st.write(f"Extracted {data['files']} files ({data['bytes']} bytes)"
+                                 + (" - truncated" if data["truncated"] else ""))
+                    elif event == "metadata":
+                        # Shown right away, while the classifier is still running.
+                        with metadata_area.container():
+                            st.subheader(f"{data['package_name'] or 'Package'} {data['package_version'] or ''}")
+                            st.json({k: v for k, v in data.items() if k != "available_python_files"}, expanded=False)
+                        st.write(f"Metadata ready: {data['num_of_python_files']} Python files")
+                    elif event == "prescreen":
+                        st.write(f"Static pre-screen: risk score {data['risk_score']}, {data['findings']} findings, "
+                                 f"decision: {data['decision']}")
+                    elif event == "classifying":
+                        st.write("Classification agent running...")
+                    elif event == "tool_call":
+                        st.write(f"`{data['tool']}` {data['arguments'] or ''}")
+                    elif event == "verdict":
+                        st.write(f"Verdict: **{data['classification']}**")
+                    elif event == "result":
+                        result_data = data
+                        status.update(label=f"Classified as {data['classification']}", state="complete")
+                    elif event == "error":
+                        status.update(label="Classification failed", state="error")
+                        st.error(f"Failed to classify package: {data['status_code']} {data['detail']}")
+
+    if result_data is not None:
         package_name = package_name if package_name else result_data["package_name"]
         package_version = version if version else result_data["package_metadata"]["package_version"]
         result_data["package_name"] = package_name
         result_data["package_version"] = package_version
-        classification_results = pd.concat([classification_results, pd.DataFrame(result_data)], ignore_index=True)
+        row = {column: [result_data.get(column)] for column in classification_results.columns}
+        classification_results = pd.concat([classification_results, pd.DataFrame(row)], ignore_index=True)
         st.session_state["classification_results"] = classification_results
-    else:
-        st.error(f"Failed to classify package: {response.status_code} {response.text}")
         
 st.dataframe(classification_results)
     
\ No newline at end of file
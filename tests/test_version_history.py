@@ -0,0 +1,39 @@
+import hashlib
+
+from src.utilities.version_history import VersionHistory, file_hashes
+
+
+def entries(files):
+    return [{"path": path, "sha256": hashlib.sha256(text.encode()).hexdigest()} for path, text in files.items()]
+
+
+def wheel(version, requires=(), entry_points=""):
+    metadata = f"Metadata-Version: 2.1\nName: pkg\nVersion: {version}\n" + "".join(f"Requires-Dist: {r}\n" for r in requires)
+    files = {"pkg/__init__.py": "x = 1\n",
+             f"pkg-{version}.dist-info/METADATA": metadata,
+             f"pkg-{version}.dist-info/RECORD": f"pkg/__init__.py,sha256={version}\n"}
+    if entry_points:
+        files[f"pkg-{version}.dist-info/entry_points.txt"] = entry_points
+    return files
+
+
+def compare(tmp_path, old, new):
+    history = VersionHistory(tmp_path / "history.sqlite3")
+    history.record("pkg", "1.0", "benign", "fine", [], file_hashes(entries(old), old.get))
+    return history.compare("pkg", "1.1", entries(new), new.get)
+
+
+def test_version_bump_alone_changes_nothing(tmp_path):
+    diff = compare(tmp_path, wheel("1.0", ["requests"]), wheel("1.1", ["requests"]))
+    assert (diff.added, diff.changed, diff.removed) == ([], [], [])
+
+
+def test_new_dependency_is_a_change(tmp_path):
+    diff = compare(tmp_path, wheel("1.0", ["requests"]), wheel("1.1", ["requests", "evil-helper"]))
+    assert diff.changed == ["pkg-1.1.dist-info/METADATA"]
+
+
+def test_new_entry_point_is_an_addition(tmp_path):
+    new = wheel("1.1", entry_points="[console_scripts]\npip = pkg:run\n")
+    diff = compare(tmp_path, wheel("1.0"), new)
+    assert diff.added == ["pkg-1.1.dist-info/entry_points.txt"]